@@ -1,21 +1,144 @@
 from __future__ import annotations
 
-from typing import List
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 
-from ..data_models import Candidate, DevelopmentPlan
+import numpy as np
+
+from ..data_models import Candidate, DevelopmentPlan, Role
+from ..skill_matrix import SkillMatrix, build_skill_matrix
+
+DEFAULT_GOALS = [
+    "Publish in top-tier venues",
+    "Enhance teaching effectiveness",
+    "Expand interdisciplinary collaborations",
+]
+DEFAULT_RECOMMENDATIONS = [
+    "Join pedagogy workshop series",
+    "Identify a senior mentor for grant writing",
+    "Present at departmental seminar",
+]
+
+# First matching keyword decides how a missing skill is addressed
+_GAP_RECOMMENDATIONS: List[Tuple[Tuple[str, ...], str]] = [
+    (("teaching", "curriculum", "pedagogy", "course", "instruction", "student"), "Join pedagogy workshop series"),
+    (("grant",), "Identify a senior mentor for grant writing"),
+    (("mentor", "leadership", "management", "administration", "supervision"), "Take on a committee or mentoring role"),
+    (("publication", "research", "writing"), "Present at departmental seminar"),
+]
+
+
+def _recommendation(skill: str) -> str:
+    for keywords, text in _GAP_RECOMMENDATIONS:
+        if any(k in skill for k in keywords):
+            return text
+    return f"Complete a course or applied project in {skill}"
+
+
+@dataclass
+class CohortPlan:
+    plans: Dict[str, DevelopmentPlan]
+    # department -> candidates, fully_qualified, mean_missing_required, required_gaps, preferred_gaps
+    gap_stats: Dict[str, Dict] = field(default_factory=dict)
+    # candidate id -> role id the plan targets
+    targets: Dict[str, str] = field(default_factory=dict)
 
 
 class DevelopmentAgent:
     def recommend(self, candidate: Candidate) -> DevelopmentPlan:
-        goals: List[str] = [
-            "Publish in top-tier venues",
-            "Enhance teaching effectiveness",
-            "Expand interdisciplinary collaborations",
-        ]
-        recommendations: List[str] = [
-            "Join pedagogy workshop series",
-            "Identify a senior mentor for grant writing",
-            "Present at departmental seminar",
-        ]
-        return DevelopmentPlan(candidate_id=candidate.id, goals=goals, recommendations=recommendations)
+        return DevelopmentPlan(
+            candidate_id=candidate.id, goals=list(DEFAULT_GOALS), recommendations=list(DEFAULT_RECOMMENDATIONS)
+        )
+
+    def _plan_text(self, role: Role, missing_required: List[str], missing_preferred: List[str]) -> Tuple[List[str], List[str]]:
+        if not missing_required and not missing_preferred:
+            return list(DEFAULT_GOALS), list(DEFAULT_RECOMMENDATIONS)
+        goals = [f"Close required gap for {role.title}: {s}" for s in missing_required]
+        goals += [f"Build preferred skill: {s}" for s in missing_preferred]
+        recommendations = list(dict.fromkeys(_recommendation(s) for s in missing_required + missing_preferred))
+        return goals, recommendations
+
+    def plan_cohort(
+        self,
+        candidates: Sequence[Candidate],
+        roles: Sequence[Role],
+        skills: Optional[SkillMatrix] = None,
+        assignment: Optional[Mapping[str, str]] = None,
+    ) -> CohortPlan:
+        # Gaps for the whole cohort come from sparse column slices of the skill matrix. Each
+        # candidate is planned against `assignment[id]`, or else the role it misses the fewest
+        # required (then preferred) skills for; plan text is rendered once per distinct gap pattern.
+        if not candidates or not roles:
+            return CohortPlan(plans={c.id: self.recommend(c) for c in candidates})
+        ids = [c.id for c in candidates]
+        wanted: List[List[str]] = []
+        n_required: List[int] = []
+        for role in roles:
+            required = list(dict.fromkeys(s.lower() for s in role.required_skills))
+            preferred = [s for s in dict.fromkeys(s.lower() for s in role.preferred_skills) if s not in required]
+            wanted.append(required + preferred)
+            n_required.append(len(required))
+        skills = skills.select(ids) if skills is not None else build_skill_matrix(candidates)
+        skills = skills.with_phrases(candidates, [p for w in wanted for p in w])
+
+        if assignment is not None:
+            role_index = {role.id: r for r, role in enumerate(roles)}
+            target = np.array([role_index[assignment[cid]] for cid in ids], dtype=np.int64)
+        else:
+            missing_required = np.column_stack(
+                [n_required[r] - skills.counts(wanted[r][: n_required[r]]) for r in range(len(roles))]
+            )
+            preferred_hits = np.column_stack([skills.counts(wanted[r][n_required[r] :]) for r in range(len(roles))])
+            cost = missing_required * (int(preferred_hits.max(initial=0)) + 1) - preferred_hits
+            target = np.argmin(cost, axis=1)
+
+        plans: Dict[str, DevelopmentPlan] = {}
+        targets: Dict[str, str] = {}
+        totals: Dict[str, Dict] = {}
+        for r, role in enumerate(roles):
+            rows = np.flatnonzero(target == r)
+            if not len(rows):
+                continue
+            phrases = wanted[r]
+            req = n_required[r]
+            if phrases:
+                missing = ~skills.matrix[rows][:, skills.column_indices(phrases)].toarray()
+            else:
+                missing = np.zeros((len(rows), 0), dtype=bool)
+            patterns, inverse = np.unique(missing, axis=0, return_inverse=True)
+            texts = [
+                self._plan_text(
+                    role,
+                    [phrases[j] for j in np.flatnonzero(p[:req])],
+                    [phrases[req + j] for j in np.flatnonzero(p[req:])],
+                )
+                for p in patterns
+            ]
+            for row, k in zip(rows, np.ravel(inverse)):
+                goals, recommendations = texts[k]
+                plans[ids[row]] = DevelopmentPlan(candidate_id=ids[row], goals=goals, recommendations=recommendations)
+                targets[ids[row]] = role.id
+
+            gaps = missing.sum(axis=0)
+            missing_required = missing[:, :req].sum(axis=1)
+            dept = totals.setdefault(
+                role.department or role.id,
+                {"candidates": 0, "fully_qualified": 0, "missing_required": 0, "required_gaps": {}, "preferred_gaps": {}},
+            )
+            dept["candidates"] += len(rows)
+            dept["fully_qualified"] += int((missing_required == 0).sum())
+            dept["missing_required"] += int(missing_required.sum())
+            for j, phrase in enumerate(phrases):
+                bucket = dept["required_gaps"] if j < req else dept["preferred_gaps"]
+                bucket[phrase] = bucket.get(phrase, 0) + int(gaps[j])
 
+        gap_stats: Dict[str, Dict] = {}
+        for department, dept in totals.items():
+            gap_stats[department] = {
+                "candidates": dept["candidates"],
+                "fully_qualified": dept["fully_qualified"],
+                "mean_missing_required": round(dept["missing_required"] / dept["candidates"], 4),
+                "required_gaps": dict(sorted(dept["required_gaps"].items(), key=lambda kv: -kv[1])),
+                "preferred_gaps": dict(sorted(dept["preferred_gaps"].items(), key=lambda kv: -kv[1])),
+            }
+        return CohortPlan(plans={cid: plans[cid] for cid in ids}, gap_stats=gap_stats, targets=targets)
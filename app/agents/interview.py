@@ -1,8 +1,47 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from ..data_models import Candidate, Role
+from ..extraction import Gazetteer
+
+POSITIVE_CUES = ["impact", "students", "research", "collaborate", "community"]
+NEGATIVE_CUES = ["don't know", "no idea", "not sure"]
+
+_CUES = Gazetteer(POSITIVE_CUES + NEGATIVE_CUES)
+# A cue split across two chunks is fully inside the tail carried over plus the next chunk
+_OVERLAP = max(len(p) for p in _CUES.phrases) - 1
+
+
+def _score(found: Set[str]) -> Dict[str, float]:
+    # very simple heuristic evaluation
+    pos = sum(w in found for w in POSITIVE_CUES)
+    neg = sum(w in found for w in NEGATIVE_CUES)
+    score = max(0.0, min(1.0, 0.5 + 0.1 * (pos - neg)))
+    return {"communication": score, "research_vision": score, "teaching_philosophy": score}
+
+
+def evaluate_transcript_file(path: Path, chunk_size: int = 1 << 20) -> Dict[str, float]:
+    found: Set[str] = set()
+    tail = ""
+    with path.open("r", encoding="utf-8", errors="ignore") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            window = tail + chunk.lower()
+            found.update(_CUES.find(window))
+            tail = window[-_OVERLAP:] if _OVERLAP else ""
+    return _score(found)
+
+
+def _evaluate_path(args: Tuple[str, int]) -> Dict:
+    path, chunk_size = args
+    return {"path": str(path), **evaluate_transcript_file(Path(path), chunk_size)}
 
 
 class InterviewAgent:
@@ -17,9 +56,43 @@ class InterviewAgent:
         return qs
 
     def evaluate_transcript(self, transcript: str) -> Dict[str, float]:
-        # very simple heuristic evaluation
-        pos = sum(w in transcript.lower() for w in ["impact", "students", "research", "collaborate", "community"])  # noqa: E501
-        neg = sum(w in transcript.lower() for w in ["don't know", "no idea", "not sure"])  # noqa: E501
-        score = max(0.0, min(1.0, 0.5 + 0.1 * (pos - neg)))
-        return {"communication": score, "research_vision": score, "teaching_philosophy": score}
+        return _score(set(_CUES.find(transcript.lower())))
+
+    def iter_evaluations(
+        self,
+        paths: Iterable[Path],
+        workers: Optional[int] = None,
+        chunk_size: int = 1 << 20,
+    ) -> Iterator[Dict]:
+        jobs = [(str(p), chunk_size) for p in paths]
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) <= 1:
+            yield from map(_evaluate_path, jobs)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(_evaluate_path, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+
+    def write_evaluations(
+        self,
+        paths: Iterable[Path],
+        out: Path,
+        workers: Optional[int] = None,
+        chunk_size: int = 1 << 20,
+    ) -> int:
+        # Appends one JSON line per transcript as soon as it is scored; nothing is kept in memory
+        out.parent.mkdir(parents=True, exist_ok=True)
+        count = 0
+        with out.open("a", encoding="utf-8") as sink:
+            for result in self.iter_evaluations(paths, workers=workers, chunk_size=chunk_size):
+                sink.write(json.dumps(result) + "\n")
+                sink.flush()
+                count += 1
+        return count
 
+    def evaluate_transcripts(
+        self,
+        paths: Iterable[Path],
+        workers: Optional[int] = None,
+        chunk_size: int = 1 << 20,
+    ) -> List[Dict]:
+        return list(self.iter_evaluations(paths, workers=workers, chunk_size=chunk_size))
@@ -1,41 +1,388 @@
 from __future__ import annotations
 
-from typing import List
+import threading
+import time
+import warnings
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
+from ..blocked_index import blocked_index
+from ..cache import RankingCache, config_fingerprint, corpus_version, role_fingerprint
+from ..config import CONFIG, CascadeConfig
 from ..data_models import Candidate, MatchResult, Role
-from ..embeddings import build_index
-from ..scoring import explain_fit
+from ..embeddings import EmbeddingIndex, build_index, index_settings
+from ..extraction import EXTRACTION_VERSION
+from ..roles import compile_role
+from ..scoring import INVITE_MIN_SCORE, explain_pool
+from ..shared_index import shared_index
+from ..skill_matrix import SkillMatrix, build_skill_matrix
+from ..whatif import WhatIfSession
+
+
+@dataclass
+class StageStats:
+    name: str
+    candidates_in: int
+    candidates_out: int
+    elapsed_ms: float
+
+
+@dataclass
+class CascadeReport:
+    stages: List[StageStats] = field(default_factory=list)
+
+    def add(self, name: str, candidates_in: int, candidates_out: int, started: float) -> None:
+        self.stages.append(StageStats(name, candidates_in, candidates_out, round((time.perf_counter() - started) * 1000.0, 3)))
+
+    def to_dict(self) -> Dict:
+        return {"stages": [asdict(s) for s in self.stages], "total_ms": round(sum(s.elapsed_ms for s in self.stages), 3)}
+
+
+@dataclass
+class RankingSnapshot:
+    results: List[MatchResult]
+    scored: int
+    total: int
+    # exact: scores come from the corpus-wide index (same as rank_candidates); partial: more to come
+    exact: bool
+    partial: bool
+    elapsed_ms: float
+
+    @property
+    def coverage(self) -> float:
+        return self.scored / self.total if self.total else 1.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "scored": self.scored,
+            "total": self.total,
+            "coverage": round(self.coverage, 4),
+            "exact": self.exact,
+            "partial": self.partial,
+            "elapsed_ms": self.elapsed_ms,
+        }
+
+
+class AnytimeRanking:
+    # Ranks in a background thread and publishes a snapshot after every step. On a cold index the
+    # pool is first scored block by block with a vectorizer fitted on the first block, keeping a
+    # running top-k; the corpus-wide index then replaces those approximate scores. A warm cache
+    # goes straight to the exact ranking.
+    def __init__(
+        self,
+        agent: "ScreeningAgent",
+        candidates: List[Candidate],
+        role: Role,
+        skills: Optional[SkillMatrix] = None,
+        top_k: Optional[int] = None,
+        block_size: int = 500,
+    ) -> None:
+        self.agent = agent
+        self.candidates = candidates
+        self.role = role
+        self.skills = skills
+        self.top_k = top_k
+        self.block_size = max(1, block_size)
+        self.error: Optional[BaseException] = None
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._cancelled = threading.Event()
+        self._snapshot = RankingSnapshot([], 0, len(candidates), exact=False, partial=True, elapsed_ms=0.0)
+        self._thread = threading.Thread(target=self._run, name="anytime-ranking", daemon=True)
+        self._thread.start()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def snapshot(self) -> RankingSnapshot:
+        with self._lock:
+            return self._snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> RankingSnapshot:
+        self._done.wait(timeout)
+        return self.snapshot()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def _publish(self, results: List[MatchResult], scored: int, exact: bool) -> None:
+        elapsed = round((time.perf_counter() - self._started) * 1000.0, 3)
+        partial = not (exact and scored == len(self.candidates))
+        with self._lock:
+            self._snapshot = RankingSnapshot(results, scored, len(self.candidates), exact, partial, elapsed)
+
+    def _warm(self) -> bool:
+        cache = self.agent.cache
+        if cache is None:
+            return False
+        version = corpus_version(self.candidates)
+        key = self.agent._results_key(version, self.role, mode="full", top_k=self.top_k)
+        return cache.get(key) is not None or cache.get(_index_key(version), persist=False) is not None
+
+    def _blocks(self) -> None:
+        candidates = self.candidates
+        ids = [c.id for c in candidates]
+        skills = self.skills.select(ids) if self.skills is not None else None
+        first = candidates[: self.block_size]
+        sample = build_index([c.id for c in first], [c.resume_text for c in first])
+        q = compile_role(self.role).query_vector(sample.vectorizer)
+        best: List[MatchResult] = []
+        for start in range(0, len(candidates), self.block_size):
+            if self._cancelled.is_set():
+                return
+            block = candidates[start : start + self.block_size]
+            if start:
+                matrix, scales = sample.encode([c.resume_text for c in block])
+                sims = EmbeddingIndex(sample.vectorizer, matrix, [], scales).query_vectors(q)
+            else:
+                sims = sample.query_vectors(q)
+            block_skills = None
+            if skills is not None:
+                block_skills = SkillMatrix(
+                    ids=ids[start : start + len(block)],
+                    phrases=skills.phrases,
+                    columns=skills.columns,
+                    matrix=skills.matrix[start : start + len(block)],
+                )
+            results = self.agent.score_pool(block, self.role, sims[0], skills=block_skills, top_k=self.top_k)
+            best = sorted(best + results, key=lambda m: -m.score)[: self.top_k]
+            self._publish(best, start + len(block), exact=False)
+
+    def _run(self) -> None:
+        try:
+            if len(self.candidates) > self.block_size and not self._warm():
+                self._blocks()
+            if self._cancelled.is_set():
+                return
+            results = self.agent.rank_candidates(self.candidates, self.role, skills=self.skills, top_k=self.top_k)
+            self._publish(results, len(self.candidates), exact=True)
+        except BaseException as exc:  # surfaced to the caller through .error
+            self.error = exc
+        finally:
+            self._done.set()
+
+
+def _index_key(version: str) -> Tuple[str, str, str]:
+    return ("index", version, config_fingerprint(**index_settings()))
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    # Indices of the k highest scores, best first, without sorting the whole array
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
 
 
 class ScreeningAgent:
-    def rank_candidates(self, candidates: List[Candidate], role: Role) -> List[MatchResult]:
+    def __init__(
+        self,
+        cache: Optional[RankingCache] = None,
+        share_index: bool = CONFIG.share_index,
+        out_of_core_rows: Optional[int] = CONFIG.out_of_core_rows,
+    ) -> None:
+        self.cache = cache
+        self.share_index = share_index
+        self.out_of_core_rows = out_of_core_rows
+
+    def _build_index(self, candidates: List[Candidate]) -> EmbeddingIndex:
+        if self.share_index:
+            return shared_index(candidates).index
+        return build_index([c.id for c in candidates], [c.resume_text for c in candidates])
+
+    def _results_key(self, version: str, role: Role, **settings: object) -> Tuple[str, str, str, str]:
+        scoring = config_fingerprint(
+            extraction=EXTRACTION_VERSION, invite_min_score=INVITE_MIN_SCORE, index=index_settings(), **settings
+        )
+        return ("results", version, role_fingerprint(role), scoring)
+
+    def rank_candidates(
+        self,
+        candidates: List[Candidate],
+        role: Role,
+        skills: Optional[SkillMatrix] = None,
+        top_k: Optional[int] = None,
+    ) -> List[MatchResult]:
         if not candidates:
             return []
-        ids = [c.id for c in candidates]
-        texts = [c.resume_text for c in candidates]
-        index = build_index(ids, texts)
-        role_text = " ".join(
-            role.required_skills + role.preferred_skills + role.research_focus + role.teaching_requirements
-        )
-        sims = index.query([role_text])[0]
-        order = list(np.argsort(-sims))
-        results: List[MatchResult] = []
-        for i in order:
-            c = candidates[i]
-            strengths, risks = explain_fit(c, role)
-            score = float(sims[i])
-            next_steps = ["Invite to interview"] if score >= 0.2 and len(risks) <= len(strengths) else ["Needs follow-up"]
-            results.append(
-                MatchResult(
-                    candidate_id=c.id,
-                    role_id=role.id,
-                    fit_score=round(score, 4),
-                    strengths=strengths,
-                    risks=risks,
-                    next_steps=next_steps,
-                )
+        if self.out_of_core_rows is not None and len(candidates) > self.out_of_core_rows:
+            return self.rank_blocked(candidates, role, top_k=top_k)
+        compiled = compile_role(role)
+        version: Optional[str] = None
+        if self.cache is not None:
+            version = corpus_version(candidates)
+            key = self._results_key(version, role, mode="full", top_k=top_k)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return [MatchResult.from_compact(row, role) for row in cached]
+        index = self.index_for(candidates, version)
+        sims = index.query_vectors(compiled.query_vector(index.vectorizer))[0]
+        skills = skills if skills is not None else self.skills_for(candidates, version)
+        results = self.score_pool(candidates, role, sims, skills=skills, top_k=top_k)
+        if self.cache is not None:
+            self.cache.put(key, [m.to_compact() for m in results])
+        return results
+
+    def index_for(self, candidates: List[Candidate], version: Optional[str] = None) -> EmbeddingIndex:
+        # The fitted index only lives in memory; ranked results also go to the disk tier, and role
+        # query vectors are kept on the CompiledRole per fitted vectorizer
+        if self.cache is None:
+            return self._build_index(candidates)
+        key = _index_key(version or corpus_version(candidates))
+        return self.cache.get_or_compute(key, lambda: self._build_index(candidates), persist=False)
+
+    def skills_for(self, candidates: List[Candidate], version: Optional[str] = None) -> SkillMatrix:
+        # Cached alongside the index, so the role-phrase columns the matrix collects (see
+        # SkillMatrix.phrase_hits) are scanned once per corpus rather than once per ranking
+        if self.cache is None:
+            return build_skill_matrix(candidates)
+        key = ("skills", version or corpus_version(candidates))
+        return self.cache.get_or_compute(key, lambda: build_skill_matrix(candidates), persist=False)
+
+    def seed_index(self, candidates: List[Candidate], index: EmbeddingIndex) -> None:
+        # Hands over an index built elsewhere (e.g. a run checkpoint) so ranking skips the fit
+        if self.cache is not None:
+            self.cache.put(_index_key(corpus_version(candidates)), index, persist=False)
+
+    def what_if(self, candidates: List[Candidate], role: Role, skills: Optional[SkillMatrix] = None) -> WhatIfSession:
+        # Live re-scoring session for role edits over the same (cached) index rank_candidates uses
+        return WhatIfSession(candidates, role, self.index_for(candidates), skills=skills)
+
+    def rank_blocked(self, candidates: List[Candidate], role: Role, top_k: Optional[int] = None) -> List[MatchResult]:
+        # Out-of-core ranking: TF-IDF rows are streamed from on-disk blocks with a running top-k,
+        # and skill rows, explanations and decisions are computed for those k candidates only.
+        # Unlike rank_candidates: without top_k only the best CONFIG.out_of_core_top_k are
+        # returned, and the IDF is fitted on a sample of CONFIG.out_of_core_fit_rows resumes, so
+        # scores are close to but not equal to a full in-memory fit.
+        k = top_k or CONFIG.out_of_core_top_k
+        if top_k is None and len(candidates) > k:
+            warnings.warn(
+                f"out-of-core ranking returns the top {k} of {len(candidates)} candidates "
+                "(pass top_k or raise out_of_core_top_k for more)",
+                stacklevel=2,
+            )
+        version = corpus_version(candidates)
+        if self.cache is not None:
+            key = self._results_key(
+                version,
+                role,
+                mode="blocked",
+                top_k=k,
+                memory_mb=CONFIG.out_of_core_memory_mb,
+                fit_rows=CONFIG.out_of_core_fit_rows,
             )
+            cached = self.cache.get(key)
+            if cached is not None:
+                return [MatchResult.from_compact(row, role) for row in cached]
+        blocked = blocked_index(candidates, version=version)
+        compiled = compile_role(role)
+        rows, scores = blocked.search(compiled.query_vector(blocked.vectorizer), k)
+        rows, scores = rows[0], scores[0]
+        top = [candidates[i] for i in rows]
+        skills = blocked.skills(rows, [c.id for c in top]).with_phrases(top, compiled.phrases)
+        pool = explain_pool(skills, role)
+        invite = pool.invite(scores)
+        results = [pool.result(j, c.id, role, scores[j], invite[j]) for j, c in enumerate(top)]
+        if self.cache is not None:
+            self.cache.put(key, [m.to_compact() for m in results])
         return results
 
+    def rank_anytime(
+        self,
+        candidates: List[Candidate],
+        role: Role,
+        deadline_s: float = 0.3,
+        skills: Optional[SkillMatrix] = None,
+        top_k: Optional[int] = None,
+        block_size: int = 500,
+    ) -> AnytimeRanking:
+        # Returns once the ranking is done or the deadline passes, whichever comes first; read
+        # .snapshot() for the best results so far and keep polling it while refinement continues
+        ranking = AnytimeRanking(self, candidates, role, skills=skills, top_k=top_k, block_size=block_size)
+        ranking.wait(deadline_s)
+        return ranking
+
+    def score_pool(
+        self,
+        candidates: List[Candidate],
+        role: Role,
+        sims: np.ndarray,
+        skills: Optional[SkillMatrix] = None,
+        top_k: Optional[int] = None,
+    ) -> List[MatchResult]:
+        # Ranks candidates whose cosine scores against the role are already known
+        ids = [c.id for c in candidates]
+        order = np.argsort(-sims)
+        if top_k is not None:
+            order = order[:top_k]
+        skills = skills.select(ids) if skills is not None else build_skill_matrix(candidates)
+        compiled = compile_role(role)
+        skills = skills.with_phrases(candidates, compiled.phrases)
+        # Counts, hit masks and decisions for the whole pool come from a few sparse column slices;
+        # results keep only those, and strengths/risks text is rendered when displayed or reported.
+        pool = explain_pool(skills, role)
+        invite = pool.invite(sims)
+        return [pool.result(i, ids[i], role, sims[i], invite[i]) for i in order]
+
+    def rank_cascade(
+        self,
+        candidates: List[Candidate],
+        role: Role,
+        config: Optional[CascadeConfig] = None,
+        skills: Optional[SkillMatrix] = None,
+    ) -> Tuple[List[MatchResult], CascadeReport]:
+        config = config or CascadeConfig()
+        report = CascadeReport()
+        if not candidates:
+            return [], report
+        ids = [c.id for c in candidates]
+        version: Optional[str] = None
+        if self.cache is not None:
+            started = time.perf_counter()
+            version = corpus_version(candidates)
+            key = self._results_key(version, role, mode="cascade", shortlist=config.shortlist, explain_top=config.explain_top, cosine="corpus")
+            cached = self.cache.get(key)
+            if cached is not None:
+                results = [MatchResult.from_compact(row, role) for row in cached]
+                report.add("cache", len(candidates), len(results), started)
+                return results, report
+
+        # Stage 1: skill hit counts for the whole pool (required hits first, then everything else)
+        started = time.perf_counter()
+        skills = skills.select(ids) if skills is not None else self.skills_for(candidates, version)
+        compiled = compile_role(role)
+        skills = skills.with_phrases(candidates, compiled.phrases)
+        pool = explain_pool(skills, role)
+        other = pool.strengths - pool.required_hits
+        cheap = pool.required_hits * (int(other.max(initial=0)) + 1) + other
+        shortlist = _top(cheap.astype(np.float64), config.shortlist)
+        report.add("skills", len(candidates), len(shortlist), started)
+
+        # The corpus index (shared, cached, or fitted here) supplies the shortlist's TF-IDF rows, so
+        # scores and IDF weights match rank_candidates instead of a shortlist-only fit. Getting it
+        # touches the whole pool, so it is reported as its own stage rather than inside the cosine.
+        started = time.perf_counter()
+        full_index = self.index_for(candidates, version)
+        report.add("index", len(candidates), len(candidates), started)
+
+        # Stage 2: TF-IDF cosine over the shortlist only
+        started = time.perf_counter()
+        index = full_index.take(shortlist)
+        sims = index.query_vectors(compiled.query_vector(index.vectorizer))[0]
+        order = _top(sims, config.explain_top)
+        report.add("cosine", len(shortlist), len(order), started)
+
+        # Stage 3: explanation/decision for the final top k
+        started = time.perf_counter()
+        rows = shortlist[order]
+        scores = sims[order]
+        invite = pool.invite(scores, rows)
+        results = [pool.result(row, ids[row], role, score, inv) for row, score, inv in zip(rows, scores, invite)]
+        report.add("explain", len(order), len(results), started)
+        if self.cache is not None:
+            self.cache.put(key, [m.to_compact() for m in results])
+        return results, report
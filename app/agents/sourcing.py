@@ -1,13 +1,30 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 
+from ..config import CONFIG
 from ..data_models import Candidate
-from ..parsing import parse_candidate_folder
+from ..dedup import deduplicate
+from ..parsing import load_corpus
+from ..skill_matrix import SkillMatrix, build_skill_matrix
 
 
 class SourcingAgent:
-    def run(self, candidate_dir: Path) -> List[Candidate]:
-        return parse_candidate_folder(candidate_dir)
+    def __init__(self, dedupe_threshold: Optional[float] = CONFIG.dedupe_threshold) -> None:
+        self.dedupe_threshold = dedupe_threshold
+        self.skills: Optional[SkillMatrix] = None
+        self.duplicates: Dict[str, List[str]] = {}
 
+    def run(self, candidate_dir: Path, duplicates: Optional[Dict[str, List[str]]] = None) -> List[Candidate]:
+        # With `duplicates` (e.g. a screening service's folding of the same corpus) the folded ids
+        # are dropped directly instead of re-running MinHash dedupe
+        candidates = load_corpus(candidate_dir)
+        if duplicates is not None:
+            folded = {dup for dups in duplicates.values() for dup in dups}
+            candidates = [c for c in candidates if c.id not in folded]
+            self.duplicates = duplicates
+        elif self.dedupe_threshold:
+            candidates, self.duplicates = deduplicate(candidates, threshold=self.dedupe_threshold)
+        self.skills = build_skill_matrix(candidates)
+        return candidates
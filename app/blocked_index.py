@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .cache import config_fingerprint, corpus_version
+from .config import CONFIG
+from .data_models import Candidate
+from .embeddings import EmbeddingIndex, build_index, index_settings
+from .shared_index import (
+    _candidate_record,
+    _index_dtype,
+    _load,
+    _restore_vectorizer,
+    _save,
+    _vectorizer_meta,
+    prune_segments,
+    touch_segment,
+)
+from .skill_matrix import SkillMatrix, build_skill_matrix
+from .text_store import TextStore
+
+BLOCKED_VERSION = "1"
+
+
+def _save_csr(path: Path, m: sparse.csr_matrix, data: bool = True) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+    if data:
+        _save(path / "data.npy", m.data)
+    _save(path / "indices.npy", m.indices.astype(_index_dtype(m)))
+    _save(path / "indptr.npy", m.indptr.astype(_index_dtype(m)))
+
+
+def _load_csr(path: Path, shape: Tuple[int, int], dtype: Optional[type] = None) -> sparse.csr_matrix:
+    # Without a data file (skill blocks) every stored entry is True
+    indices = _load(path / "indices.npy")
+    data = _load(path / "data.npy") if dtype is None else np.ones(len(indices), dtype=dtype)
+    return sparse.csr_matrix((data, indices, _load(path / "indptr.npy")), shape=shape, copy=False)
+
+
+def block_rows_for(sample: EmbeddingIndex, texts: Sequence[str], memory_mb: float, queries: int = 8) -> int:
+    # Rows per block so one block's text, vectors, skill rows and similarity columns fit in
+    # memory_mb; sized from the fit sample
+    n = max(sample.matrix.shape[0], 1)
+    row_bytes = sample.nbytes / n * 3  # transform output, stored precision and a widened copy
+    text_bytes = sum(len(t) for t in texts) / max(len(texts), 1) * 2
+    per_row = row_bytes + text_bytes + 4 * queries + 64
+    return max(256, int(memory_mb * 1024 * 1024 / per_row))
+
+
+@dataclass
+class BlockedIndex:
+    # TF-IDF rows and skill rows of a corpus stored on disk in row blocks. The vectorizer is fitted
+    # on an evenly spaced sample, so building never holds more than one block of vectors; queries
+    # stream the blocks and keep a running top-k, so neither side scales with corpus size.
+    root: Path
+    vectorizer: TfidfVectorizer
+    rows: int
+    bounds: List[Tuple[int, int]]
+    precision: str
+    phrases: List[str]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def block(self, b: int) -> EmbeddingIndex:
+        start, stop = self.bounds[b]
+        path = self.root / f"block-{b:05d}"
+        shape = (stop - start, len(self.vectorizer.idf_))
+        scales = _load(path / "scales.npy") if self.precision == "int8" else None
+        return EmbeddingIndex(vectorizer=self.vectorizer, matrix=_load_csr(path / "tfidf", shape), ids=[], scales=scales)
+
+    def skill_block(self, b: int) -> sparse.csr_matrix:
+        start, stop = self.bounds[b]
+        return _load_csr(self.root / f"block-{b:05d}" / "skills", (stop - start, len(self.phrases)), dtype=bool)
+
+    def search(self, q: sparse.spmatrix, k: int) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        # Best k rows and scores per query row, best first
+        n_queries = q.shape[0]
+        best_rows = [np.empty(0, dtype=np.int64) for _ in range(n_queries)]
+        best_scores = [np.empty(0, dtype=np.float32) for _ in range(n_queries)]
+        for b, (start, stop) in enumerate(self.bounds):
+            sims = self.block(b).query_vectors(q)
+            for r in range(n_queries):
+                rows = np.concatenate([best_rows[r], np.arange(start, stop, dtype=np.int64)])
+                scores = np.concatenate([best_scores[r], np.asarray(sims[r], dtype=np.float32)])
+                if len(scores) > k:
+                    keep = np.argpartition(-scores, k - 1)[:k]
+                    rows, scores = rows[keep], scores[keep]
+                best_rows[r], best_scores[r] = rows, scores
+        for r in range(n_queries):
+            # Ties go to the earlier row, as a stable sort over the whole pool would order them
+            order = np.lexsort((best_rows[r], -best_scores[r]))
+            best_rows[r], best_scores[r] = best_rows[r][order], best_scores[r][order]
+        return best_rows, best_scores
+
+    def skills(self, rows: np.ndarray, ids: List[str]) -> SkillMatrix:
+        # Skill matrix rows for a selection, reading only the blocks that contain them
+        starts = np.array([start for start, _ in self.bounds], dtype=np.int64)
+        owner = np.searchsorted(starts, rows, side="right") - 1
+        parts: List[sparse.csr_matrix] = []
+        picked: List[np.ndarray] = []
+        for b in np.unique(owner):
+            selected = np.flatnonzero(owner == b)
+            parts.append(self.skill_block(int(b))[rows[selected] - starts[b]])
+            picked.append(selected)
+        if parts:
+            matrix = sparse.vstack(parts, format="csr")[np.argsort(np.concatenate(picked))]
+        else:
+            matrix = sparse.csr_matrix((0, len(self.phrases)), dtype=bool)
+        return SkillMatrix(ids=ids, phrases=self.phrases, columns={p: j for j, p in enumerate(self.phrases)}, matrix=matrix)
+
+
+def blocked_dir(version: str, root: Optional[Path] = None) -> Path:
+    settings = config_fingerprint(
+        block_mb=CONFIG.out_of_core_memory_mb, fit_rows=CONFIG.out_of_core_fit_rows, index=index_settings()
+    )
+    return (root or CONFIG.index_dir) / "blocked" / f"{version}-{settings[:8]}"
+
+
+def _spill(path: Path, candidates: Iterable[Candidate], chunk: int = 1000) -> Tuple[TextStore, TextStore]:
+    # One pass over the candidates into text and record TextStores (row i of each is candidate i),
+    # holding at most `chunk` of them at a time
+    texts, records = TextStore(path / "texts"), TextStore(path / "records")
+    it = iter(candidates)
+    while True:
+        batch = list(islice(it, chunk))
+        if not batch:
+            return texts, records
+        texts.extend(c.resume_text for c in batch)
+        records.extend(json.dumps(_candidate_record(c)) for c in batch)
+
+
+def build_blocked_index(candidates: Iterable[Candidate], root: Optional[Path] = None, version: Optional[str] = None) -> Path:
+    # Written once per corpus version into a temporary directory and renamed into place, like
+    # shared index segments. The candidates are consumed once into a spill store (so a generator
+    # over a large archive works, given its corpus `version`); the fit sample and every block are
+    # then read back from it, transformed, saved and dropped before the next.
+    if version is None:
+        candidates = list(candidates)
+        version = corpus_version(candidates)
+    target = blocked_dir(version, root)
+    if (target / "meta.json").exists():
+        return target
+    tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    texts, records = _spill(tmp / "spill", candidates)
+    n = len(texts)
+    step = max(n // max(CONFIG.out_of_core_fit_rows, 1), 1)
+    sample_rows = range(0, n, step)[: CONFIG.out_of_core_fit_rows]
+    sample_texts = [texts.get(i) for i in sample_rows]
+    # The fit sample has its own size; only the precision and vocabulary settings carry over
+    fitted = build_index([str(i) for i in sample_rows], sample_texts, memory_budget_mb=None)
+    block_rows = block_rows_for(fitted, sample_texts, CONFIG.out_of_core_memory_mb)
+    del sample_texts
+    bounds: List[Tuple[int, int]] = []
+    phrases: List[str] = []
+    for b, start in enumerate(range(0, n, block_rows)):
+        stop = min(start + block_rows, n)
+        block = [Candidate(store=texts, ref=i, **json.loads(records.get(i))) for i in range(start, stop)]
+        matrix, scales = fitted.encode([c.resume_text for c in block])
+        skills = build_skill_matrix(block)
+        phrases = skills.phrases
+        path = tmp / f"block-{b:05d}"
+        _save_csr(path / "tfidf", matrix)
+        if scales is not None:
+            _save(path / "scales.npy", scales)
+        _save_csr(path / "skills", skills.matrix, data=False)
+        bounds.append((start, stop))
+    texts.close()
+    records.close()
+    shutil.rmtree(tmp / "spill", ignore_errors=True)
+    _save(tmp / "idf.npy", fitted.vectorizer.idf_)
+    meta = {
+        "format": BLOCKED_VERSION,
+        "rows": n,
+        "bounds": bounds,
+        "precision": fitted.precision,
+        "skill_phrases": phrases,
+        **_vectorizer_meta(fitted.vectorizer),
+    }
+    (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    else:
+        prune_segments(target.parent)
+    return target
+
+
+def open_blocked_index(path: Path) -> BlockedIndex:
+    meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    touch_segment(path)
+    if meta.get("format") != BLOCKED_VERSION:
+        raise ValueError(f"{path} was written by an incompatible version")
+    return BlockedIndex(
+        root=path,
+        vectorizer=_restore_vectorizer(meta, _load(path / "idf.npy")),
+        rows=meta["rows"],
+        bounds=[tuple(b) for b in meta["bounds"]],
+        precision=meta["precision"],
+        phrases=meta["skill_phrases"],
+    )
+
+
+def blocked_index(candidates: Iterable[Candidate], root: Optional[Path] = None, version: Optional[str] = None) -> BlockedIndex:
+    return open_blocked_index(build_blocked_index(candidates, root, version))
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import csv
+import json
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .data_models import Candidate
+from .extraction import candidate_from_text
+
+BULK_EXTS = {".csv", ".jsonl", ".ndjson"}
+
+# Candidate attribute -> column (CSV) or key (JSONL) in the export
+DEFAULT_FIELD_MAP: Dict[str, str] = {
+    "id": "id",
+    "name": "name",
+    "email": "email",
+    "resume_text": "resume_text",
+    "skills": "skills",
+    "research_areas": "research_areas",
+    "teaching_experience": "teaching_experience",
+    "publications": "publications",
+}
+LIST_FIELDS = ("research_areas", "teaching_experience", "publications")
+
+csv.field_size_limit(1 << 30)
+
+
+@dataclass
+class BulkChunk:
+    candidates: List[Candidate]
+    # Byte offset just past the last row of this chunk; pass it back as start_offset to resume
+    offset: int
+    rows: int
+
+
+class _LineReader:
+    # Decoded lines from a binary file, tracking the byte offset of everything handed out so far
+    def __init__(self, f: IO[bytes]) -> None:
+        self.f = f
+        self.pos = f.tell()
+
+    def __iter__(self) -> Iterator[str]:
+        for raw in iter(self.f.readline, b""):
+            self.pos += len(raw)
+            yield raw.decode("utf-8", errors="replace")
+
+
+def iter_rows(path: Path, start_offset: int = 0) -> Iterator[Tuple[Dict[str, Any], int]]:
+    # Yields (row, byte offset after the row); CSV quoted fields may span lines
+    with path.open("rb") as f:
+        if path.suffix.lower() == ".csv":
+            header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+            if start_offset > f.tell():
+                f.seek(start_offset)
+            lines = _LineReader(f)
+            for values in csv.reader(lines):
+                if values:
+                    yield dict(zip(header, values)), lines.pos
+        else:
+            f.seek(start_offset)
+            lines = _LineReader(f)
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line), lines.pos
+
+
+def _as_list(value: Any) -> List[str]:
+    # JSONL lists pass through; CSV cells are ';' or '|' separated
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).replace("|", ";").split(";") if v.strip()]
+
+
+def row_to_candidate(row: Dict[str, Any], field_map: Dict[str, str], fallback_id: str) -> Optional[Candidate]:
+    text = row.get(field_map.get("resume_text", ""))
+    if not text:
+        return None
+    cid = str(row.get(field_map.get("id", "")) or fallback_id)
+    name = str(row.get(field_map.get("name", "")) or cid)
+    candidate = candidate_from_text(cid, name, str(text))
+    email = row.get(field_map.get("email", ""))
+    if email:
+        candidate.email = str(email)
+    for attr in LIST_FIELDS:
+        value = row.get(field_map.get(attr, ""))
+        if value:
+            setattr(candidate, attr, _as_list(value))
+    # `skills` must stay the exhaustive gazetteer hit set the scorer reads, so declared skills
+    # from the export are kept alongside it rather than replacing it
+    skills = row.get(field_map.get("skills", ""))
+    if skills:
+        candidate.metadata["declared_skills"] = ";".join(s.lower() for s in _as_list(skills))
+    return candidate
+
+
+def _convert(rows: List[Tuple[Dict[str, Any], str]], field_map: Dict[str, str]) -> List[Candidate]:
+    out: List[Candidate] = []
+    for row, fallback_id in rows:
+        c = row_to_candidate(row, field_map, fallback_id)
+        if c is not None:
+            out.append(c)
+    return out
+
+
+def iter_bulk_candidates(
+    path: Path,
+    field_map: Optional[Dict[str, str]] = None,
+    chunk_size: int = 5000,
+    start_offset: int = 0,
+    workers: int = 1,
+) -> Iterator[BulkChunk]:
+    # Streams a CSV/JSONL export in fixed-size row chunks; memory is bounded by a few chunks in flight
+    fmap = {**DEFAULT_FIELD_MAP, **(field_map or {})}
+    pending: Deque[Tuple["Future[List[Candidate]]", int, int]] = deque()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        batch: List[Tuple[Dict[str, Any], str]] = []
+        row_start = start_offset
+        end = start_offset
+        for row, end in iter_rows(path, start_offset):
+            batch.append((row, f"{path.stem}-{row_start}"))
+            row_start = end
+            if len(batch) < chunk_size:
+                continue
+            if pool is None:
+                yield BulkChunk(_convert(batch, fmap), end, len(batch))
+            else:
+                pending.append((pool.submit(_convert, batch, fmap), end, len(batch)))
+                while len(pending) > workers * 2:
+                    fut, offset, n = pending.popleft()
+                    yield BulkChunk(fut.result(), offset, n)
+            batch = []
+        if batch:
+            if pool is None:
+                yield BulkChunk(_convert(batch, fmap), end, len(batch))
+            else:
+                pending.append((pool.submit(_convert, batch, fmap), end, len(batch)))
+        while pending:
+            fut, offset, n = pending.popleft()
+            yield BulkChunk(fut.result(), offset, n)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
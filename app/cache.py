@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+from .config import CONFIG
+from .data_models import Candidate, Role
+
+
+def text_fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def candidate_fingerprint(candidate: Candidate) -> str:
+    return candidate.metadata.get("sha1") or text_fingerprint(candidate.resume_text)
+
+
+def corpus_version(candidates: Sequence[Candidate]) -> str:
+    # Changes whenever a candidate is added, removed, renamed or its resume text changes
+    h = hashlib.sha1()
+    for c in candidates:
+        h.update(f"{c.id}\0{candidate_fingerprint(c)}\n".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def role_fingerprint(role: Role) -> str:
+    return hashlib.sha1(json.dumps(asdict(role), sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def config_fingerprint(**settings: Any) -> str:
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class RankingCache:
+    # In-memory LRU with an optional pickle-per-entry disk tier. Keys embed the corpus version, so
+    # entries for a changed corpus are simply never asked for again and age out of the LRU; on
+    # disk they age out by access time once the tier outgrows disk_bytes.
+    def __init__(self, capacity: int = 256, disk_dir: Optional[Path] = None, disk_bytes: Optional[int] = None) -> None:
+        self.capacity = capacity
+        self.disk_dir = disk_dir
+        self.disk_bytes = int(CONFIG.cache_disk_mb * 1024 * 1024) if disk_bytes is None else disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._by_kind: Dict[str, Dict[str, int]] = {}
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, "Future[Any]"] = {}
+        self._disk_used = 0
+        if disk_dir is not None:
+            disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_used = self.prune_disk()
+
+    def _disk_path(self, key: Hashable) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / (hashlib.sha1(repr(key).encode("utf-8")).hexdigest() + ".pkl")
+
+    def _count(self, key: Hashable, hit: bool) -> None:
+        kind = key[0] if isinstance(key, tuple) and key and isinstance(key[0], str) else "other"
+        counts = self._by_kind.setdefault(kind, {"hits": 0, "misses": 0})
+        if hit:
+            self.hits += 1
+            counts["hits"] += 1
+        else:
+            self.misses += 1
+            counts["misses"] += 1
+
+    def _remember(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable, persist: bool = True) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._count(key, True)
+                return self._entries[key]
+        if persist and self.disk_dir is not None:
+            path = self._disk_path(key)
+            if path.exists():
+                try:
+                    with path.open("rb") as f:
+                        value = pickle.load(f)
+                except Exception:
+                    value = None
+                if value is not None:
+                    try:
+                        os.utime(path)  # mtime doubles as the disk tier's last-use time
+                    except OSError:
+                        pass
+                    with self._lock:
+                        self._remember(key, value)
+                        self._count(key, True)
+                    return value
+        with self._lock:
+            self._count(key, False)
+        return None
+
+    def put(self, key: Hashable, value: Any, persist: bool = True) -> None:
+        with self._lock:
+            self._remember(key, value)
+        if persist and self.disk_dir is not None:
+            path = self._disk_path(key)
+            # A temp file per writer, so concurrent puts of one key never interleave their bytes
+            with tempfile.NamedTemporaryFile(dir=self.disk_dir, suffix=".tmp", delete=False) as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(f.name)
+            os.replace(f.name, path)
+            with self._lock:
+                self._disk_used += size
+                over = self._disk_used > self.disk_bytes
+            if over:
+                used = self.prune_disk()
+                with self._lock:
+                    self._disk_used = used
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], persist: bool = True) -> Any:
+        # Single flight per key: concurrent misses wait for the one caller computing the value (and
+        # see its exception if it fails) instead of each fitting the same index
+        value = self.get(key, persist=persist)
+        if value is not None:
+            return value
+        with self._lock:
+            if key in self._entries:  # put by a caller that finished after our miss
+                return self._entries[key]
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+        if not owner:
+            return fut.result()
+        try:
+            value = compute()
+            self.put(key, value, persist=persist)
+        except BaseException as exc:
+            fut.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        fut.set_result(value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._entries),
+            "by_kind": {k: dict(v) for k, v in self._by_kind.items()},
+        }
+
+    def prune_disk(self, tmp_age_s: float = 3600.0) -> int:
+        # Deletes least recently used entries until the tier fits disk_bytes, plus temp files
+        # left by writers that died; returns the bytes kept. Other processes sharing the folder
+        # may delete a file first, which is fine.
+        if self.disk_dir is None:
+            return 0
+        now = time.time()
+        entries = []
+        for p in self.disk_dir.iterdir():
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            if p.suffix == ".pkl":
+                entries.append((st.st_mtime, st.st_size, p))
+            elif p.suffix == ".tmp" and now - st.st_mtime > tmp_age_s:
+                p.unlink(missing_ok=True)
+        used = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if used <= self.disk_bytes:
+                break
+            p.unlink(missing_ok=True)
+            used -= size
+        return used
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.disk_dir is not None:
+            for p in self.disk_dir.glob("*.pkl"):
+                p.unlink()
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .agents.development import CohortPlan
+from .blocked_index import _load_csr, _save_csr
+from .cache import config_fingerprint
+from .config import CONFIG
+from .data_models import Candidate, DevelopmentPlan, MatchResult, Role
+from .embeddings import EmbeddingIndex
+from .extraction import EXTRACTION_VERSION
+from .parsing import CANDIDATE_EXTS
+from .shared_index import _load, _load_candidates, _restore_vectorizer, _save, _save_candidates, _vectorizer_meta
+from .skill_matrix import SkillMatrix
+from .utils.io import file_lock, pid_alive, scan_files
+
+CHECKPOINT_VERSION = "1"
+# Orchestrator.run stages, in order; each checkpoint is keyed by a fingerprint of its inputs
+STAGES = ("corpus", "index", "matches", "plans", "report")
+# MatchResult mask attribute -> the role list whose phrases its bits index
+MASKS = {
+    "required_mask": "required_skills",
+    "preferred_mask": "preferred_skills",
+    "research_mask": "research_focus",
+    "teaching_mask": "teaching_requirements",
+}
+
+
+def corpus_inputs(candidate_dir: Path, dedupe: object) -> str:
+    # Source files by size and mtime (as load_corpus decides what to reparse) plus the settings
+    # that change what parsing, dedupe (a threshold, or a given duplicate map) and the skill
+    # matrix produce
+    return config_fingerprint(
+        files=scan_files(candidate_dir, CANDIDATE_EXTS),
+        extraction=EXTRACTION_VERSION,
+        dedupe=dedupe,
+        fields=CONFIG.bulk_field_map,
+    )
+
+
+def _pack_masks(masks: Sequence[int], width: int) -> np.ndarray:
+    # int64 while the role list has fewer than 63 phrases, else little-endian bytes per row
+    if width < 63:
+        return np.asarray(masks, dtype=np.int64)
+    nbytes = (width + 7) // 8
+    packed = b"".join(m.to_bytes(nbytes, "little") for m in masks)
+    return np.frombuffer(packed, dtype=np.uint8).reshape(len(masks), nbytes)
+
+
+def _unpack_masks(arr: np.ndarray) -> List[int]:
+    if arr.ndim == 1:
+        return arr.tolist()
+    return [int.from_bytes(row.tobytes(), "little") for row in arr]
+
+
+class RunCheckpoints:
+    # Stage outputs of Orchestrator.run under root/<stage>/<input fingerprint>, in the same binary
+    # layouts as shared index segments (TextStores, .npy CSR arrays). A stage is written into a
+    # temporary directory with meta.json last and renamed into place, so a run killed mid-write
+    # leaves a complete checkpoint or none. runs/<role id>.json points at the stages of the role's
+    # last finished run; prune() drops everything no role points at and no running run may use.
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._active = root / "active" / f"{os.getpid()}-{threading.get_ident()}.json"
+
+    def begin(self) -> None:
+        # Registers a run in progress: until end(), prune() in any process keeps every checkpoint
+        # published or loaded since it started, although no role points at them yet
+        with file_lock(self.root / ".lock"):
+            self._active.parent.mkdir(parents=True, exist_ok=True)
+            self._active.write_text(json.dumps({"ts": time.time()}), encoding="utf-8")
+
+    def end(self) -> None:
+        self._active.unlink(missing_ok=True)
+
+    def _horizon(self) -> float:
+        # Start of the oldest other run still in progress (inf when none)
+        oldest = float("inf")
+        active = self.root / "active"
+        if not active.is_dir():
+            return oldest
+        for path in active.glob("*.json"):
+            if path == self._active:
+                continue
+            if not pid_alive(path.stem.split("-", 1)[0]):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                oldest = min(oldest, json.loads(path.read_text(encoding="utf-8"))["ts"])
+            except (OSError, ValueError, KeyError):
+                continue
+        return oldest
+
+    def path(self, stage: str, fingerprint: str) -> Path:
+        return self.root / stage / fingerprint
+
+    def meta(self, stage: str, fingerprint: str) -> Optional[Dict]:
+        # A found checkpoint is touched (under the prune lock) so runs in progress keep it
+        path = self.path(stage, fingerprint) / "meta.json"
+        with file_lock(self.root / ".lock"):
+            if not path.exists():
+                return None
+            os.utime(path)
+        meta = json.loads(path.read_text(encoding="utf-8"))
+        return meta if meta.get("format") == CHECKPOINT_VERSION else None
+
+    def _publish(self, stage: str, fingerprint: str, write: Callable[[Path], Dict], replace: bool = False) -> Dict:
+        # Same fingerprint, same output: an existing checkpoint is kept unless replace is set
+        target = self.path(stage, fingerprint)
+        existing = None if replace else self.meta(stage, fingerprint)
+        if existing is not None:
+            return existing
+        tmp = target.with_name(f"{fingerprint}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        meta = {"format": CHECKPOINT_VERSION, "stage": stage, "fingerprint": fingerprint, "ts": time.time(), **write(tmp)}
+        (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        shutil.rmtree(target, ignore_errors=True)
+        try:
+            os.replace(tmp, target)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return meta
+
+    def save_corpus(self, fingerprint: str, candidates: Sequence[Candidate], duplicates: Dict[str, List[str]], skills: SkillMatrix) -> None:
+        def write(path: Path) -> Dict:
+            _save_candidates(path, candidates)
+            _save_csr(path / "skills", skills.matrix, data=False)
+            (path / "duplicates.json").write_text(json.dumps(duplicates), encoding="utf-8")
+            return {"rows": len(candidates), "skill_phrases": skills.phrases}
+
+        self._publish("corpus", fingerprint, write)
+
+    def load_corpus(self, fingerprint: str) -> Optional[Tuple[List[Candidate], Dict[str, List[str]], SkillMatrix]]:
+        meta = self.meta("corpus", fingerprint)
+        if meta is None:
+            return None
+        path = self.path("corpus", fingerprint)
+        candidates = _load_candidates(path)
+        ids = [c.id for c in candidates]
+        phrases = meta["skill_phrases"]
+        skills = SkillMatrix(
+            ids=ids,
+            phrases=phrases,
+            columns={p: j for j, p in enumerate(phrases)},
+            matrix=_load_csr(path / "skills", (len(ids), len(phrases)), dtype=bool),
+        )
+        duplicates = json.loads((path / "duplicates.json").read_text(encoding="utf-8"))
+        return candidates, duplicates, skills
+
+    def save_index(self, fingerprint: str, index: EmbeddingIndex) -> None:
+        def write(path: Path) -> Dict:
+            _save_csr(path / "tfidf", index.matrix)
+            if index.scales is not None:
+                _save(path / "scales.npy", index.scales)
+            _save(path / "idf.npy", index.vectorizer.idf_)
+            return {"shape": list(index.matrix.shape), "precision": index.precision, **_vectorizer_meta(index.vectorizer)}
+
+        self._publish("index", fingerprint, write)
+
+    def load_index(self, fingerprint: str, ids: List[str]) -> Optional[EmbeddingIndex]:
+        # Memory-mapped like a shared segment, so resuming does not read the matrix up front
+        meta = self.meta("index", fingerprint)
+        if meta is None:
+            return None
+        path = self.path("index", fingerprint)
+        return EmbeddingIndex(
+            vectorizer=_restore_vectorizer(meta, _load(path / "idf.npy")),
+            matrix=_load_csr(path / "tfidf", tuple(meta["shape"])),
+            ids=ids,
+            scales=_load(path / "scales.npy") if meta["precision"] == "int8" else None,
+        )
+
+    def save_matches(self, fingerprint: str, matches: Sequence[MatchResult], ids: List[str], role: Role, metrics: Dict) -> None:
+        # Rows into the corpus, float32 scores, hit masks and next-step codes: MatchResult's own fields
+        def write(path: Path) -> Dict:
+            row_of = {cid: i for i, cid in enumerate(ids)}
+            _save(path / "rows.npy", np.array([row_of[m.candidate_id] for m in matches], dtype=np.int64))
+            _save(path / "scores.npy", np.array([m.score for m in matches], dtype=np.float32))
+            _save(path / "next_step.npy", np.array([m.next_step for m in matches], dtype=np.int8))
+            for name, kind in MASKS.items():
+                _save(path / f"{name}.npy", _pack_masks([getattr(m, name) for m in matches], len(getattr(role, kind))))
+            return {"matches": len(matches), "metrics": metrics}
+
+        self._publish("matches", fingerprint, write)
+
+    def load_matches(self, fingerprint: str, ids: List[str], role: Role) -> Optional[Tuple[List[MatchResult], Dict]]:
+        meta = self.meta("matches", fingerprint)
+        if meta is None:
+            return None
+        path = self.path("matches", fingerprint)
+        rows = np.load(path / "rows.npy").tolist()
+        scores = np.load(path / "scores.npy")
+        next_step = np.load(path / "next_step.npy").tolist()
+        masks = [_unpack_masks(np.load(path / f"{name}.npy")) for name in MASKS]
+        matches = [
+            MatchResult(ids[row], role, scores[i], *(m[i] for m in masks), next_step=next_step[i])
+            for i, row in enumerate(rows)
+        ]
+        return matches, meta["metrics"]
+
+    def save_plans(self, fingerprint: str, cohort: CohortPlan, ids: List[str]) -> None:
+        # Plans repeat per gap pattern, so each distinct plan is stored once plus a row -> plan table
+        def write(path: Path) -> Dict:
+            patterns: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], int] = {}
+            which = np.full(len(ids), -1, dtype=np.int32)
+            for row, cid in enumerate(ids):
+                plan = cohort.plans.get(cid)
+                if plan is not None:
+                    key = (tuple(plan.goals), tuple(plan.recommendations))
+                    which[row] = patterns.setdefault(key, len(patterns))
+            role_ids = sorted(set(cohort.targets.values()))
+            code = {role_id: j for j, role_id in enumerate(role_ids)}
+            _save(path / "plan.npy", which)
+            _save(path / "target.npy", np.array([code.get(cohort.targets.get(cid), -1) for cid in ids], dtype=np.int32))
+            return {"patterns": [list(map(list, p)) for p in patterns], "targets": role_ids, "gap_stats": cohort.gap_stats}
+
+        self._publish("plans", fingerprint, write)
+
+    def load_plans(self, fingerprint: str, ids: List[str]) -> Optional[CohortPlan]:
+        meta = self.meta("plans", fingerprint)
+        if meta is None:
+            return None
+        path = self.path("plans", fingerprint)
+        which = np.load(path / "plan.npy").tolist()
+        target = np.load(path / "target.npy").tolist()
+        patterns = meta["patterns"]
+        plans = {
+            cid: DevelopmentPlan(candidate_id=cid, goals=list(patterns[k][0]), recommendations=list(patterns[k][1]))
+            for cid, k in zip(ids, which)
+            if k >= 0
+        }
+        targets = {cid: meta["targets"][t] for cid, t in zip(ids, target) if t >= 0}
+        return CohortPlan(plans=plans, gap_stats=meta["gap_stats"], targets=targets)
+
+    def save_report(self, fingerprint: str, info: Dict) -> None:
+        # Only the report run written for these inputs; the report itself lives in its store
+        self._publish("report", fingerprint, lambda path: {"run": info["run"]}, replace=True)
+
+    def mark(self, role_id: str, stages: Dict[str, str]) -> None:
+        path = self.root / "runs" / f"{role_id}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.tmp-{os.getpid()}")
+        tmp.write_text(json.dumps(stages), encoding="utf-8")
+        with file_lock(self.root / ".lock"):
+            tmp.replace(path)
+
+    def prune(self) -> None:
+        # Keeps the checkpoints some role's last finished run points at, and those another run
+        # still in progress published or loaded (not marked yet); removes the rest, including
+        # leftovers of runs that died mid-write. Entries are renamed aside before deletion, so a
+        # reader sees a whole checkpoint or none.
+        with file_lock(self.root / ".lock"):
+            keep = set()
+            runs = self.root / "runs"
+            if runs.is_dir():
+                for path in runs.glob("*.json"):
+                    keep.update(json.loads(path.read_text(encoding="utf-8")).items())
+            horizon = self._horizon()
+            doomed = []
+            for stage in STAGES:
+                stage_dir = self.root / stage
+                if not stage_dir.is_dir():
+                    continue
+                for entry in stage_dir.iterdir():
+                    if ".tmp-" in entry.name and pid_alive(entry.name.rsplit("-", 1)[1]):
+                        continue  # another run is still writing it
+                    if (stage, entry.name) in keep:
+                        continue
+                    try:
+                        if (entry / "meta.json").stat().st_mtime >= horizon:
+                            continue  # published or loaded by a run that has not marked yet
+                    except OSError:
+                        pass
+                    trash = entry.with_name(f"{entry.name}.trash")
+                    try:
+                        entry.rename(trash)
+                    except OSError:
+                        continue
+                    doomed.append(trash)
+        for trash in doomed:
+            shutil.rmtree(trash, ignore_errors=True)
@@ -2,15 +2,15 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 import typer
 from rich import print
 
-from .config import CONFIG
-from .data_models import role_from_yaml
+from .config import CONFIG, CascadeConfig
 from .orchestrator import Orchestrator
-from .parsing import parse_candidate_folder
+from .parsing import load_corpus
+from .reports.store import ReportStore, list_stores
 from .role_classifier import classify_role
 
 
@@ -18,32 +18,76 @@ app = typer.Typer(add_completion=False)
 
 
 @app.command()
-def ingest(data: str = typer.Option("data", help="Data directory")) -> None:
+def ingest(
+    data: str = typer.Option("data", help="Data directory"),
+    field: List[str] = typer.Option([], "--field", help="CSV/JSONL column mapping, e.g. --field resume_text=cv"),
+    chunk_size: int = typer.Option(CONFIG.bulk_chunk_size, help="CSV/JSONL rows per chunk"),
+    workers: int = typer.Option(CONFIG.bulk_workers, help="Processes converting CSV/JSONL chunks"),
+) -> None:
     data_dir = Path(data)
-    candidates = parse_candidate_folder(data_dir / "candidates")
+    field_map = {**CONFIG.bulk_field_map, **dict(f.split("=", 1) for f in field)}
+    candidates = load_corpus(data_dir / "candidates", field_map=field_map, chunk_size=chunk_size, workers=workers)
     print(f"[bold green]Ingested[/] {len(candidates)} candidates from {data_dir / 'candidates'}")
 
 
 @app.command()
 def match(
-    role: str = typer.Option(..., help="YAML role file"),
+    role: str = typer.Option(..., help="Role file, or a role id from <data>/roles"),
     data: str = typer.Option("data", help="Data directory"),
     out: str = typer.Option("outputs", help="Output directory"),
+    server: Optional[str] = typer.Option(CONFIG.service_url, help="Rank via a running 'serve' instance at this URL"),
+    cascade: bool = typer.Option(CONFIG.cascade.enabled, help="Rank with the skills -> cosine -> explain cascade"),
+    shortlist: int = typer.Option(CONFIG.cascade.shortlist, help="Cascade: candidates kept by the skill-count stage"),
+    explain_top: int = typer.Option(CONFIG.cascade.explain_top, help="Cascade: candidates explained and reported"),
+    resume: bool = typer.Option(False, "--resume", help="Reuse stage checkpoints whose inputs are unchanged"),
+    dedupe: Optional[float] = typer.Option(CONFIG.dedupe_threshold, help="Fold resumes above this estimated Jaccard similarity"),
 ) -> None:
-    orch = Orchestrator()
-    report_path = orch.run(Path(role), Path(data), Path(out))
-    print(f"[bold green]Report generated:[/] {report_path}")
-    print(Path(report_path).read_text(encoding="utf-8")[:4000])
+    cascade_config = CascadeConfig(enabled=True, shortlist=shortlist, explain_top=explain_top) if cascade else None
+    orch = Orchestrator(service_url=server, cascade=cascade_config, dedupe_threshold=dedupe)
+    store_dir = orch.run(Path(role), Path(data), Path(out), resume=resume)
+    for name, stage in orch.stages.items():
+        print(f"{name}: {'resumed' if stage['resumed'] else 'computed'} in {stage['ms']:.0f} ms")
+    run = ReportStore(store_dir).runs()[-1]
+    print(f"[bold green]Report run {run['run']}:[/] {store_dir} ({run['upserts']} updated, {run['removed']} removed)")
+    print(json.dumps(ReportStore(store_dir).latest(), indent=2)[:4000])
 
 
 @app.command()
-def report(out: str = typer.Option("outputs", help="Output directory")) -> None:
-    report_path = Path(out) / "report.json"
-    if not report_path.exists():
+def report(
+    out: str = typer.Option("outputs", help="Output directory"),
+    role: Optional[str] = typer.Option(None, help="Role id; lists the stored roles when omitted"),
+    run: Optional[int] = typer.Option(None, help="Show this run instead of the latest"),
+    diff: Optional[List[int]] = typer.Option(None, help="Show what changed between two runs: --diff A --diff B"),
+    runs: bool = typer.Option(False, "--runs", help="List the role's runs"),
+    export: Optional[str] = typer.Option(None, help="Write the selected run as a standalone JSON report"),
+) -> None:
+    stores = {s.root.name: s for s in list_stores(Path(out) / "reports")}
+    if not stores:
         print("[red]No report found. Run 'match' first.[/]")
         raise typer.Exit(code=1)
-    data = json.loads(report_path.read_text(encoding="utf-8"))
-    print(data)
+    if role is None:
+        for role_id, store in stores.items():
+            print(f"{role_id}: {store.last_run} runs")
+        return
+    if role not in stores:
+        print(f"[red]No report for role {role}.[/]")
+        raise typer.Exit(code=1)
+    store = stores[role]
+    if diff and len(diff) != 2:
+        raise typer.BadParameter("--diff takes exactly two runs")
+    try:
+        if runs:
+            print(json.dumps(store.runs(), indent=2))
+        elif diff:
+            print(json.dumps(store.diff(diff[0], diff[1]), indent=2))
+        elif export:
+            store.export(Path(export), run)
+            print(f"[bold green]Saved[/] {export}")
+        else:
+            print(json.dumps(store.report(run) if run else store.latest(), indent=2))
+    except KeyError as exc:  # ReportStore.state names the unknown run
+        available = ", ".join(str(r["run"]) for r in store.runs()) or "none"
+        raise typer.BadParameter(f"{exc.args[0]}; runs for {role}: {available}") from None
 
 
 @app.command()
@@ -59,6 +103,134 @@ def classify(
     print(f"[bold green]Saved[/] {path}")
 
 
+@app.command()
+def interviews(
+    transcripts: str = typer.Option("data/transcripts", help="Transcript file or directory (.txt)"),
+    out: str = typer.Option("outputs/interview_scores.jsonl", help="JSONL output; one line per transcript is appended"),
+    workers: int = typer.Option(0, help="Worker processes (0 = all CPUs)"),
+    chunk_kb: int = typer.Option(1024, help="Read transcripts in chunks of this many KB"),
+) -> None:
+    from .agents.interview import InterviewAgent
+    from .utils.io import list_files
+
+    src = Path(transcripts)
+    paths = [src] if src.is_file() else list_files(src, exts={".txt"})
+    count = InterviewAgent().write_evaluations(paths, Path(out), workers=workers or None, chunk_size=chunk_kb * 1024)
+    print(f"[bold green]Scored[/] {count} transcripts -> {out} (appended)")
+
+
+@app.command()
+def serve(
+    data: str = typer.Option("data", help="Data directory"),
+    host: str = typer.Option("127.0.0.1", help="Bind address"),
+    port: int = typer.Option(8765, help="Bind port"),
+    window_ms: float = typer.Option(CONFIG.service_batch_window_ms, help="Rank request batching window (ms)"),
+) -> None:
+    from .service import serve as make_server
+
+    server = make_server(Path(data), host=host, port=port, window_ms=window_ms)
+    print(f"[bold green]Serving[/] on http://{host}:{port} (POST /rank, /explain, /classify; GET /health, /corpus)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@app.command()
+def watch(
+    data: str = typer.Option("data", help="Data directory (candidates/ and roles/)"),
+    out: str = typer.Option("outputs", help="One report per role is kept under <out>/reports/<role id>/"),
+    interval: float = typer.Option(5.0, help="Seconds between polls"),
+    once: bool = typer.Option(False, help="Poll once and exit"),
+) -> None:
+    from .watch import Watcher
+
+    watcher = Watcher(Path(data), Path(out))
+
+    def show(event) -> None:
+        print(
+            f"[bold green]Updated[/] ranked={event.roles_ranked} patched={event.roles_patched} "
+            f"removed={event.roles_removed} candidates +{len(event.candidates_added)} "
+            f"~{len(event.candidates_changed)} -{len(event.candidates_removed)} ({event.elapsed_ms} ms)"
+        )
+
+    if once:
+        show(watcher.poll())
+        return
+    print(f"[bold green]Watching[/] {Path(data) / 'candidates'} and {Path(data) / 'roles'} every {interval}s")
+    try:
+        watcher.run(interval=interval, on_event=show)
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command("index-report")
+def index_report(
+    data: str = typer.Option("data", help="Data directory (candidates/ and roles/)"),
+    precision: List[str] = typer.Option(["float32", "int8"], help="Precisions to compare against float64"),
+    budget_mb: Optional[float] = typer.Option(CONFIG.index_memory_mb, help="Also report the index a memory budget (MB) picks"),
+    top_k: int = typer.Option(10, help="Ranking depth for the overlap metric"),
+) -> None:
+    from .embeddings import build_index, ranking_agreement
+    from .roles import role_registry
+
+    data_dir = Path(data)
+    candidates = load_corpus(data_dir / "candidates")
+    if not candidates:
+        print("[red]No candidates found.[/]")
+        raise typer.Exit(code=1)
+    queries = [c.text for c in role_registry(data_dir / "roles").compiled()]
+    ids = [c.id for c in candidates]
+    texts = [c.resume_text for c in candidates]
+    reference = build_index(ids, texts, precision="float64", memory_budget_mb=None)
+    print(f"float64 reference: {reference.nbytes} bytes, {reference.matrix.shape[1]} features, {len(queries)} role queries")
+    builds = [(p, build_index(ids, texts, precision=p, memory_budget_mb=None)) for p in precision]
+    if budget_mb is not None:
+        builds.append((f"budget {budget_mb} MB", build_index(ids, texts, memory_budget_mb=budget_mb)))
+    for label, index in builds:
+        print(label, json.dumps(ranking_agreement(reference, index, queries, k=top_k)))
+
+
+@app.command()
+def loadtest(
+    data: str = typer.Option("outputs/.loadtest", help="Where the synthetic corpus is written"),
+    sessions: int = typer.Option(50, help="Concurrent simulated dashboard sessions"),
+    iterations: int = typer.Option(3, help="Compute Fit clicks per session"),
+    corpus: int = typer.Option(5000, help="Synthetic resumes in the pool"),
+    think: float = typer.Option(0.0, help="Mean think time between clicks (s)"),
+    shared_cache: bool = typer.Option(True, help="Share one ranking cache across sessions, as the UI does"),
+    roles: str = typer.Option(str(CONFIG.roles_dir), help="Catalog roles sessions pick from besides typed titles"),
+    out: Optional[str] = typer.Option(None, help="Write the JSON report here"),
+    baseline: Optional[str] = typer.Option(None, help="Earlier report to check for regressions"),
+    tolerance: float = typer.Option(0.2, help="Allowed fractional regression against --baseline"),
+) -> None:
+    from .loadtest import compare_reports, run_load
+
+    result = run_load(
+        Path(data),
+        sessions=sessions,
+        iterations=iterations,
+        corpus=corpus,
+        think_s=think,
+        shared_cache=shared_cache,
+        roles_dir=Path(roles),
+    ).to_dict()
+    text = json.dumps(result, indent=2)
+    print(text)
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        Path(out).write_text(text, encoding="utf-8")
+    if baseline:
+        problems = compare_reports(result, json.loads(Path(baseline).read_text(encoding="utf-8")), tolerance)
+        for problem in problems:
+            print(f"[red]Regression:[/] {problem}")
+        if problems:
+            raise typer.Exit(code=1)
+        print("[bold green]No regressions[/] against", baseline)
+
+
 @app.command()
 def demo(
     data: str = typer.Option("data", help="Data dir with candidates and roles"),
@@ -105,9 +277,9 @@ Publications: 10 peer-reviewed papers in AI venues.
             encoding="utf-8",
         )
     orch = Orchestrator()
-    report_path = orch.run(role_file, Path(data), Path(out))
-    print(f"[bold green]Demo report:[/] {report_path}")
-    print(Path(report_path).read_text(encoding="utf-8"))
+    store_dir = orch.run(role_file, Path(data), Path(out))
+    print(f"[bold green]Demo report:[/] {store_dir}")
+    print(json.dumps(ReportStore(store_dir).latest(), indent=2))
 
 
 if __name__ == "__main__":
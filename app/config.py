@@ -1,7 +1,18 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, Optional
+
+
+@dataclass
+class CascadeConfig:
+    enabled: bool = False
+    # Stage 1 (required/other skill hit counts from the skill matrix) keeps this many candidates
+    shortlist: int = 2000
+    # Stage 3 (explanation) runs on this many of the cosine-ranked shortlist
+    explain_top: int = 200
 
 
 @dataclass
@@ -10,8 +21,60 @@ class AppConfig:
     output_dir: Path = Path("outputs")
     candidate_dir: Path = Path("data/candidates")
     roles_dir: Path = Path("data/roles")
+    # Memory-mapped resume text store and metadata, reused across CLI/UI cold starts
+    corpus_dir: Path = Path("outputs/.corpus")
     use_langchain: bool = False
     use_crewai: bool = False
+    # When set, CLI and UI rank through a running `cli.py serve` instead of rebuilding the index
+    service_url: Optional[str] = field(default_factory=lambda: os.environ.get("TALENT_SERVICE_URL") or None)
+    service_batch_window_ms: float = 5.0
+    # The service re-scans its candidate folder at most this often and reloads when files changed
+    service_reload_s: float = 5.0
+    # Estimated Jaccard similarity above which resumes are folded into one canonical candidate; None disables
+    dedupe_threshold: Optional[float] = None
+    # Ranking cache: in-memory LRU entries, plus an on-disk tier when cache_dir is set
+    cache_size: int = 256
+    cache_dir: Optional[Path] = Path("outputs/.cache")
+    # Size cap for the on-disk tier; least recently used entries are deleted beyond it
+    cache_disk_mb: float = 256.0
+    # Memory-mapped index segments (TF-IDF CSR, vocabulary/IDF, skill matrix, candidate records),
+    # published once per corpus version and attached read-only by every worker process and session
+    index_dir: Path = Path("outputs/.index")
+    # Segments (shared and out-of-core) kept per folder besides any used in the last few minutes;
+    # the least recently attached are deleted whenever a new one is published
+    index_keep_segments: int = 4
+    share_index: bool = field(default_factory=lambda: os.environ.get("TALENT_SHARE_INDEX", "").lower() in ("1", "true", "yes"))
+    # TF-IDF index storage: float64, float32 or int8 (per-row scale); with a memory budget (MB) the
+    # precision is lowered and then max_features halved until the index fits
+    index_precision: str = "float32"
+    index_max_features: int = 5000
+    index_memory_mb: Optional[float] = None
+    # Out-of-core ranking: pools larger than out_of_core_rows (None disables) are scored from TF-IDF
+    # row blocks on disk, sized to out_of_core_memory_mb, keeping the best out_of_core_top_k per role;
+    # the vectorizer is fitted on an evenly spaced sample of out_of_core_fit_rows resumes
+    out_of_core_rows: Optional[int] = field(
+        default_factory=lambda: int(os.environ["TALENT_OUT_OF_CORE_ROWS"]) if os.environ.get("TALENT_OUT_OF_CORE_ROWS") else None
+    )
+    out_of_core_memory_mb: float = 256.0
+    out_of_core_fit_rows: int = 50000
+    out_of_core_top_k: int = 1000
+    # Streaming CSV/JSONL export ingestion: rows per chunk, converter processes, Candidate attr -> column
+    bulk_chunk_size: int = 5000
+    bulk_workers: int = 1
+    bulk_field_map: Dict[str, str] = field(default_factory=dict)
+    # Orchestrator runs checkpoint each stage (corpus, index, matches, plans) under <out>/.checkpoints
+    # so `match --resume` only recomputes stages whose inputs changed or that never finished
+    run_checkpoints: bool = True
+    # Report stores append per-run diffs; a full checkpoint is written every this many runs
+    report_compact_every: int = 20
+    # Runs each report store keeps; older segments and checkpoints are deleted when it compacts
+    report_keep_runs: Optional[int] = 100
+    # Also write the latest report as <out>/report.json after every match run
+    report_export: bool = True
+    cascade: CascadeConfig = field(default_factory=CascadeConfig)
+    # Dashboard ranking: show the best results found within this budget, then refine in the background
+    anytime_deadline_ms: float = 300.0
+    anytime_block_size: int = 500
 
 
 CONFIG = AppConfig()
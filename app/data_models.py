@@ -2,20 +2,85 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .text_store import TextStore
 
 
-@dataclass
 class Candidate:
-    id: str
-    name: str
-    email: Optional[str]
-    resume_text: str
-    skills: List[str] = field(default_factory=list)
-    research_areas: List[str] = field(default_factory=list)
-    teaching_experience: List[str] = field(default_factory=list)
-    publications: List[str] = field(default_factory=list)
-    metadata: Dict[str, str] = field(default_factory=dict)
+    # Compact record; resume text either lives inline or is read lazily from a TextStore on access
+    __slots__ = (
+        "id",
+        "name",
+        "email",
+        "skills",
+        "research_areas",
+        "teaching_experience",
+        "publications",
+        "metadata",
+        "_text",
+        "_store",
+        "_ref",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        email: Optional[str],
+        resume_text: Optional[str] = None,
+        skills: Optional[List[str]] = None,
+        research_areas: Optional[List[str]] = None,
+        teaching_experience: Optional[List[str]] = None,
+        publications: Optional[List[str]] = None,
+        metadata: Optional[Dict[str, str]] = None,
+        store: Optional["TextStore"] = None,
+        ref: int = -1,
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.email = email
+        self.skills: List[str] = skills if skills is not None else []
+        self.research_areas: List[str] = research_areas if research_areas is not None else []
+        self.teaching_experience: List[str] = teaching_experience if teaching_experience is not None else []
+        self.publications: List[str] = publications if publications is not None else []
+        self.metadata: Dict[str, str] = metadata if metadata is not None else {}
+        self._text = resume_text
+        self._store = store
+        self._ref = ref
+
+    @property
+    def resume_text(self) -> str:
+        if self._text is not None:
+            return self._text
+        if self._store is not None:
+            return self._store.get(self._ref)
+        return ""
+
+    @resume_text.setter
+    def resume_text(self, value: str) -> None:
+        self._text = value
+
+    def __repr__(self) -> str:
+        return f"Candidate(id={self.id!r}, name={self.name!r}, email={self.email!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Candidate):
+            return NotImplemented
+        return (
+            self.id == other.id
+            and self.name == other.name
+            and self.email == other.email
+            and self.resume_text == other.resume_text
+            and self.skills == other.skills
+            and self.research_areas == other.research_areas
+            and self.teaching_experience == other.teaching_experience
+            and self.publications == other.publications
+            and self.metadata == other.metadata
+        )
 
 
 @dataclass
@@ -29,14 +94,100 @@ class Role:
     teaching_requirements: List[str] = field(default_factory=list)
 
 
-@dataclass
+NEXT_STEPS = ("Needs follow-up", "Invite to interview")
+
+
 class MatchResult:
-    candidate_id: str
-    role_id: str
-    fit_score: float
-    strengths: List[str]
-    risks: List[str]
-    next_steps: List[str]
+    # Compact result: role-phrase hit bitmasks (bit i = i-th phrase of that role list), a float32
+    # score and a next-step code. Strengths/risks/next steps are rendered from the role on access.
+    __slots__ = ("candidate_id", "role", "score", "required_mask", "preferred_mask", "research_mask", "teaching_mask", "next_step")
+
+    def __init__(
+        self,
+        candidate_id: str,
+        role: Role,
+        score: float,
+        required_mask: int = 0,
+        preferred_mask: int = 0,
+        research_mask: int = 0,
+        teaching_mask: int = 0,
+        next_step: int = 0,
+    ) -> None:
+        self.candidate_id = candidate_id
+        self.role = role
+        self.score = np.float32(score)
+        self.required_mask = int(required_mask)
+        self.preferred_mask = int(preferred_mask)
+        self.research_mask = int(research_mask)
+        self.teaching_mask = int(teaching_mask)
+        self.next_step = int(next_step)
+
+    @property
+    def role_id(self) -> str:
+        return self.role.id
+
+    @property
+    def fit_score(self) -> float:
+        return round(float(self.score), 4)
+
+    @staticmethod
+    def _hits(phrases: List[str], mask: int) -> List[str]:
+        return [p for i, p in enumerate(phrases) if mask >> i & 1]
+
+    @property
+    def strengths(self) -> List[str]:
+        role = self.role
+        return (
+            [f"Mentions required skill: {s}" for s in self._hits(role.required_skills, self.required_mask)]
+            + [f"Mentions preferred skill: {s}" for s in self._hits(role.preferred_skills, self.preferred_mask)]
+            + [f"Research focus alignment: {a}" for a in self._hits(role.research_focus, self.research_mask)]
+            + [f"Teaching alignment: {t}" for t in self._hits(role.teaching_requirements, self.teaching_mask)]
+        )
+
+    @property
+    def risks(self) -> List[str]:
+        missing = ~self.required_mask & ((1 << len(self.role.required_skills)) - 1)
+        return [f"Missing required skill: {s}" for s in self._hits(self.role.required_skills, missing)]
+
+    @property
+    def next_steps(self) -> List[str]:
+        return [NEXT_STEPS[self.next_step]]
+
+    @property
+    def strength_count(self) -> int:
+        return sum(bin(m).count("1") for m in (self.required_mask, self.preferred_mask, self.research_mask, self.teaching_mask))
+
+    @property
+    def risk_count(self) -> int:
+        return len(self.role.required_skills) - bin(self.required_mask).count("1")
+
+    def to_dict(self) -> Dict:
+        return {
+            "candidate_id": self.candidate_id,
+            "role_id": self.role_id,
+            "fit_score": self.fit_score,
+            "strengths": self.strengths,
+            "risks": self.risks,
+            "next_steps": self.next_steps,
+        }
+
+    def to_compact(self) -> List:
+        return [
+            self.candidate_id,
+            float(self.score),
+            self.required_mask,
+            self.preferred_mask,
+            self.research_mask,
+            self.teaching_mask,
+            self.next_step,
+        ]
+
+    @classmethod
+    def from_compact(cls, row: List, role: Role) -> "MatchResult":
+        return cls(row[0], role, *row[1:])
+
+    def __repr__(self) -> str:
+        return f"MatchResult(candidate_id={self.candidate_id!r}, role_id={self.role_id!r}, fit_score={self.fit_score})"
 
 
 @dataclass
@@ -47,16 +198,6 @@ class DevelopmentPlan:
 
 
 def role_from_yaml(path: Path) -> Role:
-    import yaml
-
-    data = yaml.safe_load(path.read_text(encoding="utf-8"))
-    return Role(
-        id=data.get("id") or path.stem,
-        title=data["title"],
-        department=data.get("department", ""),
-        required_skills=data.get("required_skills", []),
-        preferred_skills=data.get("preferred_skills", []),
-        research_focus=data.get("research_focus", []),
-        teaching_requirements=data.get("teaching_requirements", []),
-    )
+    from .roles import load_role_file
 
+    return load_role_file(path)
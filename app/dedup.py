@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .data_models import Candidate
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _shingle_hashes(text: str, k: int) -> np.ndarray:
+    # Word k-gram hashes: crc32 per word, combined with a polynomial over the window
+    # Reduced to 32 bits, so a*h + b below stays under 2**64 for 32-bit coefficients
+    words = np.array([zlib.crc32(w.encode("utf-8")) for w in text.split()], dtype=np.uint64)
+    if len(words) == 0:
+        return words
+    k = min(k, len(words))
+    out = np.zeros(len(words) - k + 1, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for j in range(k):
+            out = out * np.uint64(1000003) + words[j : len(words) - k + 1 + j]
+    return np.unique(out & _MAX_HASH)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle: int = 5, seed: int = 1) -> None:
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle = shingle
+        # (a*h + b) % p with a, b, h < 2**32 never overflows uint64
+        self.a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        # A text without words has no shingles; its all-max signature is never bucketed
+        hv = _shingle_hashes(text, self.shingle)[:, None]
+        if len(hv) == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        perm = ((hv * self.a + self.b) % _MERSENNE) & _MAX_HASH
+        return perm.min(axis=0).astype(np.uint32)
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.num_perm), dtype=np.uint32)
+        for i, text in enumerate(texts):
+            out[i] = self.signature(text)
+        return out
+
+
+def lsh_params(threshold: float, num_perm: int, recall: float = 0.95) -> Tuple[int, int]:
+    # Most rows per band (fewest false candidate pairs) that still propose a pair sitting exactly
+    # at the threshold with probability >= recall: 1 - (1 - t^rows)^bands
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1.0 - (1.0 - threshold**rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+def near_duplicate_groups(
+    texts: Sequence[str],
+    threshold: float = 0.9,
+    num_perm: int = 128,
+    order: Optional[Sequence[int]] = None,
+) -> List[List[int]]:
+    # Groups around representatives, first of each group: in `order` (default: input order) every
+    # unclaimed text becomes a representative and claims the unclaimed texts LSH proposes for it
+    # whose estimated Jaccard with it clears the threshold. Members are near the representative
+    # itself, not merely chained to it through other members.
+    hasher = MinHasher(num_perm=num_perm)
+    sigs = hasher.signatures(texts)
+    bands, rows = lsh_params(threshold, num_perm)
+    usable = [bool(t.split()) for t in texts]
+    buckets_of: List[List[List[int]]] = [[] for _ in texts]
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        for i, key in enumerate(sigs[:, band * rows : (band + 1) * rows]):
+            if usable[i]:
+                buckets.setdefault(key.tobytes(), []).append(i)
+        for members in buckets.values():
+            if len(members) > 1:
+                for i in members:
+                    buckets_of[i].append(members)
+
+    claimed = [False] * len(texts)
+    groups: List[List[int]] = []
+    for rep in range(len(texts)) if order is None else order:
+        if claimed[rep] or not buckets_of[rep]:
+            continue
+        claimed[rep] = True
+        group = [rep]
+        for members in buckets_of[rep]:
+            for other in members:
+                # LSH only proposes pairs; keep those whose estimated Jaccard clears the threshold
+                if not claimed[other] and np.mean(sigs[rep] == sigs[other]) >= threshold:
+                    claimed[other] = True
+                    group.append(other)
+        if len(group) > 1:
+            groups.append(group)
+    return groups
+
+
+def deduplicate(candidates: List[Candidate], threshold: float = 0.9) -> Tuple[List[Candidate], Dict[str, List[str]]]:
+    # Keeps one canonical candidate per near-duplicate group (the longest resume, then lowest id)
+    # and returns the mapping canonical id -> dropped duplicate ids.
+    texts = [c.resume_text for c in candidates]
+    order = sorted(range(len(candidates)), key=lambda i: (-len(texts[i]), candidates[i].id))
+    dropped = set()
+    duplicates: Dict[str, List[str]] = {}
+    for group in near_duplicate_groups(texts, threshold=threshold, order=order):
+        keep, others = group[0], group[1:]
+        dropped.update(others)
+        duplicates[candidates[keep].id] = sorted(candidates[i].id for i in others)
+    return [c for i, c in enumerate(candidates) if i not in dropped], duplicates
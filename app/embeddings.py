@@ -1,11 +1,53 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from .config import CONFIG
+
+# Storage precisions, most to least exact. int8 keeps one float32 scale per row.
+PRECISIONS = ("float64", "float32", "int8")
+_VALUE_BYTES = {"float64": 8, "float32": 4, "int8": 1}
+# Rows of an int8 index widened to float32 at a time while scoring
+_DEQUANT_ROWS = 65536
+# Smallest vocabulary a memory budget may shrink max_features to
+MIN_FEATURES = 500
+
+
+def _compact_indices(m: sparse.csr_matrix) -> sparse.csr_matrix:
+    # int32 indices/indptr while nnz fits (sklearn may hand back int64 for large corpora)
+    if m.nnz < np.iinfo(np.int32).max and (m.indices.dtype != np.int32 or m.indptr.dtype != np.int32):
+        m = sparse.csr_matrix(
+            (m.data, m.indices.astype(np.int32), m.indptr.astype(np.int32)), shape=m.shape, copy=False
+        )
+    return m
+
+
+def quantize_rows(m: sparse.csr_matrix) -> Tuple[sparse.csr_matrix, np.ndarray]:
+    # Symmetric per-row int8: value ~= q * scale[row]. TF-IDF rows are non-negative and L2
+    # normalised, so each row's largest weight maps to 127; weights that round to 0 are dropped.
+    m = sparse.csr_matrix(m)
+    n = m.shape[0]
+    row_max = np.zeros(n, dtype=np.float64)
+    nonempty = np.diff(m.indptr) > 0
+    if m.nnz:
+        row_max[nonempty] = np.maximum.reduceat(np.abs(m.data), m.indptr[:-1][nonempty])
+    scales = np.where(row_max > 0, row_max / 127.0, 1.0).astype(np.float32)
+    row_of = np.repeat(np.arange(n), np.diff(m.indptr))
+    data = np.rint(m.data / scales[row_of]).astype(np.int8)
+    q = sparse.csr_matrix((data, m.indices, m.indptr), shape=m.shape)
+    q.eliminate_zeros()
+    return _compact_indices(q), scales
+
+
+def matrix_nbytes(m: sparse.spmatrix, scales: Optional[np.ndarray] = None) -> int:
+    m = sparse.csr_matrix(m)
+    total = m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+    return total + (scales.nbytes if scales is not None else 0)
 
 
 @dataclass
@@ -13,14 +55,152 @@ class EmbeddingIndex:
     vectorizer: TfidfVectorizer
     matrix: np.ndarray
     ids: List[str]
+    # Per-row dequantisation scales when `matrix` holds int8 weights
+    scales: Optional[np.ndarray] = None
+
+    @property
+    def precision(self) -> str:
+        return "int8" if self.scales is not None else np.dtype(self.matrix.dtype).name
+
+    @property
+    def nbytes(self) -> int:
+        return matrix_nbytes(self.matrix, self.scales)
 
     def query(self, texts: List[str]) -> np.ndarray:
-        q = self.vectorizer.transform(texts)
-        return cosine_similarity(q, self.matrix)
+        return self.query_vectors(self.vectorizer.transform(texts))
+
+    def query_vectors(self, q) -> np.ndarray:
+        # Rows and queries are already L2-normalised by the vectorizer, so cosine is a plain dot
+        # product; cosine_similarity would renormalise (copy) the whole matrix on every query
+        if self.scales is None:
+            # Multiplying the CSR rows by a dense query keeps the index in its own layout; q @ matrix.T
+            # would convert the whole matrix to CSR-of-the-transpose on every call
+            dense_q = np.asarray(q.astype(self.matrix.dtype).T.todense())
+            return np.asarray(self.matrix @ dense_q).T
+        # int8 rows are widened block by block, so scoring never holds a float copy of the index
+        dense_q = np.asarray(q.astype(np.float32).T.todense())
+        m = self.matrix
+        out = np.empty((q.shape[0], m.shape[0]), dtype=np.float32)
+        for start in range(0, m.shape[0], _DEQUANT_ROWS):
+            stop = min(start + _DEQUANT_ROWS, m.shape[0])
+            lo, hi = m.indptr[start], m.indptr[stop]
+            block = sparse.csr_matrix(
+                (m.data[lo:hi].astype(np.float32), m.indices[lo:hi], m.indptr[start : stop + 1] - lo),
+                shape=(stop - start, m.shape[1]),
+            )
+            out[:, start:stop] = (block @ dense_q).T * self.scales[start:stop]
+        return out
+
+    def encode(self, texts: Sequence[str]) -> Tuple[sparse.csr_matrix, Optional[np.ndarray]]:
+        # Rows for new texts in this index's vocabulary and storage precision
+        rows = sparse.csr_matrix(self.vectorizer.transform(list(texts)))
+        if self.scales is None:
+            return _compact_indices(rows.astype(self.matrix.dtype, copy=False)), None
+        return quantize_rows(rows)
+
+    def take(self, rows: np.ndarray, ids: Optional[List[str]] = None) -> "EmbeddingIndex":
+        return EmbeddingIndex(
+            vectorizer=self.vectorizer,
+            matrix=self.matrix[rows],
+            ids=ids if ids is not None else [self.ids[i] for i in rows],
+            scales=self.scales[rows] if self.scales is not None else None,
+        )
+
+    def append(self, ids: List[str], texts: Sequence[str]) -> "EmbeddingIndex":
+        if not ids:
+            return self
+        rows, scales = self.encode(texts)
+        return EmbeddingIndex(
+            vectorizer=self.vectorizer,
+            matrix=_compact_indices(sparse.vstack([self.matrix, rows], format="csr")),
+            ids=self.ids + list(ids),
+            scales=np.concatenate([self.scales, scales]) if self.scales is not None else None,
+        )
+
+
+def estimate_nbytes(m: sparse.spmatrix, precision: str) -> int:
+    # Size the index would have at `precision` (int8 also drops weights that quantise to 0, so
+    # this is an upper bound for it)
+    n = m.shape[0]
+    index_bytes = 4 if m.nnz < np.iinfo(np.int32).max else 8
+    total = m.nnz * (_VALUE_BYTES[precision] + index_bytes) + (n + 1) * index_bytes
+    return total + (4 * n if precision == "int8" else 0)
+
+
+def _with_precision(vectorizer: TfidfVectorizer, m: sparse.spmatrix, ids: List[str], precision: str) -> EmbeddingIndex:
+    if precision == "int8":
+        matrix, scales = quantize_rows(m)
+        return EmbeddingIndex(vectorizer=vectorizer, matrix=matrix, ids=ids, scales=scales)
+    m = _compact_indices(sparse.csr_matrix(m).astype(precision, copy=False))
+    return EmbeddingIndex(vectorizer=vectorizer, matrix=m, ids=ids)
+
+
+def _fit(texts: List[str], max_features: int, precision: str) -> Tuple[TfidfVectorizer, sparse.csr_matrix]:
+    # The full-precision reference is fitted in float64; everything else starts from float32
+    dtype = np.float64 if precision == "float64" else np.float32
+    vectorizer = TfidfVectorizer(max_features=max_features, ngram_range=(1, 2), dtype=dtype)
+    return vectorizer, vectorizer.fit_transform(texts)
+
+
+def build_index(
+    ids: List[str],
+    texts: List[str],
+    precision: Optional[str] = None,
+    max_features: Optional[int] = None,
+    memory_budget_mb: Optional[float] = None,
+) -> EmbeddingIndex:
+    precision = precision or CONFIG.index_precision
+    max_features = max_features or CONFIG.index_max_features
+    memory_budget_mb = memory_budget_mb if memory_budget_mb is not None else CONFIG.index_memory_mb
+    if precision not in PRECISIONS:
+        raise ValueError(f"unknown index precision {precision!r}; expected one of {PRECISIONS}")
+    vectorizer, m = _fit(texts, max_features, precision)
+    if memory_budget_mb is None:
+        return _with_precision(vectorizer, m, ids, precision)
+    # Budget mode: lower the precision first (cheap on accuracy), then halve the vocabulary
+    budget = memory_budget_mb * 1024 * 1024
+    allowed = PRECISIONS[PRECISIONS.index(precision) :]
+    while True:
+        for p in allowed:
+            if estimate_nbytes(m, p) <= budget:
+                return _with_precision(vectorizer, m, ids, p)
+        if max_features <= MIN_FEATURES:
+            return _with_precision(vectorizer, m, ids, allowed[-1])
+        max_features = max(max_features // 2, MIN_FEATURES)
+        vectorizer, m = _fit(texts, max_features, precision)
+
+
+def index_settings() -> Dict[str, object]:
+    # Everything that changes what build_index produces, for cache keys
+    return {
+        "precision": CONFIG.index_precision,
+        "max_features": CONFIG.index_max_features,
+        "memory_mb": CONFIG.index_memory_mb,
+    }
 
 
-def build_index(ids: List[str], texts: List[str]) -> EmbeddingIndex:
-    vectorizer = TfidfVectorizer(max_features=5000, ngram_range=(1, 2))
-    matrix = vectorizer.fit_transform(texts)
-    return EmbeddingIndex(vectorizer=vectorizer, matrix=matrix, ids=ids)
+def ranking_agreement(reference: EmbeddingIndex, index: EmbeddingIndex, queries: List[str], k: int = 10) -> Dict:
+    # How closely `index` reproduces the reference ranking for each query text: mean top-k
+    # overlap, mean Spearman rank correlation over the pool, and the largest cosine difference
+    from scipy.stats import spearmanr
 
+    ref = np.asarray(reference.query(queries), dtype=np.float64)
+    got = np.asarray(index.query(queries), dtype=np.float64)
+    k = min(k, ref.shape[1])
+    overlap, rho = [], []
+    for r, g in zip(ref, got):
+        top_r = set(np.argsort(-r, kind="stable")[:k])
+        top_g = set(np.argsort(-g, kind="stable")[:k])
+        overlap.append(len(top_r & top_g) / k if k else 1.0)
+        rho.append(1.0 if np.all(r == r[0]) or np.all(g == g[0]) else float(spearmanr(r, g)[0]))
+    return {
+        "precision": index.precision,
+        "features": index.matrix.shape[1],
+        "bytes": index.nbytes,
+        "reference_bytes": reference.nbytes,
+        "memory_ratio": round(index.nbytes / max(reference.nbytes, 1), 4),
+        "k": k,
+        "top_k_overlap": round(float(np.mean(overlap)), 4),
+        "spearman": round(float(np.mean(rho)), 4),
+        "max_score_delta": round(float(np.max(np.abs(ref - got))), 6),
+    }
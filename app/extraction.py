@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Pattern, Sequence, Tuple
+
+import numpy as np
+
+from .cache import text_fingerprint
+from .data_models import Candidate
+from .role_classifier import skill_vocabulary
+from .utils.text import normalize
+
+
+# Bumped whenever extraction output changes, so cached/persisted fields can be recognised as stale
+EXTRACTION_VERSION = "2"
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+SECTION_ALIASES: Dict[str, str] = {
+    "research": "research",
+    "research interests": "research",
+    "research areas": "research",
+    "experience": "experience",
+    "teaching": "teaching",
+    "teaching experience": "teaching",
+    "skills": "skills",
+    "publications": "publications",
+    "selected publications": "publications",
+}
+SECTION_RE = re.compile(r"^\s*([A-Za-z][A-Za-z ]{1,30}?)\s*:\s*(.*)$")
+
+TEACHING_CUES = ("teach", "taught", "lectur", "course", "supervis", "mentor", "curriculum", "instruct")
+
+
+def _trie_pattern(phrases: Sequence[str]) -> str:
+    # Prefix-factored alternation; greedy optional tails make it match the longest phrase at an offset
+    trie: Dict[str, Dict] = {}
+    for p in phrases:
+        node = trie
+        for ch in p:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Dict]) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+@lru_cache(maxsize=4096)
+def _word_pattern(phrase: str) -> Pattern[str]:
+    return re.compile(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)")
+
+
+def contains_phrase(text: str, phrase: str) -> bool:
+    # Whole-word containment, the same rule Gazetteer(whole_words=True) applies ("ml" is not in "html")
+    return _word_pattern(phrase).search(text) is not None
+
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+def phrase_rows(texts: Sequence[str], phrases: Sequence[str]) -> Dict[str, np.ndarray]:
+    # contains_phrase for many texts at once: the texts are joined into one string and each phrase
+    # is found with str.find (a lookbehind would disable the regex engine's fast literal scan), so
+    # each text is read once and the per-text work happens in C. Returns, per phrase, a bool array
+    # over texts.
+    ends = np.cumsum([len(t) + 1 for t in texts])
+    joined = "\n".join(texts)
+    out: Dict[str, np.ndarray] = {}
+    for phrase in phrases:
+        hits = np.zeros(len(texts), dtype=bool)
+        starts = []
+        start = joined.find(phrase) if phrase else -1
+        while start >= 0:
+            end = start + len(phrase)
+            if not (start and _WORD_CHAR.match(joined, start - 1)) and not _WORD_CHAR.match(joined, end):
+                starts.append(start)
+            start = joined.find(phrase, start + 1)
+        hits[np.searchsorted(ends, starts, side="right")] = True
+        out[phrase] = hits
+    return out
+
+
+# Finds every vocabulary phrase that occurs in a text in one regex pass. With whole_words, a phrase
+# only counts where it is not part of a longer word ("ai" is not found in "maintain").
+class Gazetteer:
+    def __init__(self, phrases: Sequence[str], whole_words: bool = False) -> None:
+        self.phrases: Tuple[str, ...] = tuple(dict.fromkeys(p.lower() for p in phrases if p))
+        self.vocabulary: FrozenSet[str] = frozenset(self.phrases)
+        self.whole_words = whole_words
+        # Zero-width lookahead reports the longest phrase starting at each offset; shorter phrases
+        # nested inside it are recovered from the precomputed containment closure below.
+        if whole_words:
+            pattern = r"(?<!\w)(?=(" + _trie_pattern(self.phrases) + r")(?!\w))"
+        else:
+            pattern = "(?=(" + _trie_pattern(self.phrases) + "))"
+        self._pattern: Pattern[str] = re.compile(pattern)
+        self._contained: Dict[str, Tuple[str, ...]] = {
+            p: tuple(q for q in self.phrases if self._occurs(q, p)) for p in self.phrases
+        }
+
+    def _occurs(self, phrase: str, text: str) -> bool:
+        if not self.whole_words:
+            return phrase in text
+        return contains_phrase(text, phrase)
+
+    def find(self, text: str) -> List[str]:
+        found: Dict[str, None] = {}
+        for m in self._pattern.finditer(text):
+            for p in self._contained[m.group(1)]:
+                found.setdefault(p, None)
+        return list(found)
+
+
+@dataclass(frozen=True)
+class ExtractedFields:
+    email: Optional[str]
+    skills: Tuple[str, ...]
+    research_areas: Tuple[str, ...]
+    teaching_experience: Tuple[str, ...]
+    publications: Tuple[str, ...]
+
+
+@lru_cache(maxsize=1)
+def skill_gazetteer() -> Gazetteer:
+    return Gazetteer(skill_vocabulary(), whole_words=True)
+
+
+def _split_items(text: str) -> List[str]:
+    items = re.split(r"[;,]|\band\b", text)
+    return [i.strip(" .").lower() for i in items if i.strip(" .")]
+
+
+def _sections(raw_text: str) -> Dict[str, List[str]]:
+    sections: Dict[str, List[str]] = {}
+    current: Optional[str] = None
+    for line in raw_text.splitlines():
+        m = SECTION_RE.match(line)
+        if m:
+            current = SECTION_ALIASES.get(m.group(1).strip().lower())
+            line = m.group(2)
+        elif not line.strip():
+            continue
+        if current and line.strip():
+            sections.setdefault(current, []).append(line.strip())
+    return sections
+
+
+def extract_fields(raw_text: str) -> ExtractedFields:
+    sections = _sections(raw_text)
+    email = EMAIL_RE.search(raw_text)
+    skills = skill_gazetteer().find(normalize(raw_text))
+
+    research: List[str] = []
+    for line in sections.get("research", []):
+        research.extend(_split_items(line))
+
+    teaching: List[str] = list(sections.get("teaching", []))
+    for line in sections.get("experience", []):
+        for clause in re.split(r"[;.]", line):
+            clause = clause.strip()
+            if clause and any(cue in clause.lower() for cue in TEACHING_CUES):
+                teaching.append(clause)
+
+    return ExtractedFields(
+        email=email.group(0).lower() if email else None,
+        skills=tuple(skills),
+        research_areas=tuple(dict.fromkeys(research)),
+        teaching_experience=tuple(dict.fromkeys(teaching)),
+        publications=tuple(sections.get("publications", [])),
+    )
+
+
+def candidate_from_text(candidate_id: str, name: str, raw_text: str) -> Candidate:
+    resume_text = normalize(raw_text)
+    fields = extract_fields(raw_text)
+    return Candidate(
+        id=candidate_id,
+        name=name,
+        email=fields.email,
+        resume_text=resume_text,
+        skills=list(fields.skills),
+        research_areas=list(fields.research_areas),
+        teaching_experience=list(fields.teaching_experience),
+        publications=list(fields.publications),
+        metadata={"extraction": EXTRACTION_VERSION, "sha1": text_fingerprint(resume_text)},
+    )
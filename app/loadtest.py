@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .agents.screening import ScreeningAgent
+from .cache import RankingCache, text_fingerprint
+from .config import CONFIG
+from .data_models import Candidate
+from .dedup import deduplicate
+from .parsing import load_corpus
+from .role_classifier import classify_role, skill_vocabulary
+from .roles import role_from_dict, role_registry
+from .scoring import role_phrases
+
+# "role" is classifying a typed title or looking up a catalog role; "rank" is the click's answer
+# within the anytime deadline and "exact" the time until its refinement finishes
+STAGES = ("role", "load", "rank", "exact")
+# Titles a committee might type into the role box; each maps onto a classifier profile
+TITLES = [
+    "Assistant Professor of Computer Science",
+    "Lecturer in Data Science",
+    "Research Fellow in NLP",
+    "Associate Professor of Physics",
+    "Data Scientist",
+    "Professor of Mathematics",
+]
+_FIRST = ["Alex", "Sam", "Priya", "Wei", "Maria", "Omar", "Lena", "Jon", "Aiko", "Tariq", "Zoe", "Ivan"]
+_LAST = ["Kumar", "Chen", "Garcia", "Smith", "Okafor", "Novak", "Haddad", "Silva", "Ito", "Brown", "Rossi", "Ahmed"]
+
+
+def synthetic_corpus(data_dir: Path, size: int, seed: int = 0, phrases: Sequence[str] = ()) -> Path:
+    # Writes `size` resumes as one JSONL export in data_dir/candidates (streamed by the bulk
+    # loader) built from the classifier's own skill vocabulary plus `phrases` (catalog role
+    # wording the vocabulary lacks), so every role finds real matches
+    candidate_dir = data_dir / "candidates"
+    vocabulary = skill_vocabulary()
+    extra = sorted(set(phrases) - set(vocabulary))
+    suffix = f"-{text_fingerprint(chr(10).join(extra))[:8]}" if extra else ""
+    path = candidate_dir / f"synthetic-{size}-{seed}{suffix}.jsonl"
+    if path.exists():
+        return candidate_dir
+    candidate_dir.mkdir(parents=True, exist_ok=True)
+    # The folder is loaded as a whole, so exports for other sizes/seeds/phrases would join the pool
+    for old in candidate_dir.glob("synthetic-*.jsonl"):
+        old.unlink()
+    rng = random.Random(seed)
+    vocabulary = vocabulary + extra
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for i in range(size):
+            name = f"{rng.choice(_FIRST)} {rng.choice(_LAST)}"
+            skills = rng.sample(vocabulary, rng.randint(3, 12))
+            research = rng.sample(vocabulary, 3)
+            text = "\n".join(
+                [
+                    name,
+                    f"Email: user{i}@example.edu",
+                    f"Experience: {rng.randint(1, 25)} years; taught {', '.join(rng.sample(vocabulary, 2))}.",
+                    f"Research: {', '.join(research)}.",
+                    f"Skills: {', '.join(skills)}",
+                    f"Publications: {rng.randint(0, 60)} peer-reviewed papers.",
+                ]
+            )
+            f.write(json.dumps({"id": f"syn{seed}-{i:07d}", "name": name, "email": f"user{i}@example.edu", "resume_text": text}) + "\n")
+    tmp.replace(path)
+    return candidate_dir
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _RssSampler:
+    # Peak resident memory while the sessions run, sampled from a side thread
+    def __init__(self, interval: float = 0.02) -> None:
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self) -> "_RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    arr = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(arr.max()), 3),
+    }
+
+
+@dataclass
+class LoadReport:
+    sessions: int
+    iterations: int
+    corpus: int
+    requests: int
+    errors: int
+    duration_s: float
+    throughput_rps: float
+    # Stage -> count/mean/p50/p95/p99/max in ms; "request" is one full click
+    latency: Dict[str, Dict[str, float]]
+    rss_baseline_mb: float
+    rss_peak_mb: float
+    mem_per_session_mb: float
+    # Pickled size of what one session keeps in st.session_state (compact match rows)
+    session_state_kb: float
+    settings: Dict[str, object] = field(default_factory=dict)
+    error_samples: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _load_candidates(candidate_dir: Path) -> List[Candidate]:
+    # Same steps as the dashboard's parse_candidate_files
+    candidates = load_corpus(candidate_dir)
+    if CONFIG.dedupe_threshold:
+        candidates, _ = deduplicate(candidates, threshold=CONFIG.dedupe_threshold)
+    return candidates
+
+
+def run_load(
+    data_dir: Path,
+    sessions: int = 50,
+    iterations: int = 3,
+    corpus: int = 5000,
+    think_s: float = 0.0,
+    shared_cache: bool = True,
+    seed: int = 0,
+    roles_dir: Optional[Path] = None,
+) -> LoadReport:
+    # Each simulated session repeats the dashboard's "Compute Fit & Generate Report" click:
+    # classify a typed title or pick a catalog role from roles_dir (default CONFIG.roles_dir),
+    # load the candidate pool, and rank it with rank_anytime as the dashboard does, waiting for
+    # the refinement before the next click. Sessions are threads, as in a Streamlit server, and
+    # share one ranking cache unless shared_cache is off.
+    registry = role_registry(roles_dir)
+    catalog = registry.roles()
+    picks: List[Tuple[str, str]] = [("title", t) for t in TITLES] + [("role", r.id) for r in catalog]
+    phrases = [p for r in catalog for p in role_phrases(r)]
+    candidate_dir = synthetic_corpus(data_dir, corpus, seed=seed, phrases=phrases)
+    _load_candidates(candidate_dir)  # ingest/extraction happens once, before the clock starts
+    cache = RankingCache(capacity=CONFIG.cache_size) if shared_cache else None
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES + ("request",)}
+    errors: List[str] = []
+    state_sizes: List[int] = []
+    lock = threading.Lock()
+
+    def session(s: int) -> None:
+        rng = random.Random(seed * 1000 + s)
+        for _ in range(iterations):
+            started = time.perf_counter()
+            try:
+                t0 = time.perf_counter()
+                kind, name = rng.choice(picks)
+                role = role_from_dict(classify_role(name)) if kind == "title" else registry.get(name).role
+                t1 = time.perf_counter()
+                candidates = _load_candidates(candidate_dir)
+                t2 = time.perf_counter()
+                ranking = ScreeningAgent(cache=cache).rank_anytime(
+                    candidates,
+                    role,
+                    deadline_s=CONFIG.anytime_deadline_ms / 1000.0,
+                    block_size=CONFIG.anytime_block_size,
+                )
+                t3 = time.perf_counter()
+                matches = ranking.wait().results
+                t4 = time.perf_counter()
+                if ranking.error is not None:
+                    raise ranking.error
+                state = pickle.dumps([m.to_compact() for m in matches])
+            except Exception as exc:  # counted and sampled, the run carries on
+                with lock:
+                    errors.append(f"{type(exc).__name__}: {exc}")
+                continue
+            with lock:
+                timings["role"].append(t1 - t0)
+                timings["load"].append(t2 - t1)
+                timings["rank"].append(t3 - t2)
+                timings["exact"].append(t4 - t2)
+                timings["request"].append(t3 - started)
+                state_sizes.append(len(state))
+            if think_s:
+                time.sleep(rng.uniform(0.5, 1.5) * think_s)
+
+    baseline = _rss_bytes()
+    started = time.perf_counter()
+    with _RssSampler() as sampler, ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    duration = time.perf_counter() - started
+    done = len(timings["request"])
+    return LoadReport(
+        sessions=sessions,
+        iterations=iterations,
+        corpus=corpus,
+        requests=done,
+        errors=len(errors),
+        duration_s=round(duration, 3),
+        throughput_rps=round(done / duration, 3) if duration else 0.0,
+        latency={stage: _percentiles(samples) for stage, samples in timings.items()},
+        rss_baseline_mb=round(baseline / 2**20, 2),
+        rss_peak_mb=round(sampler.peak / 2**20, 2),
+        mem_per_session_mb=round(max(sampler.peak - baseline, 0) / 2**20 / sessions, 3),
+        session_state_kb=round(float(np.mean(state_sizes)) / 1024, 2) if state_sizes else 0.0,
+        settings={
+            "think_s": think_s,
+            "shared_cache": shared_cache,
+            "seed": seed,
+            "cpus": os.cpu_count(),
+            "share_index": CONFIG.share_index,
+            "index_precision": CONFIG.index_precision,
+            "dedupe_threshold": CONFIG.dedupe_threshold,
+            "anytime_deadline_ms": CONFIG.anytime_deadline_ms,
+            "anytime_block_size": CONFIG.anytime_block_size,
+            "catalog_roles": len(catalog),
+        },
+        error_samples=errors[:5],
+    )
+
+
+def compare_reports(report: Dict, baseline: Dict, tolerance: float = 0.2) -> List[str]:
+    # Regressions beyond `tolerance` (fractional) against an earlier report; empty when none
+    problems: List[str] = []
+    for stage in ("request",) + STAGES:
+        now = report["latency"].get(stage, {}).get("p95_ms")
+        before = baseline["latency"].get(stage, {}).get("p95_ms")
+        if now is not None and before and now > before * (1 + tolerance):
+            problems.append(f"{stage} p95 {now:.1f} ms vs {before:.1f} ms")
+    if baseline["throughput_rps"] and report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        problems.append(f"throughput {report['throughput_rps']} req/s vs {baseline['throughput_rps']} req/s")
+    if baseline["mem_per_session_mb"] and report["mem_per_session_mb"] > baseline["mem_per_session_mb"] * (1 + tolerance):
+        problems.append(f"memory/session {report['mem_per_session_mb']} MB vs {baseline['mem_per_session_mb']} MB")
+    if report["errors"] > baseline["errors"]:
+        problems.append(f"errors {report['errors']} vs {baseline['errors']}")
+    return problems
+
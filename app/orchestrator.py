@@ -1,35 +1,224 @@
 from __future__ import annotations
 
+import time
+from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from .agents.development import DevelopmentAgent
 from .agents.interview import InterviewAgent
 from .agents.screening import ScreeningAgent
 from .agents.sourcing import SourcingAgent
 from .agents.onboarding import OnboardingAgent
-from .config import CONFIG
-from .data_models import Candidate, DevelopmentPlan, MatchResult, Role, role_from_yaml
+from .cache import RankingCache, config_fingerprint, corpus_version, role_fingerprint
+from .checkpoints import RunCheckpoints, corpus_inputs
+from .config import CONFIG, CascadeConfig
+from .data_models import Candidate, MatchResult, Role
+from .embeddings import index_settings
+from .extraction import EXTRACTION_VERSION
 from .reports.generator import generate_reports
+from .reports.store import ReportStore
+from .roles import role_registry
+from .scoring import INVITE_MIN_SCORE
+from .service import ServiceClient
 
 
 class Orchestrator:
-    def __init__(self) -> None:
-        self.sourcing = SourcingAgent()
-        self.screening = ScreeningAgent()
+    def __init__(
+        self,
+        service_url: Optional[str] = None,
+        cascade: Optional[CascadeConfig] = None,
+        cache: Optional[RankingCache] = None,
+        dedupe_threshold: Optional[float] = CONFIG.dedupe_threshold,
+    ) -> None:
+        self.cascade = cascade or (CONFIG.cascade if CONFIG.cascade.enabled else None)
+        self.sourcing = SourcingAgent(dedupe_threshold=dedupe_threshold)
+        self.cache = cache or RankingCache(capacity=CONFIG.cache_size, disk_dir=CONFIG.cache_dir)
+        local = ScreeningAgent(cache=self.cache)
+        self.screening = ServiceClient(service_url, fallback=local) if service_url else local
         self.interview = InterviewAgent()
         self.onboarding = OnboardingAgent()
         self.development = DevelopmentAgent()
+        # Per-stage fingerprint, resumed flag and wall time of the last run()
+        self.stages: Dict[str, Dict] = {}
 
-    def run(self, role_file: Path, data_dir: Path, out_dir: Path) -> Path:
-        role = role_from_yaml(role_file)
-        candidates = self.sourcing.run(candidate_dir=data_dir / "candidates")
-        matches = self.screening.rank_candidates(candidates, role)
-        development_plans: Dict[str, DevelopmentPlan] = {
-            c.id: self.development.recommend(c) for c in candidates
+    def _screening_settings(self) -> Dict:
+        # Everything besides the corpus and role that changes what the matches stage returns
+        return {
+            "service": getattr(self.screening, "base_url", None),
+            "cascade": asdict(self.cascade) if self.cascade is not None else None,
+            "extraction": EXTRACTION_VERSION,
+            "invite_min_score": INVITE_MIN_SCORE,
+            "out_of_core": [CONFIG.out_of_core_rows, CONFIG.out_of_core_top_k, CONFIG.out_of_core_fit_rows],
         }
-        generate_reports(out_dir, role, candidates, matches, development_plans)
-        return out_dir / "report.json"
+
+    def _stage(
+        self,
+        name: str,
+        fingerprint: str,
+        checkpoints: Optional[RunCheckpoints],
+        resume: bool,
+        load: Callable[[RunCheckpoints], Any],
+        compute: Callable[[], Any],
+        save: Callable[[RunCheckpoints, Any], None],
+    ) -> Any:
+        started = time.perf_counter()
+        value = load(checkpoints) if checkpoints is not None and resume else None
+        resumed = value is not None
+        if value is None:
+            value = compute()
+            if checkpoints is not None:
+                save(checkpoints, value)
+        self.stages[name] = {
+            "fingerprint": fingerprint,
+            "resumed": resumed,
+            "ms": round((time.perf_counter() - started) * 1000.0, 3),
+        }
+        return value
+
+    def run(self, role_file: Path, data_dir: Path, out_dir: Path, resume: bool = False) -> Path:
+        # Stages: corpus -> index -> matches -> plans -> report. With checkpoints on, each stage's
+        # output is saved under its input fingerprint as it finishes; with resume, a stage whose
+        # fingerprint already has a checkpoint is loaded instead of recomputed, so a run that died
+        # in a late stage restarts at that stage.
+        checkpoints = RunCheckpoints(out_dir / ".checkpoints") if CONFIG.run_checkpoints or resume else None
+        if checkpoints is None:
+            return self._run(role_file, data_dir, out_dir, resume, None)
+        # Registered while it runs, so a concurrent run's prune keeps the checkpoints it uses
+        checkpoints.begin()
+        try:
+            return self._run(role_file, data_dir, out_dir, resume, checkpoints)
+        finally:
+            checkpoints.end()
+
+    def _run(
+        self,
+        role_file: Path,
+        data_dir: Path,
+        out_dir: Path,
+        resume: bool,
+        checkpoints: Optional[RunCheckpoints],
+    ) -> Path:
+        role = role_registry(data_dir / "roles").resolve(str(role_file)).role
+        self.stages = {}
+        candidate_dir = data_dir / "candidates"
+
+        # With a service, its duplicate folding is reused rather than recomputed locally
+        known = self.screening.duplicates() if isinstance(self.screening, ServiceClient) else None
+
+        def parse() -> Tuple:
+            parsed = self.sourcing.run(candidate_dir=candidate_dir, duplicates=known)
+            return parsed, self.sourcing.duplicates, self.sourcing.skills
+
+        corpus_fp = corpus_inputs(candidate_dir, known if known is not None else self.sourcing.dedupe_threshold)
+        candidates, duplicates, skills = self._stage(
+            "corpus",
+            corpus_fp,
+            checkpoints,
+            resume,
+            lambda cp: cp.load_corpus(corpus_fp),
+            parse,
+            lambda cp, value: cp.save_corpus(corpus_fp, *value),
+        )
+        self.sourcing.duplicates, self.sourcing.skills = duplicates, skills
+        ids = [c.id for c in candidates]
+        version = corpus_version(candidates)
+        role_fp = role_fingerprint(role)
+        index_fp = config_fingerprint(corpus=version, index=index_settings())
+        matches_fp = config_fingerprint(index=index_fp, role=role_fp, screening=self._screening_settings())
+        plans_fp = config_fingerprint(corpus=version, role=role_fp, extraction=EXTRACTION_VERSION)
+
+        # The fitted index is its own stage only where ranking would fit one in memory: shared
+        # segments and out-of-core blocks are already on disk
+        agent = self.screening if isinstance(self.screening, ScreeningAgent) else None
+        index_stage = (
+            agent is not None
+            and bool(candidates)
+            and not agent.share_index
+            and not (agent.out_of_core_rows is not None and len(candidates) > agent.out_of_core_rows)
+        )
+        # Not even loaded when the matches it feeds are already checkpointed
+        matches_ready = checkpoints is not None and resume and checkpoints.meta("matches", matches_fp) is not None
+        if index_stage and not matches_ready:
+            index = self._stage(
+                "index",
+                index_fp,
+                checkpoints,
+                resume,
+                lambda cp: cp.load_index(index_fp, ids),
+                lambda: agent.index_for(candidates, version),
+                lambda cp, value: cp.save_index(index_fp, value),
+            )
+            agent.seed_index(candidates, index)
+
+        def rank() -> Tuple[List[MatchResult], Dict]:
+            metrics: Dict = {}
+            if self.cascade is not None and agent is not None:
+                matches, cascade_report = agent.rank_cascade(candidates, role, self.cascade, skills=skills)
+                metrics["cascade"] = cascade_report.to_dict()
+            else:
+                matches = self.screening.rank_candidates(candidates, role, skills=skills)
+            return matches, metrics
+
+        matches, metrics = self._stage(
+            "matches",
+            matches_fp,
+            checkpoints,
+            resume,
+            lambda cp: cp.load_matches(matches_fp, ids, role),
+            rank,
+            lambda cp, value: cp.save_matches(matches_fp, value[0], ids, role, value[1]),
+        )
+        metrics = dict(metrics)
+        if agent is not None:
+            metrics["cache"] = self.cache.stats()
+        cohort = self._stage(
+            "plans",
+            plans_fp,
+            checkpoints,
+            resume,
+            lambda cp: cp.load_plans(plans_fp, ids),
+            lambda: self.development.plan_cohort(candidates, [role], skills=skills),
+            lambda cp, value: cp.save_plans(plans_fp, value, ids),
+        )
+
+        store_dir = out_dir / "reports" / role.id
+        store = ReportStore(store_dir, compact_every=CONFIG.report_compact_every)
+        report_fp = config_fingerprint(corpus=corpus_fp, matches=matches_fp, plans=plans_fp)
+
+        def load_report(cp: RunCheckpoints) -> Optional[Dict]:
+            # Skipped only while the run it wrote is still the store's latest
+            meta = cp.meta("report", report_fp)
+            return meta if meta is not None and meta["run"] == store.last_run else None
+
+        self._stage(
+            "report",
+            report_fp,
+            checkpoints,
+            resume,
+            load_report,
+            lambda: generate_reports(
+                store_dir,
+                role,
+                candidates,
+                matches,
+                cohort.plans,
+                metrics=metrics,
+                duplicates=duplicates,
+                skill_gaps=cohort.gap_stats,
+                store=store,
+            ),
+            lambda cp, info: cp.save_report(report_fp, info),
+        )
+        if CONFIG.report_export:
+            store.export(out_dir / "report.json")
+        if checkpoints is not None:
+            kept = {name: stage["fingerprint"] for name, stage in self.stages.items()}
+            if index_stage:
+                kept["index"] = index_fp
+            checkpoints.mark(role.id, kept)
+            checkpoints.prune()
+        return store_dir
 
     def interview_questions(self, role: Role) -> List[str]:
         return self.interview.generate_questions(role)
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from dataclasses import asdict
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
+from .bulk import BULK_EXTS, DEFAULT_FIELD_MAP, iter_bulk_candidates
+from .config import CONFIG
 from .data_models import Candidate
-from .utils.io import list_files, read_text_file
-from .utils.text import normalize
+from .extraction import EXTRACTION_VERSION, candidate_from_text
+from .text_store import TextStore
+from .utils.io import FileStats, list_files, load_json, read_text_file, save_json, scan_files
+
+CANDIDATE_EXTS = {".txt", ".pdf", ".json"} | BULK_EXTS
 
 
 def extract_text_from_pdf(path: Path) -> str:
@@ -18,26 +25,184 @@ def extract_text_from_pdf(path: Path) -> str:
         return ""
 
 
-def parse_candidate_folder(folder: Path) -> List[Candidate]:
-    files = list_files(folder, exts={".txt", ".pdf", ".json"})
+def parse_candidate_file(f: Path) -> Optional[Candidate]:
+    if f.suffix.lower() == ".pdf":
+        text = extract_text_from_pdf(f)
+    else:
+        text = read_text_file(f)
+    if not text:
+        return None
+    base = f.stem
+    name = base.replace("_", " ")
+    return candidate_from_text(base, name.title(), text)
+
+
+def parse_candidate_folder(folder: Path, field_map: Optional[Dict[str, str]] = None) -> List[Candidate]:
+    files = list_files(folder, exts=CANDIDATE_EXTS)
+    fields = CONFIG.bulk_field_map if field_map is None else field_map
     candidates: List[Candidate] = []
     for f in files:
-        if f.suffix.lower() == ".pdf":
-            text = extract_text_from_pdf(f)
-        else:
-            text = read_text_file(f)
-        if not text:
+        if f.suffix.lower() in BULK_EXTS:
+            for chunk in iter_bulk_candidates(f, field_map=fields, chunk_size=CONFIG.bulk_chunk_size):
+                candidates.extend(chunk.candidates)
             continue
-        base = f.stem
-        name = base.replace("_", " ")
-        resume_text = normalize(text)
-        candidates.append(
-            Candidate(
-                id=base,
-                name=name.title(),
-                email=None,
-                resume_text=resume_text,
-            )
-        )
+        c = parse_candidate_file(f)
+        if c is not None:
+            candidates.append(c)
+    return candidates
+
+
+def _record(c: Candidate, ref: int, size: int, mtime_ns: int) -> Dict:
+    return {
+        "id": c.id,
+        "name": c.name,
+        "email": c.email,
+        "skills": c.skills,
+        "research_areas": c.research_areas,
+        "teaching_experience": c.teaching_experience,
+        "publications": c.publications,
+        "metadata": c.metadata,
+        "ref": ref,
+        "size": size,
+        "mtime_ns": mtime_ns,
+    }
+
+
+def _from_record(rec: Dict, store: TextStore) -> Candidate:
+    return Candidate(
+        id=rec["id"],
+        name=rec["name"],
+        email=rec["email"],
+        skills=rec["skills"],
+        research_areas=rec["research_areas"],
+        teaching_experience=rec["teaching_experience"],
+        publications=rec["publications"],
+        metadata=rec["metadata"],
+        store=store,
+        ref=rec["ref"],
+    )
+
+
+def corpus_store_dir(folder: Path, corpus_dir: Optional[Path] = None) -> Path:
+    key = hashlib.sha1(str(folder.resolve()).encode("utf-8")).hexdigest()[:12]
+    return (corpus_dir or CONFIG.corpus_dir) / key
+
+
+def _load_bulk(
+    f: Path,
+    size: int,
+    mtime_ns: int,
+    root: Path,
+    store: TextStore,
+    field_map: Dict[str, str],
+    chunk_size: int,
+    workers: int,
+) -> List[Candidate]:
+    # Rows of a CSV/JSONL export go through a per-file JSONL sidecar: a header with the source
+    # size/mtime and the effective column mapping, candidate records, and an {"offset": n} marker
+    # after each chunk. An interrupted ingest resumes from the last marker; a finished one ends
+    # with {"complete": true}. A header that differs (file or mapping changed) means reconvert.
+    sidecar = root / f"bulk-{hashlib.sha1(str(f).encode('utf-8')).hexdigest()[:12]}.jsonl"
+    header = {"source": str(f), "size": size, "mtime_ns": mtime_ns, "fields": {**DEFAULT_FIELD_MAP, **field_map}}
+    candidates: List[Candidate] = []
+    offset = 0
+    keep_bytes = 0
+    if sidecar.exists():
+        with sidecar.open("rb") as fh:
+            first = fh.readline()
+            if first and json.loads(first) == header:
+                keep_bytes = fh.tell()
+                chunk: List[Candidate] = []
+                for line in iter(fh.readline, b""):
+                    entry = json.loads(line)
+                    if "ref" in entry:
+                        chunk.append(_from_record(entry, store))
+                    elif "offset" in entry:
+                        candidates.extend(chunk)
+                        chunk = []
+                        offset = entry["offset"]
+                        keep_bytes = fh.tell()
+                    elif entry.get("complete"):
+                        return candidates
+    with sidecar.open("r+b" if keep_bytes else "wb") as fh:
+        # Drop records written after the last completed chunk before appending again
+        fh.truncate(keep_bytes)
+        fh.seek(keep_bytes)
+        if not keep_bytes:
+            fh.write((json.dumps(header) + "\n").encode("utf-8"))
+        for chunk in iter_bulk_candidates(
+            f,
+            field_map=field_map,
+            chunk_size=chunk_size,
+            start_offset=offset,
+            workers=workers,
+        ):
+            refs = store.extend(c.resume_text for c in chunk.candidates)
+            lines = []
+            for ref, c in zip(refs, chunk.candidates):
+                rec = _record(c, ref, 0, 0)
+                lines.append(json.dumps(rec))
+                candidates.append(_from_record(rec, store))
+            lines.append(json.dumps({"offset": chunk.offset}))
+            fh.write(("\n".join(lines) + "\n").encode("utf-8"))
+            fh.flush()
+        fh.write((json.dumps({"complete": True}) + "\n").encode("utf-8"))
     return candidates
 
+
+def load_corpus(
+    folder: Path,
+    corpus_dir: Optional[Path] = None,
+    field_map: Optional[Dict[str, str]] = None,
+    chunk_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    files: Optional[FileStats] = None,
+) -> List[Candidate]:
+    # Same candidates as parse_candidate_folder, but resume text lives in a memory-mapped store:
+    # unchanged files (by size and mtime) are mapped from the previous run instead of reparsed,
+    # and changed or new files are appended to the store. The bulk options default to CONFIG;
+    # `files` is a scan of the folder the caller already made (e.g. scan_changes(...).files).
+    bulk = (
+        CONFIG.bulk_field_map if field_map is None else field_map,
+        chunk_size or CONFIG.bulk_chunk_size,
+        workers or CONFIG.bulk_workers,
+    )
+    root = corpus_store_dir(folder, corpus_dir)
+    store = TextStore(root)
+    meta_path = root / "meta.json"
+    previous: Dict[str, Dict] = {}
+    if meta_path.exists():
+        meta = load_json(meta_path)
+        if meta.get("extraction") == EXTRACTION_VERSION:
+            previous = meta.get("records", {})
+
+    records: Dict[str, Dict] = {}
+    slots: List[List[Candidate]] = []
+    pending: List[Tuple[str, int, Candidate, int, int]] = []
+    for key, (size, mtime_ns) in (scan_files(folder, CANDIDATE_EXTS) if files is None else files).items():
+        f = Path(key)
+        if f.suffix.lower() in BULK_EXTS:
+            records[key] = {"bulk": True, "size": size, "mtime_ns": mtime_ns}
+            slots.append(_load_bulk(f, size, mtime_ns, root, store, *bulk))
+            continue
+        rec = previous.get(key)
+        if rec is not None and rec["size"] == size and rec["mtime_ns"] == mtime_ns:
+            records[key] = rec
+            slots.append([_from_record(rec, store)] if rec["ref"] is not None else [])
+            continue
+        c = parse_candidate_file(f)
+        if c is None:
+            records[key] = {"ref": None, "size": size, "mtime_ns": mtime_ns}
+        else:
+            pending.append((key, len(slots), c, size, mtime_ns))
+        slots.append([])
+
+    if pending:
+        refs = store.extend(c.resume_text for _, _, c, _, _ in pending)
+        for ref, (key, pos, c, size, mtime_ns) in zip(refs, pending):
+            rec = _record(c, ref, size, mtime_ns)
+            records[key] = rec
+            slots[pos] = [_from_record(rec, store)]
+    if pending or records != previous:
+        save_json(meta_path, {"extraction": EXTRACTION_VERSION, "records": records})
+    return [c for group in slots for c in group]
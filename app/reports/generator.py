@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 
+from ..config import CONFIG
 from ..data_models import Candidate, DevelopmentPlan, MatchResult, Role
-from ..utils.io import save_json
+from .store import ReportStore
 
 
 def candidate_summary(candidate: Candidate) -> Dict:
@@ -20,19 +21,73 @@ def candidate_summary(candidate: Candidate) -> Dict:
     }
 
 
-def generate_reports(
-    out_dir: Path,
+def report_payload(
     role: Role,
     candidates: List[Candidate],
     matches: List[MatchResult],
     development_plans: Dict[str, DevelopmentPlan],
-) -> None:
-    out_dir.mkdir(parents=True, exist_ok=True)
+    metrics: Optional[Dict] = None,
+    duplicates: Optional[Dict[str, List[str]]] = None,
+    skill_gaps: Optional[Dict[str, Dict]] = None,
+) -> Dict:
     payload = {
         "role": asdict(role),
         "candidates": [candidate_summary(c) for c in candidates],
-        "matches": [asdict(m) for m in matches],
+        "matches": [m.to_dict() for m in matches],
         "development_plans": {cid: asdict(plan) for cid, plan in development_plans.items()},
     }
-    save_json(out_dir / "report.json", payload)
+    if duplicates:
+        payload["duplicates"] = duplicates
+    if skill_gaps:
+        payload["skill_gaps"] = skill_gaps
+    if metrics:
+        payload["metrics"] = metrics
+    return payload
+
+
+def generate_reports(
+    out_dir: Path,
+    role: Role,
+    candidates: List[Candidate],
+    matches: List[MatchResult],
+    development_plans: Dict[str, DevelopmentPlan],
+    metrics: Optional[Dict] = None,
+    duplicates: Optional[Dict[str, List[str]]] = None,
+    skill_gaps: Optional[Dict[str, Dict]] = None,
+    store: Optional[ReportStore] = None,
+) -> Dict:
+    # Appends a run to the role's report store in out_dir; only records that changed are written
+    store = store or ReportStore(out_dir, compact_every=CONFIG.report_compact_every)
+    payload = report_payload(role, candidates, matches, development_plans, metrics, duplicates, skill_gaps)
+    return store.write(payload)
+
 
+def patch_report(
+    out_dir: Path,
+    candidates: List[Candidate],
+    matches: List[MatchResult],
+    development_plans: Dict[str, DevelopmentPlan],
+    removed: Iterable[str] = (),
+    skill_gaps: Optional[Dict[str, Dict]] = None,
+    store: Optional[ReportStore] = None,
+) -> Dict:
+    # Appends a partial run: entries for `removed` ids are deleted and the freshly scored
+    # `candidates` are upserted; the rest of the report is neither read back nor rewritten.
+    store = store or ReportStore(out_dir, compact_every=CONFIG.report_compact_every)
+    rescored = {c.id for c in candidates}
+    gone = [cid for cid in removed if cid not in rescored]
+    upserts: Dict[str, Dict] = {
+        "candidates": {c.id: candidate_summary(c) for c in candidates},
+        "matches": {m.candidate_id: m.to_dict() for m in matches},
+        "development_plans": {cid: asdict(plan) for cid, plan in development_plans.items()},
+    }
+    if skill_gaps is not None:
+        upserts["skill_gaps"] = skill_gaps
+    # Rescored candidates that dropped out of the matches or plans must not keep their old entries
+    removals = {
+        "candidates": gone,
+        "matches": gone + [cid for cid in rescored if cid not in upserts["matches"]],
+        "development_plans": gone + [cid for cid in rescored if cid not in upserts["development_plans"]],
+        "duplicates": gone + sorted(rescored),
+    }
+    return store.patch(upserts, removals)
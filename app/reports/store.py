@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..config import CONFIG
+from ..utils.io import file_lock, load_json, save_json
+
+# Payload sections stored as one record per entry, and the field that keys list entries
+KEYED_LISTS = {"candidates": "id", "matches": "candidate_id"}
+KEYED_DICTS = ("development_plans", "duplicates", "skill_gaps")
+# Any other payload section (role, metrics, ...) is a single record keyed "_"
+SINGLE_KEY = "_"
+# Sections every report carries even when empty; the others are omitted once all entries are gone
+CORE_SECTIONS = ("candidates", "matches", "development_plans")
+
+State = Dict[str, Dict[str, Any]]
+
+
+def _records(payload: Dict) -> State:
+    state: State = {}
+    for kind, value in payload.items():
+        if kind in KEYED_LISTS:
+            field = KEYED_LISTS[kind]
+            state[kind] = {str(item[field]): item for item in value}
+        elif kind in KEYED_DICTS:
+            state[kind] = {str(k): v for k, v in value.items()}
+        else:
+            state[kind] = {SINGLE_KEY: value}
+    return state
+
+
+def _payload(state: State) -> Dict:
+    payload: Dict = {}
+    state = {**{kind: {} for kind in CORE_SECTIONS}, **state}
+    for kind, entries in state.items():
+        if not entries and kind not in CORE_SECTIONS:
+            continue
+        if kind in KEYED_LISTS:
+            items = list(entries.values())
+            if kind == "matches":
+                items.sort(key=lambda m: -m.get("fit_score", 0.0))
+            payload[kind] = items
+        elif kind in KEYED_DICTS:
+            payload[kind] = dict(entries)
+        elif SINGLE_KEY in entries:
+            payload[kind] = entries[SINGLE_KEY]
+    return payload
+
+
+class ReportStore:
+    # Append-only report history for one role. Every run writes a segment holding only the records
+    # that changed since the previous run (upserts and deletions); every `compact_every` runs the
+    # full state is written as a checkpoint, so any run is materialised from the nearest checkpoint
+    # plus at most that many small segments. manifest.json indexes runs, segments and checkpoints.
+    # Compaction drops history older than keep_runs runs. Writers in other processes are serialised
+    # by a lock file, and each write starts from the manifest on disk.
+    def __init__(
+        self,
+        root: Path,
+        compact_every: int = CONFIG.report_compact_every,
+        keep_runs: Optional[int] = CONFIG.report_keep_runs,
+    ) -> None:
+        self.root = root
+        self.compact_every = compact_every
+        self.keep_runs = keep_runs
+        self.manifest_path = root / "manifest.json"
+        self._lock = threading.Lock()
+        self._latest: Optional[Tuple[int, State]] = None
+        self._reload()
+
+    def _reload(self) -> None:
+        # Picks up runs other processes appended; the cached latest state is dropped if it moved
+        if self.manifest_path.exists():
+            self.manifest = load_json(self.manifest_path)
+        else:
+            self.manifest = {"runs": [], "checkpoints": []}
+        if self._latest is not None and self._latest[0] != self.last_run:
+            self._latest = None
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        with self._lock, file_lock(self.root / ".lock"):
+            self._reload()
+            yield
+
+    @property
+    def last_run(self) -> int:
+        return self.manifest["runs"][-1]["run"] if self.manifest["runs"] else 0
+
+    def runs(self) -> List[Dict]:
+        return list(self.manifest["runs"])
+
+    def _segment_path(self, run: int) -> Path:
+        return self.root / "runs" / f"{run:06d}.jsonl"
+
+    def _checkpoint_path(self, run: int) -> Path:
+        return self.root / "checkpoints" / f"{run:06d}.jsonl"
+
+    @staticmethod
+    def _write_lines(path: Path, lines: Iterable[Dict]) -> int:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(path)
+        return path.stat().st_size
+
+    def _save_manifest(self) -> None:
+        # Replaced atomically after the segment is on disk, so a crash never indexes a partial run
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=2), encoding="utf-8")
+        tmp.replace(self.manifest_path)
+
+    @staticmethod
+    def _apply(state: State, path: Path) -> None:
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                entries = state.setdefault(rec["k"], {})
+                if rec.get("del"):
+                    entries.pop(rec["id"], None)
+                else:
+                    entries[rec["id"]] = rec["v"]
+
+    def state(self, run: Optional[int] = None) -> State:
+        run = self.last_run if run is None else run
+        if self._latest is not None and self._latest[0] == run:
+            return {kind: dict(entries) for kind, entries in self._latest[1].items()}
+        if run and not any(r["run"] == run for r in self.manifest["runs"]):
+            raise KeyError(f"run {run} is not in the store")
+        base = max((c for c in self.manifest["checkpoints"] if c <= run), default=0)
+        state: State = {}
+        if base:
+            self._apply(state, self._checkpoint_path(base))
+        for r in self.manifest["runs"]:
+            if base < r["run"] <= run:
+                self._apply(state, self._segment_path(r["run"]))
+        return state
+
+    def latest(self) -> Dict:
+        return _payload(self._current())
+
+    def report(self, run: int) -> Dict:
+        return _payload(self.state(run))
+
+    def export(self, path: Path, run: Optional[int] = None) -> None:
+        # Materialises one run as a standalone report.json-style file
+        save_json(path, self.report(self.last_run if run is None else run))
+
+    def _current(self) -> State:
+        if self._latest is None or self._latest[0] != self.last_run:
+            self._latest = (self.last_run, self.state(self.last_run))
+        return self._latest[1]
+
+    def diff(self, run_a: int, run_b: int) -> Dict:
+        # Entries added, updated and removed going from run A to run B (either direction)
+        a, b = self.state(run_a), self.state(run_b)
+        added: Dict[str, Dict[str, Any]] = {}
+        updated: Dict[str, Dict[str, Any]] = {}
+        removed: Dict[str, List[str]] = {}
+        for kind in set(a) | set(b):
+            before, after = a.get(kind, {}), b.get(kind, {})
+            new = {k: v for k, v in after.items() if k not in before}
+            changed = {k: v for k, v in after.items() if k in before and before[k] != v}
+            gone = [k for k in before if k not in after]
+            if new:
+                added[kind] = new
+            if changed:
+                updated[kind] = changed
+            if gone:
+                removed[kind] = gone
+        return {"from": run_a, "to": run_b, "added": added, "updated": updated, "removed": removed}
+
+    def _append(self, lines: List[Dict], state: State, note: Optional[Dict]) -> Dict:
+        run = self.last_run + 1
+        size = self._write_lines(self._segment_path(run), lines)
+        info = {
+            "run": run,
+            "ts": time.time(),
+            "upserts": sum(1 for line in lines if not line.get("del")),
+            "removed": sum(1 for line in lines if line.get("del")),
+            "bytes": size,
+        }
+        if note:
+            info.update(note)
+        self.manifest["runs"].append(info)
+        self._latest = (run, state)
+        if self.compact_every and run - max(self.manifest["checkpoints"], default=0) >= self.compact_every:
+            self._compact(self.keep_runs)
+        else:
+            self._save_manifest()
+        return info
+
+    def write(self, payload: Dict, note: Optional[Dict] = None) -> Dict:
+        # Records a full report; only entries that differ from the previous run are written, and
+        # entries (or whole sections) missing from the payload are recorded as deletions
+        with self._writing():
+            current = self._current()
+            incoming = _records(payload)
+            lines: List[Dict] = []
+            for kind in list(incoming) + [k for k in current if k not in incoming]:
+                before, after = current.get(kind, {}), incoming.get(kind, {})
+                for key, value in after.items():
+                    if before.get(key) != value:
+                        lines.append({"k": kind, "id": key, "v": value})
+                lines.extend({"k": kind, "id": key, "del": True} for key in before if key not in after)
+            return self._append(lines, incoming, note)
+
+    def patch(
+        self,
+        upserts: Dict[str, Dict[str, Any]],
+        removed: Optional[Dict[str, Iterable[str]]] = None,
+        note: Optional[Dict] = None,
+    ) -> Dict:
+        # Records a partial change without reading or restating the unchanged entries
+        with self._writing():
+            state = {kind: dict(entries) for kind, entries in self._current().items()}
+            lines: List[Dict] = []
+            for kind, keys in (removed or {}).items():
+                entries = state.setdefault(kind, {})
+                for key in keys:
+                    if key in entries:
+                        del entries[key]
+                        lines.append({"k": kind, "id": key, "del": True})
+            for kind, entries in upserts.items():
+                target = state.setdefault(kind, {})
+                for key, value in entries.items():
+                    if target.get(key) != value:
+                        target[key] = value
+                        lines.append({"k": kind, "id": key, "v": value})
+            return self._append(lines, state, note)
+
+    def clear(self, note: Optional[Dict] = None) -> Dict:
+        # Records a run that removes every entry, e.g. when the role itself is retired
+        with self._writing():
+            current = self._current()
+            lines = [{"k": kind, "id": key, "del": True} for kind, entries in current.items() for key in entries]
+            return self._append(lines, {}, note)
+
+    def compact(self, keep_runs: Optional[int] = None) -> None:
+        # Checkpoints the latest state; with keep_runs, history older than that many runs is dropped
+        with self._writing():
+            self._compact(keep_runs)
+
+    def _compact(self, keep_runs: Optional[int]) -> None:
+        run = self.last_run
+        if not run:
+            return
+        state = self._current()
+        if run not in self.manifest["checkpoints"]:
+            self._write_lines(
+                self._checkpoint_path(run),
+                ({"k": kind, "id": key, "v": value} for kind, entries in state.items() for key, value in entries.items()),
+            )
+            self.manifest["checkpoints"].append(run)
+        if keep_runs is not None:
+            # History is cut at the newest checkpoint that still reaches the oldest kept run
+            oldest = max(run - keep_runs + 1, 1)
+            base = max((c for c in self.manifest["checkpoints"] if c <= oldest), default=None)
+            if base is not None:
+                for r in self.manifest["runs"]:
+                    if r["run"] < base:
+                        self._segment_path(r["run"]).unlink(missing_ok=True)
+                for c in self.manifest["checkpoints"]:
+                    if c < base:
+                        self._checkpoint_path(c).unlink(missing_ok=True)
+                self.manifest["runs"] = [r for r in self.manifest["runs"] if r["run"] >= base]
+                self.manifest["checkpoints"] = [c for c in self.manifest["checkpoints"] if c >= base]
+        self._save_manifest()
+
+
+def list_stores(root: Path) -> List[ReportStore]:
+    # Every report store directly under root (one per role id)
+    if not root.is_dir():
+        return []
+    return [ReportStore(d) for d in sorted(root.iterdir()) if (d / "manifest.json").exists()]
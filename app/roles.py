@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from .cache import role_fingerprint
+from .config import CONFIG
+from .data_models import Role
+from .extraction import Gazetteer
+from .scoring import role_phrases
+from .utils.io import scan_files
+
+ROLE_EXTS = (".yaml", ".yml", ".json")
+
+
+def role_from_dict(data: Dict, fallback_id: str = "") -> Role:
+    # One mapping from role files, classify_role output and API payloads onto Role
+    return Role(
+        id=data.get("id") or fallback_id,
+        title=data.get("title") or fallback_id,
+        department=data.get("department", ""),
+        required_skills=list(data.get("required_skills", [])),
+        preferred_skills=list(data.get("preferred_skills", [])),
+        research_focus=list(data.get("research_focus", [])),
+        teaching_requirements=list(data.get("teaching_requirements", [])),
+    )
+
+
+def load_role_file(path: Path) -> Role:
+    data = yaml.safe_load(path.read_text(encoding="utf-8"))  # JSON role files are valid YAML
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} does not contain a role mapping")
+    return role_from_dict(data, fallback_id=path.stem)
+
+
+@dataclass
+class CompiledRole:
+    role: Role
+    content_hash: str
+    phrases: List[str]
+    text: str
+    _queries: "weakref.WeakKeyDictionary[Any, Any]" = field(default_factory=weakref.WeakKeyDictionary, repr=False)
+
+    @cached_property
+    def matcher(self) -> Gazetteer:
+        # All role phrases in one whole-word regex pass over a single text, matching what
+        # mention_checker and the skill matrix count. Pool-wide scoring uses the skill matrix.
+        return Gazetteer(self.phrases, whole_words=True)
+
+    def mentions(self, text: str) -> List[str]:
+        return self.matcher.find(text.lower())
+
+    def query_vector(self, vectorizer: Any) -> Any:
+        # TF-IDF query vector for this role, computed once per fitted vectorizer
+        q = self._queries.get(vectorizer)
+        if q is None:
+            q = vectorizer.transform([self.text])
+            self._queries[vectorizer] = q
+        return q
+
+
+_COMPILED: "OrderedDict[str, CompiledRole]" = OrderedDict()
+_COMPILED_LOCK = threading.Lock()
+
+
+def compile_role(role: Role) -> CompiledRole:
+    # Compiled once per content hash, so catalog roles, classified titles and API payloads with
+    # the same definition share query vectors
+    key = role_fingerprint(role)
+    with _COMPILED_LOCK:
+        compiled = _COMPILED.get(key)
+        if compiled is not None:
+            _COMPILED.move_to_end(key)
+            return compiled
+    phrases = role_phrases(role)
+    compiled = CompiledRole(role=role, content_hash=key, phrases=phrases, text=" ".join(phrases))
+    with _COMPILED_LOCK:
+        _COMPILED[key] = compiled
+        while len(_COMPILED) > 256:
+            _COMPILED.popitem(last=False)
+    return compiled
+
+
+class RoleRegistry:
+    # Compiled catalog of a roles folder. Files are re-read only when their size/mtime changes, and
+    # the folder is re-scanned at most every `ttl` seconds, so lookups are dictionary hits.
+    def __init__(self, roles_dir: Path, ttl: float = 1.0) -> None:
+        self.roles_dir = roles_dir
+        self.ttl = ttl
+        self._files: Dict[str, tuple] = {}
+        self._by_path: Dict[str, CompiledRole] = {}
+        self._by_id: Dict[str, CompiledRole] = {}
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked < self.ttl:
+            return
+        with self._lock:
+            files = scan_files(self.roles_dir, ROLE_EXTS, workers=1)
+            if files != self._files:
+                by_path: Dict[str, CompiledRole] = {}
+                for key, stat in files.items():
+                    compiled = self._by_path.get(key)
+                    if compiled is None or self._files.get(key) != stat:
+                        try:
+                            role = load_role_file(Path(key))
+                        except Exception:
+                            continue
+                        compiled = compile_role(role)
+                    by_path[key] = compiled
+                self._files = files
+                self._by_path = by_path
+                # Same precedence as the folder scan order: later files win on duplicate ids
+                self._by_id = {c.role.id: c for c in by_path.values()}
+            self._checked = now
+
+    def roles(self) -> List[Role]:
+        self.refresh()
+        return [c.role for c in self._by_id.values()]
+
+    def compiled(self) -> List[CompiledRole]:
+        self.refresh()
+        return list(self._by_id.values())
+
+    def __contains__(self, role_id: str) -> bool:
+        self.refresh()
+        return role_id in self._by_id
+
+    def get(self, role_id: str) -> CompiledRole:
+        self.refresh()
+        return self._by_id[role_id]
+
+    def from_path(self, path: Path) -> CompiledRole:
+        # Role files inside the catalog come from it; anything else is parsed and compiled ad hoc
+        self.refresh()
+        compiled = self._by_path.get(str(path))
+        if compiled is None:
+            compiled = compile_role(load_role_file(path))
+        return compiled
+
+    def resolve(self, ref: str) -> CompiledRole:
+        # A role id from the catalog, or a path to a role file
+        if ref in self:
+            return self.get(ref)
+        return self.from_path(Path(ref))
+
+
+@lru_cache(maxsize=None)
+def role_registry(roles_dir: Optional[Path] = None) -> RoleRegistry:
+    return RoleRegistry(roles_dir or CONFIG.roles_dir)
@@ -1,28 +1,121 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
 
-from .data_models import Candidate, Role
+import numpy as np
+
+from .data_models import Candidate, MatchResult, Role
+from .extraction import EXTRACTION_VERSION, contains_phrase, skill_gazetteer
+from .skill_matrix import SkillMatrix
+
+INVITE_MIN_SCORE = 0.2
+
+
+def mention_checker(candidate: Candidate) -> Callable[[str], bool]:
+    text = candidate.resume_text
+    gazetteer = skill_gazetteer()
+    # Extracted skills hold every vocabulary phrase found at ingest, so a set lookup is exact;
+    # stale records are scanned with the same whole-word gazetteer. Phrases outside the
+    # vocabulary still need a full-text scan, with the same whole-word rule.
+    vocabulary = gazetteer.vocabulary
+    found = set(candidate.skills if candidate.metadata.get("extraction") == EXTRACTION_VERSION else gazetteer.find(text))
+
+    def mentions(phrase: str) -> bool:
+        p = phrase.lower()
+        return p in found if p in vocabulary else contains_phrase(text, p)
+
+    return mentions
 
 
 def explain_fit(candidate: Candidate, role: Role) -> Tuple[List[str], List[str]]:
     strengths: List[str] = []
     risks: List[str] = []
-    text = candidate.resume_text
+    mentions = mention_checker(candidate)
     # simple keyword presence for explainability
     for s in role.required_skills:
-        if s.lower() in text:
+        if mentions(s):
             strengths.append(f"Mentions required skill: {s}")
         else:
             risks.append(f"Missing required skill: {s}")
     for s in role.preferred_skills:
-        if s.lower() in text:
+        if mentions(s):
             strengths.append(f"Mentions preferred skill: {s}")
     for a in role.research_focus:
-        if a.lower() in text:
+        if mentions(a):
             strengths.append(f"Research focus alignment: {a}")
     for t in role.teaching_requirements:
-        if t.lower() in text:
+        if mentions(t):
             strengths.append(f"Teaching alignment: {t}")
     return strengths, risks
 
+
+@dataclass
+class PoolExplanation:
+    required_hits: np.ndarray
+    missing_required: np.ndarray
+    preferred_hits: np.ndarray
+    research_hits: np.ndarray
+    teaching_hits: np.ndarray
+    required_mask: np.ndarray
+    preferred_mask: np.ndarray
+    research_mask: np.ndarray
+    teaching_mask: np.ndarray
+
+    @property
+    def strengths(self) -> np.ndarray:
+        return self.required_hits + self.preferred_hits + self.research_hits + self.teaching_hits
+
+    def invite(self, scores: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        # scores align with `rows` when given, otherwise with the whole pool
+        missing, strengths = self.missing_required, self.strengths
+        if rows is not None:
+            missing, strengths = missing[rows], strengths[rows]
+        return (scores >= INVITE_MIN_SCORE) & (missing <= strengths)
+
+    def result(self, row: int, candidate_id: str, role: Role, score: float, invite: bool) -> MatchResult:
+        return MatchResult(
+            candidate_id,
+            role,
+            score,
+            required_mask=self.required_mask[row],
+            preferred_mask=self.preferred_mask[row],
+            research_mask=self.research_mask[row],
+            teaching_mask=self.teaching_mask[row],
+            next_step=int(bool(invite)),  # index into NEXT_STEPS
+        )
+
+    def compact(self, rows: List[int], candidate_ids: List[str], scores: np.ndarray, invite: np.ndarray) -> List[List]:
+        # MatchResult.to_compact() rows for `rows` (scores/invite indexed by pool row), without
+        # building the results themselves
+        return [
+            list(r)
+            for r in zip(
+                candidate_ids,
+                scores[rows].astype(np.float32).tolist(),
+                self.required_mask[rows].tolist(),
+                self.preferred_mask[rows].tolist(),
+                self.research_mask[rows].tolist(),
+                self.teaching_mask[rows].tolist(),
+                invite[rows].astype(int).tolist(),
+            )
+        ]
+
+
+def role_phrases(role: Role) -> List[str]:
+    return role.required_skills + role.preferred_skills + role.research_focus + role.teaching_requirements
+
+
+def explain_pool(skills: SkillMatrix, role: Role) -> PoolExplanation:
+    required = skills.counts(role.required_skills)
+    return PoolExplanation(
+        required_hits=required,
+        missing_required=len(role.required_skills) - required,
+        preferred_hits=skills.counts(role.preferred_skills),
+        research_hits=skills.counts(role.research_focus),
+        teaching_hits=skills.counts(role.teaching_requirements),
+        required_mask=skills.masks(role.required_skills),
+        preferred_mask=skills.masks(role.preferred_skills),
+        research_mask=skills.masks(role.research_focus),
+        teaching_mask=skills.masks(role.teaching_requirements),
+    )
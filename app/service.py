@@ -0,0 +1,458 @@
+from __future__ import annotations
+
+import json
+import operator
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from queue import Empty, Queue
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib import request as urlrequest
+from urllib.error import HTTPError
+
+import numpy as np
+from scipy import sparse
+
+from .agents.screening import ScreeningAgent
+from .cache import RankingCache, candidate_fingerprint, corpus_version
+from .config import CONFIG
+from .data_models import Candidate, MatchResult, Role
+from .dedup import deduplicate
+from .embeddings import EmbeddingIndex
+from .parsing import CANDIDATE_EXTS, load_corpus
+from .role_classifier import classify_role
+from .roles import RoleRegistry, compile_role, role_from_dict
+from .scoring import PoolExplanation, explain_pool
+from .shared_index import shared_index
+from .skill_matrix import SkillMatrix
+from .utils.io import scan_files
+
+
+def _record(candidate: Candidate) -> Dict:
+    # Everything needed to rebuild a Candidate on the other side of the wire
+    return {
+        "id": candidate.id,
+        "name": candidate.name,
+        "email": candidate.email,
+        "resume_text": candidate.resume_text,
+        "skills": candidate.skills,
+        "research_areas": candidate.research_areas,
+        "teaching_experience": candidate.teaching_experience,
+        "publications": candidate.publications,
+        "metadata": candidate.metadata,
+    }
+
+
+class MissingCandidates(Exception):
+    # Requested ids the service has no current record for (unknown, or a different resume text)
+    def __init__(self, ids: List[str]) -> None:
+        super().__init__(f"{len(ids)} candidates not in the service corpus")
+        self.ids = ids
+
+
+class StaleCorpus(Exception):
+    # The caller referenced the corpus by a version the service does not hold
+    def __init__(self, version: str) -> None:
+        super().__init__(f"service corpus is at version {version}")
+        self.version = version
+
+
+class RankBatcher:
+    # Coalesces role queries arriving within `window_s` into a single sparse matrix multiply per index
+    def __init__(self, window_s: float = 0.005, max_batch: int = 64) -> None:
+        self.window_s = window_s
+        self.max_batch = max_batch
+        self.batches = 0
+        self.queries = 0
+        self._queue: "Queue[Tuple[EmbeddingIndex, sparse.csr_matrix, Future]]" = Queue()
+        self._thread = threading.Thread(target=self._loop, name="rank-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, index: EmbeddingIndex, role: Role) -> "Future[np.ndarray]":
+        fut: "Future[np.ndarray]" = Future()
+        self._queue.put((index, compile_role(role).query_vector(index.vectorizer), fut))
+        return fut
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except Empty:
+                    break
+            # Queries submitted across a corpus reload are scored against the index they were encoded for
+            groups: Dict[int, List[Tuple[EmbeddingIndex, sparse.csr_matrix, Future]]] = {}
+            for item in batch:
+                groups.setdefault(id(item[0]), []).append(item)
+            for group in groups.values():
+                try:
+                    sims = group[0][0].query_vectors(sparse.vstack([q for _, q, _ in group], format="csr"))
+                except Exception as exc:  # deliver the failure to every waiting request
+                    for _, _, fut in group:
+                        fut.set_exception(exc)
+                    continue
+                self.batches += 1
+                self.queries += len(group)
+                for row, (_, _, fut) in enumerate(group):
+                    fut.set_result(np.asarray(sims[row]).ravel())
+
+
+@dataclass
+class ServiceCorpus:
+    # One loaded corpus; swapped as a whole on reload so a request never mixes two versions
+    files: Dict[str, Tuple[int, int]]
+    candidates: List[Candidate]
+    duplicates: Dict[str, List[str]]
+    row_of: Dict[str, int]
+    index: EmbeddingIndex
+    skills: SkillMatrix
+    version: str
+    _pools: "OrderedDict[str, PoolExplanation]" = field(default_factory=OrderedDict, repr=False)
+    _pools_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def pool_for(self, role: Role) -> PoolExplanation:
+        # Skill columns and masks of a role over this corpus, built once per role content hash, so
+        # repeated requests for a role only score and sort
+        compiled = compile_role(role)
+        with self._pools_lock:
+            pool = self._pools.get(compiled.content_hash)
+            if pool is not None:
+                self._pools.move_to_end(compiled.content_hash)
+                return pool
+        pool = explain_pool(self.skills.with_phrases(self.candidates, compiled.phrases), role)
+        with self._pools_lock:
+            self._pools[compiled.content_hash] = pool
+            while len(self._pools) > CONFIG.cache_size:
+                self._pools.popitem(last=False)
+        return pool
+
+
+class ScreeningService:
+    # Keeps the corpus index warm and answers /rank like ScreeningAgent.rank_candidates would for
+    # the same pool: the whole corpus is scored through the batched warm index, any other pool
+    # (a selection, or resumes the caller uploaded) is ranked within itself so IDF and invite
+    # decisions match local ranking. The candidate folder is re-scanned at most every reload_s.
+    def __init__(self, data_dir: Path, window_ms: float = 5.0, reload_s: float = CONFIG.service_reload_s) -> None:
+        self.data_dir = data_dir
+        self.reload_s = reload_s
+        self.roles = RoleRegistry(data_dir / "roles")
+        self.batcher = RankBatcher(window_s=window_ms / 1000.0)
+        self.agent = ScreeningAgent(cache=RankingCache(capacity=CONFIG.cache_size))
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self.corpus = self._load(scan_files(data_dir / "candidates", CANDIDATE_EXTS))
+
+    def _load(self, files: Dict[str, Tuple[int, int]]) -> ServiceCorpus:
+        candidates = load_corpus(self.data_dir / "candidates")
+        duplicates: Dict[str, List[str]] = {}
+        if CONFIG.dedupe_threshold:
+            candidates, duplicates = deduplicate(candidates, threshold=CONFIG.dedupe_threshold)
+        row_of = {c.id: i for i, c in enumerate(candidates)}
+        # Requests naming a folded duplicate are answered with its canonical candidate
+        for canonical, dups in duplicates.items():
+            for dup in dups:
+                row_of[dup] = row_of[canonical]
+        # Index arrays come from a memory-mapped segment, so several `serve` processes on one host
+        # share a single copy of the matrix
+        shared = shared_index(candidates)
+        return ServiceCorpus(files, candidates, duplicates, row_of, shared.index, shared.skills, corpus_version(candidates))
+
+    @property
+    def candidates(self) -> List[Candidate]:
+        return self.corpus.candidates
+
+    def refresh(self, force: bool = False) -> bool:
+        # True when new, changed or removed resume files were loaded
+        now = time.monotonic()
+        if not force and now - self._checked < self.reload_s:
+            return False
+        with self._lock:
+            self._checked = now
+            files = scan_files(self.data_dir / "candidates", CANDIDATE_EXTS)
+            if files == self.corpus.files:
+                return False
+            self.corpus = self._load(files)
+            return True
+
+    def resolve_role(self, payload: Dict) -> Role:
+        if "role_id" in payload:
+            return self.roles.get(payload["role_id"]).role
+        return role_from_dict(payload["role"])
+
+    def _resolve(
+        self,
+        corpus: ServiceCorpus,
+        candidate_ids: Sequence[str],
+        fingerprints: Optional[Sequence[Optional[str]]],
+        records: Dict[str, Dict],
+    ) -> Tuple[List[Candidate], List[int], List[str]]:
+        # The pool in request order, the corpus rows it uses, and ids that need a record
+        pool: List[Candidate] = []
+        rows: List[int] = []
+        missing: List[str] = []
+        seen = set()
+        for i, cid in enumerate(candidate_ids):
+            if cid in records:
+                pool.append(Candidate(**records[cid]))
+                continue
+            row = corpus.row_of.get(cid)
+            fp = fingerprints[i] if fingerprints is not None else None
+            # Without a fingerprint a folded duplicate resolves to its canonical row; with one, only
+            # the corpus row holding exactly this id and text is used, so results match local ranking
+            if row is not None and fp is not None:
+                held = corpus.candidates[row]
+                if held.id != cid or candidate_fingerprint(held) != fp:
+                    row = None
+            if row is None:
+                missing.append(cid)
+            elif row not in seen:
+                seen.add(row)
+                rows.append(row)
+                pool.append(corpus.candidates[row])
+        return pool, rows, missing
+
+    def rank(
+        self,
+        role: Role,
+        top_k: Optional[int] = None,
+        candidate_ids: Optional[Sequence[str]] = None,
+        fingerprints: Optional[Sequence[Optional[str]]] = None,
+        records: Optional[Sequence[Dict]] = None,
+        version: Optional[str] = None,
+        compact: bool = False,
+    ) -> List:
+        # MatchResults, or their to_compact() rows when `compact` (what /rank sends). A caller
+        # holding the same corpus names it by version and sends no ids at all.
+        self.refresh()
+        corpus = self.corpus
+        if candidate_ids is None and version not in (None, corpus.version) and self.refresh(force=True):
+            corpus = self.corpus
+        if version is not None and version == corpus.version:
+            return self._rank_rows(corpus, role, top_k, compact=compact)
+        if candidate_ids is None:
+            if version is not None:
+                raise StaleCorpus(corpus.version)
+            return self._rank_rows(corpus, role, top_k, compact=compact)
+        by_id = {r["id"]: r for r in records or []}
+        pool, rows, missing = self._resolve(corpus, candidate_ids, fingerprints, by_id)
+        if missing and self.refresh(force=True):
+            corpus = self.corpus
+            pool, rows, missing = self._resolve(corpus, candidate_ids, fingerprints, by_id)
+        if missing:
+            raise MissingCandidates(missing)
+        if not by_id and len(rows) == len(corpus.candidates):
+            return self._rank_rows(corpus, role, top_k, compact=compact)
+        skills = corpus.skills.select([c.id for c in pool]) if not by_id else None
+        matches = self.agent.rank_candidates(pool, role, skills=skills, top_k=top_k)
+        return [m.to_compact() for m in matches] if compact else matches
+
+    def _rank_rows(
+        self,
+        corpus: ServiceCorpus,
+        role: Role,
+        top_k: Optional[int] = None,
+        rows: Optional[np.ndarray] = None,
+        compact: bool = False,
+    ) -> List:
+        # Scores against the whole corpus index (batched with concurrent requests)
+        if not corpus.candidates:
+            return []
+        sims = self.batcher.submit(corpus.index, role).result()
+        rows = np.arange(len(corpus.candidates)) if rows is None else rows
+        sub = sims[rows]
+        if top_k is not None and top_k < len(rows):
+            top = np.argpartition(-sub, top_k)[:top_k]
+            order = top[np.argsort(-sub[top])]
+        else:
+            order = np.argsort(-sub)
+        pool = corpus.pool_for(role)
+        invite = pool.invite(sims)
+        picked = rows[order].tolist()
+        ids = [corpus.candidates[r].id for r in picked]
+        if compact:
+            return pool.compact(picked, ids, sims, invite)
+        return [pool.result(r, cid, role, sims[r], invite[r]) for r, cid in zip(picked, ids)]
+
+    def explain(self, role: Role, candidate_id: str) -> MatchResult:
+        # One candidate's fit as scored against the whole corpus
+        self.refresh()
+        corpus = self.corpus
+        return self._rank_rows(corpus, role, rows=np.array([corpus.row_of[candidate_id]], dtype=np.int64))[0]
+
+
+def _make_handler(service: ScreeningService) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: object) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path == "/health":
+                self._send(
+                    200,
+                    {
+                        "candidates": len(service.candidates),
+                        "roles": sorted(r.id for r in service.roles.roles()),
+                        "batches": service.batcher.batches,
+                        "queries": service.batcher.queries,
+                    },
+                )
+            elif self.path == "/corpus":
+                service.refresh()
+                corpus = service.corpus
+                self._send(
+                    200, {"candidates": len(corpus.candidates), "duplicates": corpus.duplicates, "corpus": corpus.version}
+                )
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path == "/rank":
+                    matches = service.rank(
+                        service.resolve_role(payload),
+                        payload.get("top_k"),
+                        payload.get("candidate_ids"),
+                        payload.get("fingerprints"),
+                        payload.get("records"),
+                        payload.get("corpus"),
+                        compact=True,
+                    )
+                    out: Dict = {"matches": matches, "corpus": service.corpus.version}
+                elif self.path == "/explain":
+                    out = {"match": service.explain(service.resolve_role(payload), payload["candidate_id"]).to_compact()}
+                elif self.path == "/classify":
+                    out = {"role": classify_role(payload["title"])}
+                else:
+                    self._send(404, {"error": f"unknown path {self.path}"})
+                    return
+            except MissingCandidates as exc:
+                self._send(409, {"error": str(exc), "missing": exc.ids})
+                return
+            except StaleCorpus as exc:
+                self._send(409, {"error": str(exc), "corpus": exc.version})
+                return
+            except KeyError as exc:
+                self._send(404, {"error": f"not found: {exc}"})
+                return
+            except Exception as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            out["elapsed_ms"] = round((time.perf_counter() - start) * 1000.0, 3)
+            self._send(200, out)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return Handler
+
+
+def serve(data_dir: Path, host: str = "127.0.0.1", port: int = 8765, window_ms: float = 5.0) -> ThreadingHTTPServer:
+    service = ScreeningService(data_dir, window_ms=window_ms)
+    server = ThreadingHTTPServer((host, port), _make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+class ServiceClient:
+    # Drop-in stand-in for ScreeningAgent that ranks against a running `cli.py serve`. A pool is
+    # ranked within itself exactly as ScreeningAgent would rank it. A pool identical to the service
+    # corpus is named by its version; any other pool is sent as ids and fingerprints, plus the
+    # resumes the service has no current copy of when it asks for them. If the service cannot be
+    # reached or fails, the request is ranked locally by `fallback` instead.
+    def __init__(self, base_url: str, timeout: float = 30.0, fallback: Optional[ScreeningAgent] = None) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.fallback = fallback or ScreeningAgent()
+        self.service_version: Optional[str] = None
+        self._versioned: Tuple[List[Candidate], str] = ([], corpus_version([]))
+
+    def _version(self, candidates: List[Candidate]) -> str:
+        # Hashing every resume is skipped when the caller passes the same candidate objects again
+        held, version = self._versioned
+        if len(held) != len(candidates) or not all(map(operator.is_, held, candidates)):
+            version = corpus_version(candidates)
+            self._versioned = (list(candidates), version)
+        return version
+
+    def _get(self, path: str) -> Dict:
+        with urlrequest.urlopen(self.base_url + path, timeout=self.timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    def _post(self, path: str, payload: Dict) -> Dict:
+        req = urlrequest.Request(
+            self.base_url + path,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        with urlrequest.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    def rank_candidates(
+        self,
+        candidates: List[Candidate],
+        role: Role,
+        skills: Optional[SkillMatrix] = None,
+        top_k: Optional[int] = None,
+    ) -> List[MatchResult]:
+        # `skills` is used by the local fallback; the service has skill rows for its own corpus
+        # and extracts them from the records of uploaded resumes
+        if not candidates:
+            return []
+        payload: Dict = {"role": asdict(role), "top_k": top_k, "corpus": self._version(candidates)}
+        try:
+            # At most three round trips: by version, by ids, and with the records the service lacks
+            for _ in range(3):
+                if self.service_version not in (None, payload["corpus"]) and "candidate_ids" not in payload:
+                    payload["candidate_ids"] = [c.id for c in candidates]
+                    payload["fingerprints"] = [candidate_fingerprint(c) for c in candidates]
+                try:
+                    out = self._post("/rank", payload)
+                    break
+                except HTTPError as exc:
+                    if exc.code != 409:
+                        raise
+                    body = json.loads(exc.read().decode("utf-8"))
+                    if "missing" in body:
+                        missing = set(body["missing"])
+                        payload["records"] = [_record(c) for c in candidates if c.id in missing]
+                    else:
+                        self.service_version = body["corpus"]
+            else:
+                raise ValueError("service kept rejecting the candidate pool")
+        except (OSError, ValueError) as exc:  # URLError/HTTPError are OSErrors; ValueError covers bad JSON
+            warnings.warn(f"screening service at {self.base_url} failed ({exc}); ranking locally")
+            return self.fallback.rank_candidates(candidates, role, skills=skills, top_k=top_k)
+        self.service_version = out["corpus"]
+        return [MatchResult.from_compact(m, role) for m in out["matches"]]
+
+    def duplicates(self) -> Optional[Dict[str, List[str]]]:
+        # The service's duplicate folding of its corpus, or None when it cannot be reached
+        try:
+            return self._get("/corpus")["duplicates"]
+        except (OSError, ValueError):
+            return None
+
+    def explain(self, role: Role, candidate_id: str) -> MatchResult:
+        payload = {"role": asdict(role), "candidate_id": candidate_id}
+        return MatchResult.from_compact(self._post("/explain", payload)["match"], role)
+
+    def classify(self, title: str) -> Dict:
+        return self._post("/classify", {"title": title})["role"]
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .cache import config_fingerprint, corpus_version
+from .config import CONFIG
+from .data_models import Candidate
+from .embeddings import EmbeddingIndex, build_index, index_settings
+from .skill_matrix import SkillMatrix, build_skill_matrix
+from .text_store import TextStore
+from .utils.io import pid_alive
+
+SEGMENT_VERSION = "2"
+
+
+def _index_dtype(m: sparse.csr_matrix) -> type:
+    # scipy keeps indices and indptr in one dtype (int32 while it fits); matching it on disk lets
+    # the CSR constructor wrap the mapped arrays instead of casting them into private copies
+    return np.int32 if m.nnz < np.iinfo(np.int32).max else np.int64
+
+
+def _save(path: Path, arr: np.ndarray) -> None:
+    np.save(path, np.ascontiguousarray(arr), allow_pickle=False)
+
+
+def _load(path: Path) -> np.ndarray:
+    # Read-only memory map: every process attached to the segment shares the same page cache
+    return np.load(path, mmap_mode="r", allow_pickle=False)
+
+
+def _vectorizer_meta(vectorizer: TfidfVectorizer) -> Dict:
+    return {
+        "vocabulary": vectorizer.get_feature_names_out().tolist(),
+        "ngram_range": list(vectorizer.ngram_range),
+        "dtype": np.dtype(vectorizer.dtype).name,
+    }
+
+
+def _restore_vectorizer(meta: Dict, idf: np.ndarray) -> TfidfVectorizer:
+    # A fitted vectorizer from its vocabulary and IDF, without refitting
+    vocabulary = {term: j for j, term in enumerate(meta["vocabulary"])}
+    vectorizer = TfidfVectorizer(ngram_range=tuple(meta["ngram_range"]), vocabulary=vocabulary, dtype=np.dtype(meta["dtype"]))
+    vectorizer.idf_ = np.asarray(idf)
+    return vectorizer
+
+
+def _candidate_record(c: Candidate) -> Dict:
+    # Every Candidate field besides the resume text
+    return {
+        "id": c.id,
+        "name": c.name,
+        "email": c.email,
+        "skills": c.skills,
+        "research_areas": c.research_areas,
+        "teaching_experience": c.teaching_experience,
+        "publications": c.publications,
+        "metadata": c.metadata,
+    }
+
+
+def _save_candidates(path: Path, candidates: Sequence[Candidate]) -> None:
+    # Resume text and the remaining fields as two TextStores; row i of each is candidate i
+    TextStore(path / "texts").extend(c.resume_text for c in candidates)
+    TextStore(path / "records").extend(json.dumps(_candidate_record(c)) for c in candidates)
+
+
+def _load_candidates(path: Path) -> List[Candidate]:
+    # Text stays in the mapped store and is read on access
+    texts, records = TextStore(path / "texts"), TextStore(path / "records")
+    return [Candidate(store=texts, ref=row, **json.loads(records.get(row))) for row in range(len(records))]
+
+
+@dataclass
+class SharedIndex:
+    # A published corpus: TF-IDF CSR arrays, IDF and vocabulary, the skill matrix, and candidate
+    # records/resume text, all memory-mapped from one directory and never written after publishing
+    root: Path
+    version: str
+    ids: List[str]
+    index: EmbeddingIndex
+    skills: SkillMatrix
+    texts: TextStore
+    records: TextStore
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def candidate(self, row: int) -> Candidate:
+        rec = json.loads(self.records.get(row))
+        return Candidate(store=self.texts, ref=row, **rec)
+
+    def candidates(self) -> List[Candidate]:
+        return [self.candidate(i) for i in range(len(self.ids))]
+
+
+def segment_dir(candidates: Sequence[Candidate], root: Optional[Path] = None) -> Path:
+    # Index settings are part of the name: a float32 and an int8 build of one corpus are different segments
+    return (root or CONFIG.index_dir) / f"{corpus_version(candidates)}-{config_fingerprint(**index_settings())[:8]}"
+
+
+def publish_index(
+    candidates: Sequence[Candidate],
+    root: Optional[Path] = None,
+    index: Optional[EmbeddingIndex] = None,
+    skills: Optional[SkillMatrix] = None,
+) -> Path:
+    # Writes the segment once per corpus version; concurrent publishers race on the final rename
+    # and the loser's copy is discarded, so readers only ever see complete segments
+    target = segment_dir(candidates, root)
+    if (target / "meta.json").exists():
+        return target
+    ids = [c.id for c in candidates]
+    index = index or build_index(ids, [c.resume_text for c in candidates])
+    skills = skills.select(ids) if skills is not None else build_skill_matrix(candidates)
+    tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    matrix = sparse.csr_matrix(index.matrix)
+    _save(tmp / "tfidf_data.npy", matrix.data)
+    _save(tmp / "tfidf_indices.npy", matrix.indices.astype(_index_dtype(matrix)))
+    _save(tmp / "tfidf_indptr.npy", matrix.indptr.astype(_index_dtype(matrix)))
+    if index.scales is not None:
+        _save(tmp / "tfidf_scales.npy", index.scales)
+    _save(tmp / "idf.npy", index.vectorizer.idf_)
+    _save(tmp / "skills_data.npy", skills.matrix.data.astype(bool))
+    _save(tmp / "skills_indices.npy", skills.matrix.indices.astype(_index_dtype(skills.matrix)))
+    _save(tmp / "skills_indptr.npy", skills.matrix.indptr.astype(_index_dtype(skills.matrix)))
+    _save_candidates(tmp, candidates)
+    meta: Dict = {
+        "segment": SEGMENT_VERSION,
+        "version": target.name,
+        "ids": ids,
+        "shape": list(matrix.shape),
+        **_vectorizer_meta(index.vectorizer),
+        "precision": index.precision,
+        "skill_phrases": skills.phrases,
+    }
+    (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    try:
+        os.replace(tmp, target)
+    except OSError:
+        # Another process published the same version first
+        shutil.rmtree(tmp, ignore_errors=True)
+    else:
+        prune_segments(target.parent)
+    return target
+
+
+def touch_segment(path: Path) -> None:
+    # meta.json's mtime records when a segment was last attached, for prune_segments
+    try:
+        os.utime(path / "meta.json")
+    except OSError:
+        pass
+
+
+def prune_segments(root: Path, keep: Optional[int] = None, grace_s: float = 600.0) -> List[Path]:
+    # Deletes segments under root beyond the `keep` most recently attached, sparing any attached
+    # within grace_s (another process may still be reading it), plus temporary directories whose
+    # writer died. Returns the deleted paths. Open memory maps survive the unlink on POSIX; on
+    # Windows a segment still mapped fails to delete and is retried on the next prune.
+    keep = CONFIG.index_keep_segments if keep is None else keep
+    if not root.is_dir():
+        return []
+    now = time.time()
+    segments = []
+    removed: List[Path] = []
+    for entry in root.iterdir():
+        if ".tmp-" in entry.name:
+            if not pid_alive(entry.name.rsplit("-", 1)[1]):
+                shutil.rmtree(entry, ignore_errors=True)
+                removed.append(entry)
+            continue
+        try:
+            segments.append(((entry / "meta.json").stat().st_mtime, entry))
+        except OSError:
+            continue  # not a segment (e.g. the blocked/ folder)
+    segments.sort(reverse=True)
+    for used, entry in segments[keep:]:
+        if now - used > grace_s:
+            shutil.rmtree(entry, ignore_errors=True)
+            removed.append(entry)
+    return removed
+
+
+def attach_index(path: Path) -> SharedIndex:
+    meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    touch_segment(path)
+    if meta.get("segment") != SEGMENT_VERSION:
+        raise ValueError(f"{path} was published by an incompatible version")
+    shape = tuple(meta["shape"])
+    matrix = sparse.csr_matrix(
+        (_load(path / "tfidf_data.npy"), _load(path / "tfidf_indices.npy"), _load(path / "tfidf_indptr.npy")),
+        shape=shape,
+        copy=False,
+    )
+    vectorizer = _restore_vectorizer(meta, _load(path / "idf.npy"))
+    scales = _load(path / "tfidf_scales.npy") if meta["precision"] == "int8" else None
+    phrases = meta["skill_phrases"]
+    skill_matrix = sparse.csr_matrix(
+        (_load(path / "skills_data.npy"), _load(path / "skills_indices.npy"), _load(path / "skills_indptr.npy")),
+        shape=(shape[0], len(phrases)),
+        copy=False,
+    )
+    ids = meta["ids"]
+    return SharedIndex(
+        root=path,
+        version=meta["version"],
+        ids=ids,
+        index=EmbeddingIndex(vectorizer=vectorizer, matrix=matrix, ids=ids, scales=scales),
+        skills=SkillMatrix(ids=ids, phrases=phrases, columns={p: j for j, p in enumerate(phrases)}, matrix=skill_matrix),
+        texts=TextStore(path / "texts"),
+        records=TextStore(path / "records"),
+    )
+
+
+def shared_index(
+    candidates: Sequence[Candidate],
+    root: Optional[Path] = None,
+    skills: Optional[SkillMatrix] = None,
+) -> SharedIndex:
+    # Publish on first use, attach afterwards (from this or any other process)
+    return attach_index(publish_index(candidates, root=root, skills=skills))
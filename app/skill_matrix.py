@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from .data_models import Candidate
+from .extraction import EXTRACTION_VERSION, phrase_rows, skill_gazetteer
+
+
+@dataclass
+class SkillMatrix:
+    ids: List[str]
+    phrases: List[str]
+    columns: Dict[str, int]
+    matrix: sparse.csr_matrix  # bool, candidates x phrases
+    # Hits of phrases outside `phrases` (role phrases beyond the gazetteer), one bool array per
+    # phrase over these rows; shared by every matrix with_phrases derives, so the resumes are
+    # scanned for a phrase once per corpus rather than once per ranking
+    extra: Dict[str, np.ndarray] = field(default_factory=dict, repr=False, compare=False)
+
+    def select(self, ids: Sequence[str]) -> "SkillMatrix":
+        if list(ids) == self.ids:
+            return self
+        row_of = {cid: i for i, cid in enumerate(self.ids)}
+        rows = np.array([row_of[cid] for cid in ids], dtype=np.int64)
+        return SkillMatrix(
+            ids=list(ids),
+            phrases=self.phrases,
+            columns=self.columns,
+            matrix=self.matrix[rows],
+            extra={p: hits[rows] for p, hits in list(self.extra.items())},
+        )
+
+    def phrase_hits(self, candidates: Sequence[Candidate], phrases: Sequence[str]) -> Dict[str, np.ndarray]:
+        # Whole-word hits of lower-cased phrases outside the gazetteer; the ones not seen before
+        # are found in a single pass that reads each resume once
+        missing = [p for p in phrases if p not in self.extra]
+        if missing:
+            self.extra.update(phrase_rows([c.resume_text for c in candidates], missing))
+        return {p: self.extra[p] for p in phrases}
+
+    def with_phrases(self, candidates: Sequence[Candidate], phrases: Iterable[str]) -> "SkillMatrix":
+        # Role phrases outside the gazetteer vocabulary get extra columns (see phrase_hits)
+        new = [p for p in dict.fromkeys(p.lower() for p in phrases) if p and p not in self.columns]
+        if not new:
+            return self
+        hits = self.phrase_hits(candidates, new)
+        extra = sparse.csr_matrix(np.column_stack([hits[p] for p in new]))
+        columns = dict(self.columns)
+        columns.update({p: len(self.phrases) + j for j, p in enumerate(new)})
+        return SkillMatrix(
+            ids=self.ids,
+            phrases=self.phrases + new,
+            columns=columns,
+            matrix=sparse.hstack([self.matrix, extra], format="csr"),
+            extra=self.extra,
+        )
+
+    def column_indices(self, phrases: Iterable[str]) -> np.ndarray:
+        return np.array([self.columns[p.lower()] for p in phrases], dtype=np.int64)
+
+    def counts(self, phrases: Sequence[str]) -> np.ndarray:
+        if not phrases:
+            return np.zeros(len(self.ids), dtype=np.int64)
+        cols = self.matrix[:, self.column_indices(phrases)]
+        return np.asarray(cols.sum(axis=1), dtype=np.int64).ravel()
+
+    def masks(self, phrases: Sequence[str]) -> np.ndarray:
+        # Bit i of a candidate's mask is set when it mentions phrases[i]
+        if not phrases:
+            return np.zeros(len(self.ids), dtype=object)
+        cols = self.matrix[:, self.column_indices(phrases)].tocsc()
+        if len(phrases) < 63:
+            weights = np.left_shift(np.int64(1), np.arange(len(phrases), dtype=np.int64))
+            return np.asarray(cols.astype(np.int64) @ weights).ravel()
+        out = np.zeros(len(self.ids), dtype=object)
+        for j in range(len(phrases)):
+            out[cols.indices[cols.indptr[j] : cols.indptr[j + 1]]] += 1 << j
+        return out
+
+
+def build_skill_matrix(candidates: Sequence[Candidate]) -> SkillMatrix:
+    gazetteer = skill_gazetteer()
+    phrases = list(gazetteer.phrases)
+    columns = {p: j for j, p in enumerate(phrases)}
+    indptr = [0]
+    indices: List[int] = []
+    for c in candidates:
+        found = c.skills if c.metadata.get("extraction") == EXTRACTION_VERSION else gazetteer.find(c.resume_text)
+        indices.extend(sorted(columns[p] for p in found if p in columns))
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=bool), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(len(candidates), len(phrases)),
+    )
+    return SkillMatrix(ids=[c.id for c in candidates], phrases=phrases, columns=columns, matrix=matrix)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import mmap
+from array import array
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from .utils.io import file_lock
+
+
+class TextStore:
+    # Append-only UTF-8 blob plus an int64 table of record end offsets, read through mmap
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.blob_path = root / "texts.bin"
+        self.offsets_path = root / "offsets.bin"
+        root.mkdir(parents=True, exist_ok=True)
+        self.blob_path.touch(exist_ok=True)
+        self.offsets_path.touch(exist_ok=True)
+        self._ends = array("q")
+        self._reload()
+        self._map: Optional[mmap.mmap] = None
+        self._mapped = 0
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    @property
+    def size(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def append(self, text: str) -> int:
+        return self.extend([text])[0]
+
+    def _reload(self) -> None:
+        # Offsets other processes committed since this store was opened; a record cut short by a
+        # crash while writing offsets is dropped
+        # Committed offsets are never rewritten, so only the tail past the known ones is read
+        known = len(self._ends) * self._ends.itemsize
+        with self.offsets_path.open("rb") as f:
+            f.seek(known)
+            data = f.read()
+        self._ends.frombytes(data[: len(data) - len(data) % self._ends.itemsize])
+
+    def extend(self, texts: Iterable[str]) -> List[int]:
+        with file_lock(self.root / ".lock"):
+            self._reload()
+            first = len(self._ends)
+            end = self.size
+            new_ends = array("q")
+            with self.blob_path.open("r+b") as f:
+                # Bytes past the last committed offset were left by an interrupted write; they are
+                # cut off so the next record starts exactly where its offset says
+                f.truncate(end)
+                f.seek(end)
+                for text in texts:
+                    data = text.encode("utf-8")
+                    f.write(data)
+                    end += len(data)
+                    new_ends.append(end)
+            # Offsets are written after the text, so a crash never leaves an entry pointing past the blob
+            with self.offsets_path.open("r+b") as f:
+                f.truncate(first * new_ends.itemsize)
+                f.seek(first * new_ends.itemsize)
+                new_ends.tofile(f)
+            self._ends.extend(new_ends)
+        return list(range(first, len(self._ends)))
+
+    def get(self, ref: int) -> str:
+        start = self._ends[ref - 1] if ref else 0
+        end = self._ends[ref]
+        if start == end:
+            return ""
+        if end > self._mapped:
+            self._remap()
+        return self._map[start:end].decode("utf-8")  # type: ignore[index]
+
+    def _remap(self) -> None:
+        self.close()
+        with self.blob_path.open("rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped = len(self._map)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._mapped = 0
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 import io
-import json
+import time
+from dataclasses import replace
 from pathlib import Path
 from typing import Dict, List, Optional
 import sys
@@ -14,12 +15,17 @@ _PROJECT_ROOT = _CURRENT_DIR.parent
 if str(_PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(_PROJECT_ROOT))
 
+from app.agents.screening import ScreeningAgent
+from app.cache import RankingCache
 from app.config import CONFIG
-from app.data_models import Candidate, Role, role_from_yaml
+from app.data_models import Candidate, MatchResult, Role
 from app.orchestrator import Orchestrator
-from app.parsing import parse_candidate_folder
+from app.dedup import deduplicate
+from app.parsing import load_corpus
 from app.utils.io import save_json
+from app.reports.store import ReportStore
 from app.role_classifier import classify_role
+from app.roles import RoleRegistry, role_from_dict
 import plotly.express as px
 
 
@@ -99,36 +105,21 @@ CAND_DIR = CONFIG.candidate_dir
 OUTPUT_DIR = CONFIG.output_dir
 
 
+@st.cache_resource
+def roles_catalog() -> RoleRegistry:
+    # Compiled once per server process; role files are re-read only when they change on disk
+    return RoleRegistry(ROLE_DIR)
+
+
 def load_roles() -> List[Role]:
-    roles: List[Role] = []
     ROLE_DIR.mkdir(parents=True, exist_ok=True)
-    for p in ROLE_DIR.glob("*.yaml"):
-        try:
-            roles.append(role_from_yaml(p))
-        except Exception:
-            continue
-    for p in ROLE_DIR.glob("*.yml"):
-        try:
-            roles.append(role_from_yaml(p))
-        except Exception:
-            continue
-    for p in ROLE_DIR.glob("*.json"):
-        try:
-            data = json.loads(p.read_text(encoding="utf-8"))
-            roles.append(
-                Role(
-                    id=data.get("id", p.stem),
-                    title=data.get("title", p.stem),
-                    department=data.get("department", ""),
-                    required_skills=data.get("required_skills", []),
-                    preferred_skills=data.get("preferred_skills", []),
-                    research_focus=data.get("research_focus", []),
-                    teaching_requirements=data.get("teaching_requirements", []),
-                )
-            )
-        except Exception:
-            continue
-    return roles
+    return roles_catalog().roles()
+
+
+@st.cache_resource
+def ranking_cache() -> RankingCache:
+    # One cache per server process, shared by every session ranking the same role and corpus
+    return RankingCache(capacity=CONFIG.cache_size, disk_dir=CONFIG.cache_dir)
 
 
 def ensure_dirs() -> None:
@@ -143,7 +134,34 @@ def save_uploaded_resume(file_name: str, bytes_data: bytes) -> Path:
 
 
 def parse_candidate_files() -> List[Candidate]:
-    return parse_candidate_folder(CAND_DIR)
+    candidates = load_corpus(CAND_DIR)
+    if CONFIG.dedupe_threshold:
+        candidates, _ = deduplicate(candidates, threshold=CONFIG.dedupe_threshold)
+    return candidates
+
+
+def refresh_ranking() -> bool:
+    # Pulls the latest snapshot of a running anytime ranking into the session; True while refining
+    ranking = st.session_state.get("ranking")
+    if ranking is None:
+        return False
+    snap = ranking.snapshot()
+    if snap.results:
+        st.session_state["matches"] = [m.to_compact() for m in snap.results]
+    if ranking.error is not None:
+        st.session_state.pop("ranking")
+        st.error(f"Ranking failed: {ranking.error}")
+        return False
+    if not snap.partial:
+        st.session_state.pop("ranking")
+        return False
+    quality = "exact" if snap.exact else "approximate"
+    st.info(f"Refining… {snap.scored}/{snap.total} candidates scored ({snap.coverage:.0%}, {quality} scores)")
+    return True
+
+
+def split_skills(text: str) -> List[str]:
+    return list(dict.fromkeys(s.strip() for s in text.split(",") if s.strip()))
 
 
 def export_markdown(role: Role, matches: List[Dict]) -> str:
@@ -207,15 +225,7 @@ def ui() -> None:
                 classified = classify_role(title_only)
                 st.session_state["classified_role_json"] = classified
                 # also set selected role for analysis
-                selected_role = Role(
-                    id=classified["id"],
-                    title=classified["title"],
-                    department=classified["department"],
-                    required_skills=classified.get("required_skills", []),
-                    preferred_skills=classified.get("preferred_skills", []),
-                    research_focus=classified.get("research_focus", []),
-                    teaching_requirements=classified.get("teaching_requirements", []),
-                )
+                selected_role = role_from_dict(classified)
                 st.session_state["expanded_role"] = selected_role
                 st.success("Role profile generated.")
 
@@ -224,15 +234,7 @@ def ui() -> None:
                 st.json(st.session_state["classified_role_json"])
                 # ensure selected_role reflects latest classified profile
                 cr = st.session_state["classified_role_json"]
-                selected_role = Role(
-                    id=cr["id"],
-                    title=cr["title"],
-                    department=cr["department"],
-                    required_skills=cr.get("required_skills", []),
-                    preferred_skills=cr.get("preferred_skills", []),
-                    research_focus=cr.get("research_focus", []),
-                    teaching_requirements=cr.get("teaching_requirements", []),
-                )
+                selected_role = role_from_dict(cr)
                 st.session_state["expanded_role"] = selected_role
 
             if save_btn and st.session_state.get("classified_role_json"):
@@ -258,48 +260,77 @@ def ui() -> None:
                 auto_title = st.session_state.get("role_title_input")
                 if auto_title:
                     cr = classify_role(auto_title)
-                    selected_role = Role(
-                        id=cr["id"],
-                        title=cr["title"],
-                        department=cr["department"],
-                        required_skills=cr.get("required_skills", []),
-                        preferred_skills=cr.get("preferred_skills", []),
-                        research_focus=cr.get("research_focus", []),
-                        teaching_requirements=cr.get("teaching_requirements", []),
-                    )
+                    selected_role = role_from_dict(cr)
                     st.session_state["expanded_role"] = selected_role
             disabled = not (selected_role and chosen)
             if st.button("Compute Fit & Generate Report", help="Compute fit and navigate to dashboard", key="analyze", use_container_width=True, disabled=disabled):
-                orch = Orchestrator()
-                matches = orch.screening.rank_candidates(chosen, selected_role)  # type: ignore[arg-type]
-                st.session_state["matches"] = [m.__dict__ for m in matches]
+                orch = Orchestrator(service_url=CONFIG.service_url, cache=ranking_cache())
+                # A refinement still running from an earlier click would keep a core busy for nothing
+                previous = st.session_state.pop("ranking", None)
+                if previous is not None:
+                    previous.cancel()
+                if isinstance(orch.screening, ScreeningAgent):
+                    # Best results within the latency budget; the dashboard keeps refreshing until exact
+                    ranking = orch.screening.rank_anytime(
+                        chosen,
+                        selected_role,  # type: ignore[arg-type]
+                        deadline_s=CONFIG.anytime_deadline_ms / 1000.0,
+                        block_size=CONFIG.anytime_block_size,
+                    )
+                    st.session_state["ranking"] = ranking
+                    matches = ranking.snapshot().results
+                else:
+                    matches = orch.screening.rank_candidates(chosen, selected_role)  # type: ignore[arg-type]
+                # Compact rows (id, score, hit masks, next-step code); text is rendered on display
+                st.session_state["matches"] = [m.to_compact() for m in matches]
                 st.session_state["role"] = selected_role.__dict__  # type: ignore[union-attr]
                 st.success("Analysis complete. Displaying results…")
                 st.rerun()
 
     with results_tab:
-        matches = st.session_state.get("matches", [])
-        if not matches:
+        refining = refresh_ranking()
+        if not st.session_state.get("matches"):
+            if refining:
+                time.sleep(0.5)
+                st.rerun()
             st.info("Results Dashboard will appear after analysis is computed on the Setup & Definition tab.")
             return
+        result_role = role_from_dict(st.session_state["role"])
+        matches = [MatchResult.from_compact(row, result_role) for row in st.session_state["matches"]]
         st.markdown("## Results Dashboard")
-        best = max(matches, key=lambda m: m.get("fit_score", 0)) if matches else None
+        with st.expander("What-if: edit required / preferred skills"):
+            required_text = st.text_input("Required skills", ", ".join(result_role.required_skills), key="wi_required")
+            preferred_text = st.text_input("Preferred skills", ", ".join(result_role.preferred_skills), key="wi_preferred")
+            edited = replace(result_role, required_skills=split_skills(required_text), preferred_skills=split_skills(preferred_text))
+            if edited != result_role and chosen and not refining:
+                # Re-scored as a delta over the cached pool matrix instead of a fresh rank_candidates
+                session = st.session_state.get("what_if")
+                if session is None or session.ids != [c.id for c in chosen]:
+                    session = ScreeningAgent(cache=ranking_cache()).what_if(chosen, result_role)
+                    st.session_state["what_if"] = session
+                update = session.update(edited)
+                matches = session.results()
+                result_role = edited
+                st.session_state["matches"] = [m.to_compact() for m in matches]
+                st.session_state["role"] = edited.__dict__
+                st.caption(f"Re-scored {len(matches)} candidates in {update.elapsed_ms} ms")
+        best = max(matches, key=lambda m: m.fit_score) if matches else None
         k1, k2, k3 = st.columns(3)
         with k1:
-            st.markdown('<div class="kpi-card" style="padding: 1.5rem 1.75rem; margin-top: .5rem;"><div style="font-size:0.95rem; opacity:.8;">Top Fit Score</div>' + (f'<div class="kpi-value" style="font-size:3rem;">{best["fit_score"]:.3f}</div>' if best else '<div class="kpi-value" style="font-size:3rem;">—</div>') + '</div>', unsafe_allow_html=True)
+            st.markdown('<div class="kpi-card" style="padding: 1.5rem 1.75rem; margin-top: .5rem;"><div style="font-size:0.95rem; opacity:.8;">Top Fit Score</div>' + (f'<div class="kpi-value" style="font-size:3rem;">{best.fit_score:.3f}</div>' if best else '<div class="kpi-value" style="font-size:3rem;">—</div>') + '</div>', unsafe_allow_html=True)
         with k2:
             st.markdown(f'<div class="kpi-card" style="padding: 1.5rem 1.75rem; margin-top: .5rem;"><div style="font-size:0.95rem; opacity:.8;">Candidates Evaluated</div><div class="kpi-value" style="font-size:3rem;">{len(matches)}</div></div>', unsafe_allow_html=True)
         with k3:
-            balance = f"{len(best.get('strengths', []))}/{len(best.get('risks', []))}" if best else "—"
+            balance = f"{best.strength_count}/{best.risk_count}" if best else "—"
             st.markdown(f'<div class="kpi-card" style="padding: 1.5rem 1.75rem; margin-top: .5rem;"><div style="font-size:0.95rem; opacity:.8;">Strength/Risk Balance</div><div class="kpi-value" style="font-size:3rem;">{balance}</div></div>', unsafe_allow_html=True)
 
         # Dense, sortable table
         df_rows = [
             {
-                "candidate": m["candidate_id"],
-                "fit_score": float(m.get("fit_score", 0.0)),
-                "strengths": len(m.get("strengths", [])),
-                "risks": len(m.get("risks", [])),
+                "candidate": m.candidate_id,
+                "fit_score": m.fit_score,
+                "strengths": m.strength_count,
+                "risks": m.risk_count,
             }
             for m in matches
         ]
@@ -315,29 +346,27 @@ def ui() -> None:
                 st.markdown('<div class="card" style="padding:1.25rem 1.5rem;">', unsafe_allow_html=True)
                 c1, c2, c3 = st.columns([3, 6, 1])
                 with c1:
-                    st.markdown(f"### {m['candidate_id']}")
+                    st.markdown(f"### {m.candidate_id}")
                 with c2:
-                    pct = max(0.0, min(1.0, float(m.get("fit_score", 0.0))))
+                    pct = max(0.0, min(1.0, m.fit_score))
                     st.markdown(f'<div class="progress-wrap"><div class="progress-bar" style="width:{pct*100:.1f}%"></div></div>', unsafe_allow_html=True)
-                    strengths_num = len(m.get("strengths", []))
-                    risks_num = len(m.get("risks", []))
-                    st.caption(f"Fit {pct:.4f}  •  ↑ {strengths_num}  ↓ {risks_num}")
+                    st.caption(f"Fit {pct:.4f}  •  ↑ {m.strength_count}  ↓ {m.risk_count}")
                 with c3:
-                    if st.button("View Details", key=f"vd_{m['candidate_id']}"):
-                        st.session_state["detail_candidate"] = m
+                    if st.button("View Details", key=f"vd_{m.candidate_id}"):
+                        st.session_state["detail_candidate"] = m.candidate_id
                 st.markdown('</div>', unsafe_allow_html=True)
 
-        if st.session_state.get("detail_candidate"):
-            det = st.session_state["detail_candidate"]
+        det = next((m for m in matches if m.candidate_id == st.session_state.get("detail_candidate")), None)
+        if det is not None:
             st.markdown("### Candidate Details")
             cold1, cold2 = st.columns(2)
             with cold1:
                 st.markdown("**Strengths**")
-                for s in det.get("strengths", []):
+                for s in det.strengths:
                     st.write(f"- {s}")
             with cold2:
                 st.markdown("**Risks**")
-                for r in det.get("risks", []):
+                for r in det.risks:
                     st.write(f"- {r}")
         # Export section
         st.markdown("---")
@@ -345,20 +374,26 @@ def ui() -> None:
         with export_col1:
             if st.session_state.get("matches"):
                 from json import dumps
-                st.download_button("Download JSON Report", data=dumps({"role": st.session_state.get("role"), "matches": st.session_state.get("matches")}, indent=2), file_name="report.json")
+                st.download_button("Download JSON Report", data=dumps({"role": st.session_state.get("role"), "matches": [m.to_dict() for m in matches]}, indent=2), file_name="report.json")
 
             st.divider()
             c1, c2 = st.columns(2)
             with c1:
                 if st.button("Export JSON"):
-                    out = OUTPUT_DIR / "ui_report.json"
-                    payload = {"role": st.session_state.get("role"), "matches": matches}
-                    save_json(out, payload)
-                    st.success(f"Saved {out}")
+                    # Each export is a run in the role's dashboard store; only changed matches are written
+                    role_data = st.session_state.get("role") or {}
+                    store = ReportStore(OUTPUT_DIR / "reports" / "ui" / (role_data.get("id") or "role"))
+                    run = store.write({"role": role_data, "matches": [m.to_dict() for m in matches]})
+                    if CONFIG.report_export:
+                        store.export(OUTPUT_DIR / "ui_report.json")
+                    st.success(f"Saved run {run['run']} to {store.root} ({run['upserts']} updated, {run['removed']} removed)")
             with c2:
                 if st.button("Export Markdown") and selected_role:
-                    md = export_markdown(selected_role, matches)
+                    md = export_markdown(selected_role, [m.to_dict() for m in matches])
                     st.download_button("Download report.md", data=md, file_name="report.md")
+        if refining:
+            time.sleep(0.5)
+            st.rerun()
 
 
 if __name__ == "__main__":
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Tuple
 
 import json
 
+# path -> (size, mtime_ns)
+FileStats = Dict[str, Tuple[int, int]]
+
 
 def read_text_file(path: Path) -> str:
     try:
@@ -13,9 +21,92 @@ def read_text_file(path: Path) -> str:
         return ""
 
 
+def _scan_dir(path: str, exts: FrozenSet[str]) -> Tuple[FileStats, List[str]]:
+    # One directory level: the extension is checked on the name before anything is stat-ed
+    files: FileStats = {}
+    subdirs: List[str] = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in exts:
+                        st = entry.stat()
+                        files[entry.path] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    # removed or unreadable while scanning
+                    continue
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        pass
+    return files, subdirs
+
+
+def scan_files(directory: Path, exts: Iterable[str], workers: int = 8) -> FileStats:
+    # Breadth-first scandir walk; each level's subdirectories are listed concurrently, which is
+    # what hides latency on network mounts
+    exts_lower = frozenset(e.lower() for e in exts)
+    out: FileStats = {}
+    frontier = [str(directory)]
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while frontier:
+            if pool is None or len(frontier) == 1:
+                levels = [_scan_dir(d, exts_lower) for d in frontier]
+            else:
+                levels = list(pool.map(_scan_dir, frontier, [exts_lower] * len(frontier)))
+            frontier = []
+            for files, subdirs in levels:
+                out.update(files)
+                frontier.extend(subdirs)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return dict(sorted(out.items()))
+
+
 def list_files(directory: Path, exts: Iterable[str]) -> List[Path]:
-    exts_lower = {e.lower() for e in exts}
-    return [p for p in directory.rglob("*") if p.suffix.lower() in exts_lower]
+    return [Path(p) for p in scan_files(directory, exts)]
+
+
+@dataclass
+class ScanChanges:
+    added: List[Path] = field(default_factory=list)
+    changed: List[Path] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+    files: FileStats = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def scan_changes(directory: Path, exts: Iterable[str], manifest_path: Path, workers: int = 8) -> ScanChanges:
+    # Compares a fresh scan with the size/mtime manifest of the previous call, then replaces it.
+    # The first scan (or one with different extensions) reports every file as added.
+    exts_key = sorted(e.lower() for e in exts)
+    previous: FileStats = {}
+    if manifest_path.exists():
+        try:
+            manifest = load_json(manifest_path)
+        except ValueError:
+            manifest = {}
+        if manifest.get("exts") == exts_key:
+            previous = {p: (v[0], v[1]) for p, v in manifest.get("files", {}).items()}
+    current = scan_files(directory, exts_key, workers=workers)
+    changes = ScanChanges(files=current)
+    for path, stat in current.items():
+        before = previous.get(path)
+        if before is None:
+            changes.added.append(Path(path))
+        elif before != stat:
+            changes.changed.append(Path(path))
+    changes.removed = [Path(p) for p in previous if p not in current]
+    if changes or not manifest_path.exists():
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"exts": exts_key, "files": current}), encoding="utf-8")
+        tmp.replace(manifest_path)
+    return changes
 
 
 def load_json(path: Path) -> Dict:
@@ -26,3 +117,44 @@ def save_json(path: Path, data: Dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(data, indent=2), encoding="utf-8")
 
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    # Exclusive advisory lock on `path` (created if missing), held across processes: CLI, UI and
+    # service all write the same stores under outputs/
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def pid_alive(pid: str) -> bool:
+    # Whether the process named in a "<name>.tmp-<pid>" leftover is still running (and writing it)
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
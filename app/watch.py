@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from .agents.development import DevelopmentAgent
+from .agents.screening import ScreeningAgent
+from .cache import text_fingerprint
+from .config import CONFIG
+from .data_models import Candidate, Role
+from .embeddings import EmbeddingIndex, build_index
+from .parsing import CANDIDATE_EXTS, load_corpus
+from .reports.generator import generate_reports, patch_report
+from .reports.store import ReportStore
+from .roles import ROLE_EXTS, compile_role, load_role_file
+from .skill_matrix import SkillMatrix, build_skill_matrix
+from .utils.io import scan_changes
+
+
+@dataclass
+class WatchEvent:
+    roles_ranked: List[str] = field(default_factory=list)
+    roles_patched: List[str] = field(default_factory=list)
+    roles_removed: List[str] = field(default_factory=list)
+    candidates_added: List[str] = field(default_factory=list)
+    candidates_changed: List[str] = field(default_factory=list)
+    candidates_removed: List[str] = field(default_factory=list)
+    refit: bool = False
+    elapsed_ms: float = 0.0
+
+    def __bool__(self) -> bool:
+        return bool(self.roles_ranked or self.roles_patched or self.roles_removed)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class Watcher:
+    # Polls the candidate and role folders and keeps one report store per role under
+    # out_dir/reports/<role id>/, the layout match and `report` use.
+    # The TF-IDF vocabulary/IDF is kept from the last fit so a new or edited resume is scored
+    # against every role on its own; it is refitted (and every role re-ranked) once more than
+    # `refit_ratio` of the pool has changed since the fit.
+    def __init__(self, data_dir: Path, out_dir: Path, refit_ratio: float = 0.1) -> None:
+        self.candidate_dir = data_dir / "candidates"
+        self.roles_dir = data_dir / "roles"
+        self.out_dir = out_dir
+        self.reports_dir = out_dir / "reports"
+        self.state_dir = out_dir / ".watch"
+        self.refit_ratio = refit_ratio
+        self.screening = ScreeningAgent()
+        self.development = DevelopmentAgent()
+        self.candidates: List[Candidate] = []
+        self.fingerprints: Dict[str, str] = {}
+        self.index: Optional[EmbeddingIndex] = None
+        self.skills: Optional[SkillMatrix] = None
+        self.roles: Dict[str, Role] = {}  # role file -> role
+        self.stores: Dict[str, ReportStore] = {}  # role id -> report store
+        self.changed_since_fit = 0
+        self._started = False
+
+    def _fit(self) -> None:
+        if not self.candidates:
+            self.index, self.skills = None, None
+            return
+        self.index = build_index([c.id for c in self.candidates], [c.resume_text for c in self.candidates])
+        self.skills = build_skill_matrix(self.candidates)
+        self.changed_since_fit = 0
+
+    def _update_pool(self, candidates: List[Candidate], fresh: List[Candidate]) -> None:
+        # Reuse the vectors of unchanged candidates; only `fresh` ones are transformed and extracted
+        if self.index is None or self.skills is None:
+            self._fit()
+            return
+        old_row = {cid: i for i, cid in enumerate(self.index.ids)}
+        current = {c.id for c in candidates}
+        fresh_ids = {c.id for c in fresh}
+        kept = [cid for cid in self.index.ids if cid in current and cid not in fresh_ids]
+        kept_rows = np.array([old_row[cid] for cid in kept], dtype=np.int64)
+        ids = kept + [c.id for c in fresh]
+        index = self.index.take(kept_rows, kept).append([c.id for c in fresh], [c.resume_text for c in fresh])
+        skill_rows = self.skills.matrix[kept_rows]
+        if fresh:
+            skill_rows = sparse.vstack([skill_rows, build_skill_matrix(fresh).matrix], format="csr")
+        position = {cid: i for i, cid in enumerate(ids)}
+        perm = np.array([position[c.id] for c in candidates], dtype=np.int64)
+        order = [c.id for c in candidates]
+        self.index = index.take(perm, order)
+        self.skills = SkillMatrix(ids=order, phrases=self.skills.phrases, columns=self.skills.columns, matrix=skill_rows[perm])
+
+    def _sims(self, role: Role, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        assert self.index is not None
+        q = compile_role(role).query_vector(self.index.vectorizer)
+        index = self.index if rows is None else self.index.take(rows, [])
+        return index.query_vectors(q)[0]
+
+    def _rank_role(self, role: Role) -> None:
+        matches = []
+        if self.candidates:
+            matches = self.screening.score_pool(self.candidates, role, self._sims(role), skills=self.skills)
+        cohort = self.development.plan_cohort(self.candidates, [role], skills=self.skills)
+        generate_reports(
+            self.reports_dir / role.id,
+            role,
+            self.candidates,
+            matches,
+            cohort.plans,
+            skill_gaps=cohort.gap_stats,
+            store=self._store(role.id),
+        )
+
+    def _patch_role(self, role: Role, fresh: List[Candidate], removed: List[str]) -> None:
+        store = self._store(role.id)
+        if not store.last_run or self.skills is None:
+            self._rank_role(role)
+            return
+        row_of = {cid: i for i, cid in enumerate(self.skills.ids)}
+        rows = np.array([row_of[c.id] for c in fresh], dtype=np.int64)
+        matches = []
+        plans = {}
+        if len(rows):
+            skills = self.skills.select([c.id for c in fresh])
+            matches = self.screening.score_pool(fresh, role, self._sims(role, rows), skills=skills)
+            plans = self.development.plan_cohort(fresh, [role], skills=skills).plans
+        # Department gap statistics cover the whole pool, so they are recomputed rather than patched
+        gaps = self.development.plan_cohort(self.candidates, [role], skills=self.skills).gap_stats
+        patch_report(store.root, fresh, matches, plans, removed=removed, skill_gaps=gaps, store=store)
+
+    def _store(self, role_id: str) -> ReportStore:
+        # Kept open across polls so patches diff against the in-memory latest state
+        store = self.stores.get(role_id)
+        if store is None:
+            store = self.stores[role_id] = ReportStore(self.reports_dir / role_id, compact_every=CONFIG.report_compact_every)
+        return store
+
+    def _retire(self, role_id: str) -> None:
+        # A removed role keeps its history; its latest run is simply empty
+        store = self._store(role_id)
+        if store.last_run:
+            store.clear()
+
+    def _load_role(self, path: Path) -> Optional[Role]:
+        try:
+            return load_role_file(path)
+        except Exception:
+            return None
+
+    def poll(self) -> WatchEvent:
+        started = time.perf_counter()
+        event = WatchEvent()
+        candidate_changes = scan_changes(self.candidate_dir, CANDIDATE_EXTS, self.state_dir / "candidates.json")
+        role_changes = scan_changes(self.roles_dir, ROLE_EXTS, self.state_dir / "roles.json")
+        first = not self._started
+        self._started = True
+
+        fresh: List[Candidate] = []
+        if first or candidate_changes:
+            # Reuses this poll's scan instead of walking the folder a second time
+            candidates = load_corpus(self.candidate_dir, files=candidate_changes.files)
+            fingerprints = {c.id: c.metadata.get("sha1") or text_fingerprint(c.resume_text) for c in candidates}
+            fresh = [c for c in candidates if self.fingerprints.get(c.id) != fingerprints[c.id]]
+            event.candidates_added = [c.id for c in fresh if c.id not in self.fingerprints]
+            event.candidates_changed = [c.id for c in fresh if c.id in self.fingerprints]
+            event.candidates_removed = [cid for cid in self.fingerprints if cid not in fingerprints]
+            self.candidates = candidates
+            self.fingerprints = fingerprints
+            self.changed_since_fit += len(fresh) + len(event.candidates_removed)
+            if first or self.changed_since_fit > self.refit_ratio * max(len(candidates), 1):
+                self._fit()
+                event.refit = True
+            elif fresh or event.candidates_removed:
+                self._update_pool(candidates, fresh)
+
+        rerank = set()
+        if first:
+            files = [Path(p) for p in role_changes.files]
+        else:
+            files = role_changes.added + role_changes.changed
+            for path in role_changes.removed:
+                role = self.roles.pop(str(path), None)
+                if role is not None:
+                    event.roles_removed.append(role.id)
+                    self._retire(role.id)
+        for path in files:
+            role = self._load_role(path)
+            previous = self.roles.get(str(path))
+            if previous is not None and (role is None or previous.id != role.id):
+                event.roles_removed.append(previous.id)
+                self._retire(previous.id)
+                self.roles.pop(str(path))
+            if role is not None:
+                self.roles[str(path)] = role
+                rerank.add(str(path))
+
+        for key, role in self.roles.items():
+            if key in rerank or event.refit:
+                self._rank_role(role)
+                event.roles_ranked.append(role.id)
+            elif fresh or event.candidates_removed:
+                self._patch_role(role, fresh, event.candidates_removed)
+                event.roles_patched.append(role.id)
+        event.elapsed_ms = round((time.perf_counter() - started) * 1000.0, 3)
+        return event
+
+    def run(
+        self,
+        interval: float = 5.0,
+        stop: Optional[threading.Event] = None,
+        on_event: Optional[Callable[[WatchEvent], None]] = None,
+    ) -> None:
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            event = self.poll()
+            if event and on_event is not None:
+                on_event(event)
+            stop.wait(interval)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from .data_models import Candidate, MatchResult, Role
+from .embeddings import EmbeddingIndex
+from .roles import compile_role
+from .scoring import INVITE_MIN_SCORE
+from .skill_matrix import SkillMatrix, build_skill_matrix
+
+# Role lists that carry hit masks, in MatchResult order
+KINDS = ("required_skills", "preferred_skills", "research_focus", "teaching_requirements")
+
+
+@dataclass
+class WhatIfUpdate:
+    added: Dict[str, List[str]]
+    removed: Dict[str, List[str]]
+    query_terms: int  # TF-IDF terms whose role weight changed
+    elapsed_ms: float
+
+
+class WhatIfSession:
+    # Live re-scoring while a role is edited. The candidate matrix is held column-major and each
+    # role phrase's hit column is cached, so an edit only touches the changed TF-IDF terms (a few
+    # sparse columns) and the changed phrases' hit columns, never the whole pool's text or rows.
+    def __init__(
+        self,
+        candidates: Sequence[Candidate],
+        role: Role,
+        index: EmbeddingIndex,
+        skills: Optional[SkillMatrix] = None,
+    ) -> None:
+        self.candidates = list(candidates)
+        self.ids = [c.id for c in self.candidates]
+        self.vectorizer = index.vectorizer
+        self._analyzer = self.vectorizer.build_analyzer()
+        self._idf = np.asarray(self.vectorizer.idf_, dtype=np.float64)
+        matrix = sparse.csr_matrix(index.matrix).astype(np.float64)
+        if index.scales is not None:
+            matrix = sparse.diags(np.asarray(index.scales, dtype=np.float64)) @ matrix
+        self._columns = matrix.tocsc()
+        skills = skills.select(self.ids) if skills is not None else build_skill_matrix(self.candidates)
+        self._skills = skills
+        self._skill_columns = skills.matrix.tocsc()
+        self._hits: Dict[str, np.ndarray] = {}
+        self.role = replace(role, **{kind: [] for kind in KINDS})
+        self._weights: Dict[int, float] = {}
+        self._dots = np.zeros(len(self.ids), dtype=np.float64)
+        self._counts = {kind: np.zeros(len(self.ids), dtype=np.int64) for kind in KINDS}
+        self._masks = {kind: np.zeros(len(self.ids), dtype=np.int64) for kind in KINDS}
+        self.update(role)
+
+    def hits(self, phrase: str) -> np.ndarray:
+        # Which candidates mention a phrase: a skill-matrix column, or one text scan for phrases
+        # outside the gazetteer; cached either way, so re-adding a phrase is free
+        p = phrase.lower()
+        col = self._hits.get(p)
+        if col is None:
+            j = self._skills.columns.get(p)
+            col = np.zeros(len(self.ids), dtype=bool)
+            if j is not None:
+                col[self._skill_columns.indices[self._skill_columns.indptr[j] : self._skill_columns.indptr[j + 1]]] = True
+            else:
+                col = self._skills.phrase_hits(self.candidates, [p])[p]
+            self._hits[p] = col
+        return col
+
+    def _role_weights(self, role: Role) -> Dict[int, float]:
+        # Unnormalised TF-IDF weights of the role query (raw counts x IDF, as the vectorizer builds
+        # them before L2 normalisation)
+        vocabulary = self.vectorizer.vocabulary_
+        counts = Counter(vocabulary[t] for t in self._analyzer(compile_role(role).text) if t in vocabulary)
+        return {j: n * self._idf[j] for j, n in counts.items()}
+
+    def _apply_list(self, kind: str, new: List[str]) -> None:
+        old = getattr(self.role, kind)
+        counts, masks = self._counts[kind], self._masks[kind]
+        if len(new) >= 63:
+            masks = np.zeros(len(self.ids), dtype=object)
+            counts = np.zeros(len(self.ids), dtype=np.int64)
+            for i, phrase in enumerate(new):
+                col = self.hits(phrase)
+                counts += col
+                masks[col] += 1 << i
+            self._counts[kind], self._masks[kind] = counts, masks
+            return
+        if masks.dtype == object:
+            masks = np.zeros(len(self.ids), dtype=np.int64)
+            for i, phrase in enumerate(old):
+                masks |= self.hits(phrase).astype(np.int64) << i
+        # Longest common prefix keeps its bits; the old tail is taken out and the new tail added
+        keep = 0
+        while keep < min(len(old), len(new)) and old[keep] == new[keep]:
+            keep += 1
+        for phrase in old[keep:]:
+            counts -= self.hits(phrase)
+        masks &= (1 << keep) - 1
+        for i, phrase in enumerate(new[keep:], start=keep):
+            col = self.hits(phrase)
+            counts += col
+            masks |= col.astype(np.int64) << i
+        self._counts[kind], self._masks[kind] = counts, masks
+
+    def update(self, role: Role) -> WhatIfUpdate:
+        started = time.perf_counter()
+        added: Dict[str, List[str]] = {}
+        removed: Dict[str, List[str]] = {}
+        for kind in KINDS:
+            old, new = getattr(self.role, kind), list(getattr(role, kind))
+            if old == new:
+                continue
+            added[kind] = [p for p in new if p not in old]
+            removed[kind] = [p for p in old if p not in new]
+            self._apply_list(kind, new)
+        weights = self._role_weights(role)
+        delta = {j: weights.get(j, 0.0) - self._weights.get(j, 0.0) for j in set(weights) | set(self._weights)}
+        delta = {j: d for j, d in delta.items() if d}
+        if delta:
+            terms = np.fromiter(delta, dtype=np.int64, count=len(delta))
+            self._dots += self._columns[:, terms] @ np.fromiter(delta.values(), dtype=np.float64, count=len(delta))
+        self._weights = weights
+        self.role = replace(role, **{kind: list(getattr(role, kind)) for kind in KINDS})
+        return WhatIfUpdate(added, removed, len(delta), round((time.perf_counter() - started) * 1000.0, 3))
+
+    def add(self, phrase: str, kind: str = "required_skills") -> WhatIfUpdate:
+        if phrase in getattr(self.role, kind):
+            return WhatIfUpdate({}, {}, 0, 0.0)
+        return self.update(replace(self.role, **{kind: getattr(self.role, kind) + [phrase]}))
+
+    def remove(self, phrase: str, kind: str = "required_skills") -> WhatIfUpdate:
+        return self.update(replace(self.role, **{kind: [p for p in getattr(self.role, kind) if p != phrase]}))
+
+    @property
+    def scores(self) -> np.ndarray:
+        # Cosine against the edited role: cached dot products over the current query norm
+        norm = float(np.sqrt(sum(w * w for w in self._weights.values())))
+        if not norm:
+            return np.zeros(len(self.ids), dtype=np.float32)
+        return (self._dots / norm).astype(np.float32)
+
+    def results(self, top_k: Optional[int] = None) -> List[MatchResult]:
+        sims = self.scores
+        order = np.argsort(-sims, kind="stable")
+        if top_k is not None:
+            order = order[:top_k]
+        required = self._counts["required_skills"]
+        other = self._counts["preferred_skills"] + self._counts["research_focus"] + self._counts["teaching_requirements"]
+        missing = len(self.role.required_skills) - required
+        invite = (sims >= INVITE_MIN_SCORE) & (missing <= required + other)
+        masks = [self._masks[kind] for kind in KINDS]
+        return [
+            MatchResult(self.ids[i], self.role, sims[i], *(int(m[i]) for m in masks), next_step=int(invite[i]))
+            for i in order
+        ]
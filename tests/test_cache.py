@@ -0,0 +1,57 @@
+import threading
+
+from app.cache import RankingCache
+
+
+def test_get_or_compute_single_flight():
+    cache = RankingCache()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute(("index", "v1"), compute, persist=False))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    started.wait(5)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(calls) == 1
+    assert len(results) == 4 and all(r is results[0] for r in results)
+
+
+def test_get_or_compute_failure_reaches_waiters_and_is_not_cached():
+    cache = RankingCache()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("fit failed")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_compute("k", failing, persist=False)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    owner = threading.Thread(target=call)
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=call)
+    waiter.start()
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+    assert len(errors) == 2
+    assert cache.get_or_compute("k", lambda: 42, persist=False) == 42
@@ -0,0 +1,24 @@
+import shutil
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from app.cli import app
+from app.watch import Watcher
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+def test_report_diff_unknown_run_lists_available_runs(tmp_path):
+    data = tmp_path / "data"
+    shutil.copytree(DATA / "roles", data / "roles", ignore=shutil.ignore_patterns("*.json"))
+    (data / "candidates").mkdir()
+    shutil.copy(DATA / "candidates" / "Alice_Kumar_profile.txt", data / "candidates")
+    out = tmp_path / "outputs"
+    Watcher(data, out).poll()
+
+    result = CliRunner().invoke(app, ["report", "--out", str(out), "--role", "cs_asst_prof", "--diff", "1", "--diff", "7"])
+    assert result.exit_code == 2
+    assert "run 7 is not in the store" in result.output
+    assert "runs for cs_asst_prof: 1" in result.output
+    assert not isinstance(result.exception, KeyError)
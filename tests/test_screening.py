@@ -0,0 +1,62 @@
+import threading
+
+from app.agents.screening import AnytimeRanking, ScreeningAgent
+from app.data_models import Candidate, Role
+
+ROLE = Role(
+    id="cs_asst_prof",
+    title="Assistant Professor of Computer Science",
+    department="Computer Science",
+    required_skills=["machine learning", "teaching"],
+    preferred_skills=["deep learning"],
+    research_focus=["artificial intelligence"],
+    teaching_requirements=["undergraduate courses"],
+)
+
+
+def _candidates(n):
+    topics = ["machine learning", "deep learning", "teaching undergraduate courses", "artificial intelligence", "databases"]
+    return [
+        Candidate(id=f"c{i}", name=f"Candidate {i}", email=None, resume_text=f"Experience in {topics[i % 5]} and {topics[(i * 3) % 5]}.")
+        for i in range(n)
+    ]
+
+
+class _GatedAgent(ScreeningAgent):
+    # Holds the first block open until the test releases it
+    def __init__(self):
+        super().__init__(share_index=False, out_of_core_rows=None)
+        self.blocks = 0
+        self.exact = 0
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def score_pool(self, *args, **kwargs):
+        self.blocks += 1
+        self.entered.set()
+        self.release.wait(5)
+        return super().score_pool(*args, **kwargs)
+
+    def rank_candidates(self, *args, **kwargs):
+        self.exact += 1
+        return super().rank_candidates(*args, **kwargs)
+
+
+def test_cancelled_anytime_ranking_stops_between_blocks():
+    agent = _GatedAgent()
+    ranking = AnytimeRanking(agent, _candidates(40), ROLE, block_size=10)
+    assert agent.entered.wait(5)
+    ranking.cancel()
+    agent.release.set()
+    snapshot = ranking.wait(5)
+    assert ranking.done and ranking.error is None
+    assert agent.blocks == 1 and agent.exact == 0
+    assert snapshot.scored == 10 and snapshot.partial
+
+
+def test_anytime_ranking_finishes_exact_when_not_cancelled():
+    agent = _GatedAgent()
+    agent.release.set()
+    snapshot = AnytimeRanking(agent, _candidates(40), ROLE, block_size=10).wait(10)
+    assert agent.exact == 1
+    assert snapshot.exact and not snapshot.partial and snapshot.scored == 40
@@ -0,0 +1,29 @@
+import json
+import shutil
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from app.cli import app
+from app.watch import Watcher
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+def test_report_lists_watch_patched_run(tmp_path):
+    data = tmp_path / "data"
+    shutil.copytree(DATA / "roles", data / "roles", ignore=shutil.ignore_patterns("*.json"))
+    (data / "candidates").mkdir()
+    shutil.copy(DATA / "candidates" / "Alice_Kumar_profile.txt", data / "candidates")
+    out = tmp_path / "outputs"
+    watcher = Watcher(data, out, refit_ratio=1.0)  # patch rather than refit the tiny pool
+    assert watcher.poll().roles_ranked == ["cs_asst_prof"]
+
+    shutil.copy(DATA / "candidates" / "Miguel_Santos_profile.txt", data / "candidates")
+    assert watcher.poll().roles_patched == ["cs_asst_prof"]
+
+    result = CliRunner().invoke(app, ["report", "--out", str(out), "--role", "cs_asst_prof", "--runs"])
+    assert result.exit_code == 0, result.output
+    runs = json.loads(result.output)
+    assert [r["run"] for r in runs] == [1, 2]
+    assert runs[-1]["upserts"] >= 1